@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the decoding of the Skydive responses: the standard
+library (as RESTClient does) vs the JSON backend of skynet (see codec)
+
+The responses are synthetic payloads or the responses of the topology
+queries of recorded archives (see the global --record option). The test
+suite checks the synthetic payloads (see tests/test_decode.py)
+
+Usage:
+    python -m benchmarks.decode [--rows N] [--repeat N] [--archive FILE ...]
+"""
+import argparse
+import json
+from typing import List, Tuple
+
+from skynet.common import codec
+from skynet.common.record import TOPOLOGY_PATH, Archive
+from benchmarks import payloads
+from benchmarks.extract import measure
+
+
+def responses(rows: int, archives: List[str]) -> List[Tuple[str, bytes]]:
+    """
+    Returns the encoded responses to decode
+    """
+    if archives:
+        return [('{}: {}'.format(path, entry['data']),
+                 json.dumps(entry['response']).encode())
+                for path in archives for entry in Archive.load(path)
+                if entry['path'] == TOPOLOGY_PATH and 'response' in entry]
+
+    return [
+        ('ofrule', json.dumps(payloads.ofrules(rows)).encode()),
+        ('logical_flow', json.dumps(payloads.logical_flows(rows)).encode()),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--archive',
+                        action='append',
+                        default=[],
+                        help='Decode the responses of a recorded archive')
+    args = parser.parse_args()
+
+    results = []
+    for name, body in responses(args.rows, args.archive):
+        if codec.loads(body) != json.loads(body.decode()):
+            raise Exception('Mismatch decoding %s' % name)
+        for impl, func in [('stdlib', lambda: json.loads(body.decode())),
+                           (codec.BACKEND, lambda: codec.loads(body))]:
+            elapsed = measure(func, args.repeat)
+            results.append({
+                'payload': name,
+                'impl': impl,
+                'bytes': len(body),
+                'seconds': round(elapsed, 4),
+                'mb_per_sec': round(len(body) / elapsed / 1e6, 1),
+            })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
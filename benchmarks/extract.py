@@ -0,0 +1,110 @@
+"""
+Benchmark of the SkyDiveData extraction: row-wise (legacy) vs columnar
+
+Usage:
+    python -m benchmarks.extract [--rows N] [--repeat N]
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from pandas import DataFrame, Timestamp
+
+from skynet.common.data import SkyDiveData, Field
+from skynet.ovs.flows.data import OFFLowData
+from skynet.ovn.lflow.data import LFlowData
+from benchmarks import payloads
+
+LEGACY_BASIC_FIELDS = {
+    "ID": None,
+    "Host": None,
+    "CreatedAt": Timestamp,
+    "UpdatedAt": Timestamp,
+    "DeletedAt": Timestamp,
+}
+"""
+The basic fields as they were extracted before the times were converted
+once per column: one Timestamp per value
+"""
+
+
+def _legacy_value(field: Field, data: Dict[str, Any]) -> Any:
+    """
+    Field.value as it was implemented before the columnar extraction:
+    the dotted name is split on every call
+    """
+    if type(field).__name__ == 'Metadata':
+        data = data['Metadata']
+    value: Any = data
+    for key in field.name.split('.'):
+        if not value:
+            continue
+        value = value.get(key)
+    return field.trans(value) if field.trans else value
+
+
+def legacy(raw: List[Dict[str, Any]], meta: List[Field],
+           index: str) -> DataFrame:
+    """
+    The row-wise extraction: one dictionary per node and
+    DataFrame.from_records
+    """
+    extracted = [{
+        **{
+            field: trans(el[field]) if trans else el[field]
+            for field, trans in LEGACY_BASIC_FIELDS.items()
+        },
+        **{meta.key(): _legacy_value(meta, el)
+           for meta in meta}
+    } for el in raw]
+    return DataFrame.from_records(data=extracted, index=index)
+
+
+def columnar(raw: List[Dict[str, Any]], meta: List[Field],
+             index: str) -> DataFrame:
+    """
+    The columnar extraction
+    """
+    return SkyDiveData(raw, meta, index).data()
+
+
+def measure(func: Callable, repeat: int, *args) -> float:
+    """
+    Returns the best wall time of a number of runs
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cases = [
+        ('ofrule', payloads.ofrules(args.rows), OFFLowData.METADATA, 'ID'),
+        ('logical_flow', payloads.logical_flows(args.rows),
+         LFlowData.METADATA, 'Name'),
+    ]
+    results = []
+    for name, raw, meta, index in cases:
+        for impl, func in [('legacy', legacy), ('columnar', columnar)]:
+            elapsed = measure(func, args.repeat, raw, meta, index)
+            results.append({
+                'payload': name,
+                'impl': impl,
+                'rows': len(raw),
+                'seconds': round(elapsed, 4),
+                'rows_per_sec': int(len(raw) / elapsed),
+            })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of the lookups on nested fields: per-row scans of the DataFrame
+cells (legacy) vs joins with the side tables (see SkyDiveData.nested)
+
+Usage:
+    python -m benchmarks.nested [--rows N] [--repeat N]
+"""
+import argparse
+import json
+import time
+from typing import Any, List, Tuple
+
+from pandas import DataFrame
+
+from skynet.ovs.flows.data import OFFLowData
+from benchmarks import payloads
+from benchmarks.extract import measure
+
+LOOKUPS: List[Tuple[str, Any, List[Any]]] = [
+    ('in_port', 42, [42]),
+    ('eth_type', 0x0806, [0x0806]),
+    ('ip_proto', 6, [6]),
+    ('tcp_dst', 443, [443]),
+]
+
+
+def legacy(data: OFFLowData, field: str, value: Any) -> DataFrame:
+    """
+    The per-row scan of the Filters cells
+    """
+    dataframe = data.data()
+    return dataframe[[
+        any(match['Type'] == field and match['Value'] == value
+            for match in filters or []) for filters in dataframe['Filters']
+    ]]
+
+
+def joined(data: OFFLowData, field: str, values: List[Any]) -> DataFrame:
+    """
+    The lookup in the side table of the Filters
+    """
+    return data.having('Filters', field, values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data = OFFLowData(payloads.ofrules(args.rows))
+    data.data()
+    start = time.perf_counter()
+    items = len(data.nested('Filters'))
+    print(json.dumps({
+        'rows': len(data),
+        'items': items,
+        'build_seconds': round(time.perf_counter() - start, 4),
+    }))
+
+    results = []
+    for field, value, values in LOOKUPS:
+        expected = legacy(data, field, value)
+        if not expected.index.equals(joined(data, field, values).index):
+            raise Exception('Mismatch looking up %s=%s' % (field, value))
+        for impl, func, arg in [('legacy', legacy, value),
+                                ('joined', joined, values)]:
+            elapsed = measure(func, args.repeat, data, field, arg)
+            results.append({
+                'lookup': '{}={}'.format(field, value),
+                'impl': impl,
+                'rows': len(data),
+                'matches': len(expected),
+                'seconds': round(elapsed, 4),
+            })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
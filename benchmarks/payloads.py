@@ -0,0 +1,109 @@
+"""
+Synthetic Skydive payloads used by the benchmarks
+"""
+import random
+import uuid
+from typing import Any, Dict, List
+
+MATCH_FIELDS = [
+    ('in_port', lambda rnd: rnd.randint(1, 1024)),
+    ('eth_type', lambda rnd: rnd.choice([0x0800, 0x0806, 0x86dd])),
+    ('eth_src', lambda rnd: "0a:58:0a:f4:%02x:%02x" %
+     (rnd.randint(0, 255), rnd.randint(0, 255))),
+    ('ipv4_src', lambda rnd: "10.244.%i.%i" %
+     (rnd.randint(0, 255), rnd.randint(1, 254))),
+    ('ipv4_dst', lambda rnd: "10.96.%i.%i" %
+     (rnd.randint(0, 255), rnd.randint(1, 254))),
+    ('ip_proto', lambda rnd: rnd.choice([1, 6, 17])),
+    ('tcp_dst', lambda rnd: rnd.randint(1, 65535)),
+]
+
+
+def _node(rnd: random.Random, host: str,
+          metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a Skydive node with the common fields
+    """
+    now = 1600000000000 + rnd.randint(0, 10000000)
+    return {
+        "ID": str(uuid.UUID(int=rnd.getrandbits(128))),
+        "Host": host,
+        "Origin": "analyzer." + host,
+        "CreatedAt": now,
+        "UpdatedAt": now,
+        "DeletedAt": 0,
+        "Revision": 1,
+        "Metadata": metadata,
+    }
+
+
+def ofrule(rnd: random.Random, host: str = "node1") -> Dict[str, Any]:
+    """
+    Generate an ofrule node
+    """
+    filters = [{
+        "Type": name,
+        "Value": gen(rnd)
+    } for name, gen in rnd.sample(MATCH_FIELDS, rnd.randint(1, 4))]
+    return _node(
+        rnd, host, {
+            "Type": "ofrule",
+            "Name": "flow",
+            "Cookie": rnd.getrandbits(32),
+            "Table": rnd.randint(0, 80),
+            "Priority": rnd.randint(0, 65535),
+            "Filters": filters,
+            "Actions": [{
+                "Type": "resubmit",
+                "Arguments": {
+                    "Table": rnd.randint(0, 80)
+                }
+            }],
+            "Metric": {
+                "RxPackets": rnd.randint(0, 10000),
+                "RxBytes": rnd.randint(0, 10000000),
+            },
+            "Manager": "ovs",
+        })
+
+
+def logical_flow(rnd: random.Random) -> Dict[str, Any]:
+    """
+    Generate a logical_flow node
+    """
+    pipeline = rnd.choice(["ingress", "egress"])
+    table = rnd.randint(0, 25)
+    return _node(
+        rnd, "ovn-sb", {
+            "Type": "logical_flow",
+            "Name": str(uuid.UUID(int=rnd.getrandbits(128))),
+            "Manager": "ovn",
+            "OVN": {
+                "LFActions": "next;",
+                "LFMatch": "inport == \"port%i\"" % rnd.randint(0, 1000),
+                "LFPriority": rnd.randint(0, 65535),
+                "Pipeline": pipeline,
+                "Table": table,
+                "LogicalDataPath": str(uuid.UUID(int=rnd.randint(0, 64))),
+                "ExtID": {
+                    "stage-name": "ls_{}_table{}".format(pipeline[:2], table),
+                    "source": "northd.c:%i" % rnd.randint(1000, 9000),
+                },
+            },
+        })
+
+
+def ofrules(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a list of ofrule nodes
+    """
+    rnd = random.Random(seed)
+    return [ofrule(rnd, "node%i" % (i % 16)) for i in range(count)]
+
+
+def logical_flows(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a list of logical_flow nodes
+    """
+    rnd = random.Random(seed)
+    return [logical_flow(rnd) for _ in range(count)]
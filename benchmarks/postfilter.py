@@ -0,0 +1,79 @@
+"""
+Benchmark of the OpenFlow match post-filters: per-item (legacy) vs column masks
+
+Usage:
+    python -m benchmarks.postfilter [--rows N] [--repeat N]
+"""
+import argparse
+import json
+from typing import Any, Dict, List
+
+from skynet.ovs.flows.data import OFFlowFilter
+from benchmarks import payloads
+from benchmarks.extract import measure
+
+FILTERS = [
+    'in_port=42',
+    'eth_type=0x0800',
+    'ipv4_src=10.244.7.9',
+    'tcp_dst=443,eth_type=2048',
+]
+
+
+def legacy(raw: List[Dict[str, Any]], filter_str: str) -> List[Dict[str, Any]]:
+    """
+    The per-item match: a throwaway dictionary per filter and flow
+    """
+    filters = []
+    for elem in filter_str.split(','):
+        key, val = elem.split('=')
+        value: Any = val
+        if key in ['in_port', 'eth_type', 'tcp_dst', 'tcp_src', 'ip_proto']:
+            value = int(val, 0)
+        filters.append((key, value))
+
+    return list(
+        filter(
+            lambda item: all({
+                "Type": key,
+                "Value": value
+            } in item['Metadata']['Filters'] for key, value in filters), raw))
+
+
+def columnar(raw: List[Dict[str, Any]],
+             filter_str: str) -> List[Dict[str, Any]]:
+    """
+    The column mask evaluation
+    """
+    filter_obj = OFFlowFilter()
+    filter_obj.process_string(filter_str)
+    return filter_obj.post_process(raw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    raw = payloads.ofrules(args.rows)
+    results = []
+    for filter_str in FILTERS:
+        expected = legacy(raw, filter_str)
+        if columnar(raw, filter_str) != expected:
+            raise Exception('Mismatch filtering with %s' % filter_str)
+        for impl, func in [('legacy', legacy), ('columnar', columnar)]:
+            elapsed = measure(func, args.repeat, raw, filter_str)
+            results.append({
+                'filter': filter_str,
+                'impl': impl,
+                'rows': len(raw),
+                'matches': len(expected),
+                'seconds': round(elapsed, 4),
+                'rows_per_sec': int(len(raw) / elapsed),
+            })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
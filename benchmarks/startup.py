@@ -0,0 +1,146 @@
+"""
+Startup-time benchmark: runs commands that do not query Skydive (e.g:
+"--help") in a new interpreter and checks that they start within a time
+budget and that they do not import heavy dependencies they do not need
+
+It also checks that the short help of the lazily imported subcommands (see
+LazyGroup) matches their docstrings
+
+Usage:
+    python -m benchmarks.startup [--budget-scale 1.0] [--repeat 5]
+
+Prints one JSON object per command and exits with 1 if any check fails.
+The same checks run in the test suite (see tests/test_startup.py)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Set
+
+import click
+
+SKYNET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'bin', 'skynet')
+
+HEAVY = ['pandas', 'numpy', 'graphviz', 'IPython', 'pyarrow', 'autobahn',
+         'skydive.rest.client']
+
+CASES = [
+    (['--help'], 0.3, HEAVY),
+    (['ovn', '--help'], 0.3, HEAVY),
+    (['record', '--help'], 0.3, HEAVY),
+    (['cache', '--help'], 0.3, HEAVY),
+    # These commands need pandas (their options are defined next to the data
+    # providers)
+    (['ovs', '--help'], 1.0, ['graphviz', 'IPython', 'autobahn']),
+    (['capture', '--help'], 1.0, ['graphviz', 'IPython', 'autobahn']),
+]
+"""
+The commands that are measured, their time budget (in seconds) and the
+modules they must not import
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ, SKYNET_DAEMON='0')
+    root = os.path.dirname(os.path.dirname(SKYNET))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [root] + [path for path in [env.get('PYTHONPATH')] if path])
+    return env
+
+
+def startup(args: List[str], repeat: int) -> float:
+    """
+    Returns the best wall time of running the CLI with some arguments
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SKYNET] + args, env=_env(),
+                       stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def imported(args: List[str]) -> Set[str]:
+    """
+    Returns the modules the CLI imports when run with some arguments
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', SKYNET] + args,
+        env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    return {
+        line.split('|')[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and line.count('|') == 2
+    }
+
+
+def lazy_help_errors() -> List[str]:
+    """
+    Returns the lazy subcommands whose short help does not match their
+    docstring (importing all of them)
+    """
+    from skynet.common.lazy import LazyGroup
+    from skynet.main import maincli
+
+    errors = []
+    groups = [('skynet', maincli)]
+    while groups:
+        path, group = groups.pop()
+        if not isinstance(group, LazyGroup):
+            continue
+        for name, (_, short_help) in sorted(group.lazy_commands.items()):
+            command = group.load(name)
+            actual = command.get_short_help_str(limit=1000)
+            if actual != short_help:
+                errors.append('{} {}: {!r} != {!r}'.format(
+                    path, name, short_help, actual))
+            if isinstance(command, click.Group):
+                groups.append(('{} {}'.format(path, name), command))
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='Scale the time budgets (e.g: on slow machines)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        best = min(best, time.perf_counter() - start)
+    print(json.dumps({'interpreter_seconds': round(best, 4)}))
+
+    failed = False
+    for cmd, budget, forbidden in CASES:
+        budget *= args.budget_scale
+        seconds = startup(cmd, args.repeat)
+        heavy = sorted(set(forbidden) & imported(cmd))
+        ok = seconds <= budget and not heavy
+        failed = failed or not ok
+        print(json.dumps({
+            'command': ' '.join(cmd),
+            'seconds': round(seconds, 4),
+            'budget': round(budget, 4),
+            'heavy_imports': heavy,
+            'ok': ok,
+        }))
+        sys.stdout.flush()
+
+    errors = lazy_help_errors()
+    for error in errors:
+        print('Lazy command help mismatch: ' + error, file=sys.stderr)
+
+    sys.exit(1 if failed or errors else 0)
+
+
+if __name__ == '__main__':
+    main()
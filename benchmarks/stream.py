@@ -0,0 +1,115 @@
+"""
+Benchmark of the streamed query results: a whole decoded response
+(RESTClient.lookup) vs the nodes decoded and projected in chunks as they
+are received (see SkyDiveDataProvider._stream_query)
+
+The response is served by a local HTTP server. The peak memory is measured
+with tracemalloc (which slows both implementations down)
+
+Usage:
+    python -m benchmarks.stream [--rows N] [--chunk-size N] [--repeat N]
+"""
+import argparse
+import json
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Tuple
+
+from skynet.context import SkyNetCtxt
+from skynet.common.data import SkyDiveDataProvider
+from skynet.common.query import Query
+from skynet.common.rest import SkyNetRESTClient
+from skynet.ovs.flows.data import OFFLowData, OFFlowFilter
+from benchmarks import payloads
+from benchmarks.extract import measure
+
+FILTER = 'eth_type=0x0800'
+
+
+def serve(body: bytes) -> HTTPServer:
+    """
+    Start an HTTP server that answers every query with the same body
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = HTTPServer(('localhost', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def listing(api: str, chunk_size: int) -> Callable[[], Any]:
+    """
+    Returns a function that lists the (filtered) flows
+    """
+    def run() -> Any:
+        ctxt = SkyNetCtxt(api)
+        ctxt.set_rest_cli(SkyNetRESTClient(api))
+        ctxt.set_option('chunk_size', chunk_size)
+        filter_obj = OFFlowFilter()
+        filter_obj.process_string(FILTER)
+        return SkyDiveDataProvider(ctxt)._run_filtered_query(
+            Query.V().has('Type', 'ofrule'), OFFLowData.projection(),
+            filter_obj)
+
+    return run
+
+
+def peak(func: Callable[[], Any]) -> Tuple[int, Any]:
+    """
+    Returns the peak of the memory allocated by a call and its result
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    body = json.dumps(payloads.ofrules(args.rows)).encode()
+    server = serve(body)
+    api = 'localhost:{}'.format(server.server_address[1])
+
+    results = []
+    expected = None
+    for impl, chunk_size in [('whole', 0), ('streamed', args.chunk_size)]:
+        run = listing(api, chunk_size)
+        memory, data = peak(run)
+        if expected is None:
+            expected = data
+        elif data != expected:
+            raise Exception('Mismatch streaming the response')
+        elapsed = measure(run, args.repeat)
+        results.append({
+            'impl': impl,
+            'rows': args.rows,
+            'bytes': len(body),
+            'chunk_size': chunk_size,
+            'matches': len(data),
+            'seconds': round(elapsed, 4),
+            'peak_bytes': memory,
+        })
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
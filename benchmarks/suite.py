@@ -0,0 +1,192 @@
+"""
+End-to-end benchmark suite: runs the providers and printers against
+synthetic topologies served by a fake Skydive REST client
+
+Every query is answered from the topology by the local gremlin evaluator the
+first time it is seen. The JSON encoded response is then kept, so the
+measured runs pay for decoding it (as with the real client) but not for
+evaluating the query
+
+Usage:
+    python -m benchmarks.suite [--scales 10000,100000,1000000] [--repeat N]
+        [--cases offlows,lflows,...] [--jobs N]
+
+Prints one JSON object per case and scale
+"""
+import argparse
+import io
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import click
+
+from skynet.context import SkyNetCtxt
+from skynet.common.gremlin import LocalClient
+from skynet.common.graph import Graph
+from skynet.host.data import HostDataProvider
+from skynet.k8s.data import K8sFilter, K8sProvider
+from skynet.ovn.acl.data import ACLProvider
+from skynet.ovn.lflow.data import LFlowFilter, LFlowProvider
+from skynet.ovn.lflow.ovn_printer import OVNFLowPrinter
+from skynet.ovn.ls.data import LSProvider
+from skynet.ovs.bridge.data import OvSDataProvider
+from skynet.ovs.flows.data import OFFlowFilter, OFFlowProvider
+from skynet.summary import summary
+from benchmarks.topology import Topology, sizes
+
+
+class FakeRESTClient(LocalClient):
+    """
+    FakeRESTClient answers the queries from a local graph and replays the
+    JSON encoded responses
+    """
+    def __init__(self, graph: Graph):
+        super(FakeRESTClient, self).__init__(graph)
+        self._responses: Dict[str, str] = {}
+        self.queries = 0
+        self.bytes = 0
+
+    def lookup(self, gremlin: str, klass: Optional[Any] = None) -> Any:
+        response = self._responses.get(gremlin)
+        if response is None:
+            response = json.dumps(super(FakeRESTClient, self).lookup(gremlin))
+            self._responses[gremlin] = response
+        self.queries += 1
+        self.bytes += len(response)
+        return json.loads(response)
+
+
+def _filter(klass: Callable, filter_str: str) -> Any:
+    filter_obj = klass()
+    filter_obj.process_string(filter_str)
+    return filter_obj
+
+
+def _summary(ctxt: SkyNetCtxt) -> str:
+    output = io.StringIO()
+    with redirect_stdout(output), click.Context(summary, obj=ctxt) as ctx:
+        ctx.invoke(summary)
+    return output.getvalue()
+
+
+Case = Tuple[Callable[[SkyNetCtxt], Any], Callable[[Any], Any]]
+"""
+A case is made of a function that prepares its input (not measured) and the
+function that is measured
+"""
+
+CASES: Dict[str, Case] = {
+    'offlows': (lambda ctxt: ctxt,
+                lambda ctxt: OFFlowProvider(ctxt).list()),
+    'offlows_bridge': (lambda ctxt: ctxt, lambda ctxt: OFFlowProvider(
+        ctxt).list(host='node0', bridge='br-int')),
+    'offlows_filtered': (lambda ctxt: ctxt, lambda ctxt: OFFlowProvider(
+        ctxt).list(filter_obj=_filter(OFFlowFilter, 'Table=0..10 AND ip_proto=6'))),
+    'offlows_render': (lambda ctxt: OFFlowProvider(ctxt).list(),
+                       lambda flows: flows.to_string()),
+    'lflows': (lambda ctxt: ctxt, lambda ctxt: LFlowProvider(ctxt).list()),
+    'lflows_filtered': (lambda ctxt: ctxt, lambda ctxt: LFlowProvider(
+        ctxt).list(_filter(LFlowFilter, 'Pipeline=ingress,Table=0..5'))),
+    'lflows_format': (lambda ctxt: LFlowProvider(ctxt).list(),
+                      lambda flows: OVNFLowPrinter().fformat_all(flows)),
+    'bridges': (lambda ctxt: ctxt,
+                lambda ctxt: OvSDataProvider(ctxt).get_bridges()),
+    'hosts': (lambda ctxt: ctxt, lambda ctxt: HostDataProvider(ctxt).list()),
+    'pods': (lambda ctxt: ctxt,
+             lambda ctxt: K8sProvider(ctxt).list_pods(K8sFilter())),
+    'switches': (lambda ctxt: ctxt, lambda ctxt: LSProvider(ctxt).list()),
+    'acls': (lambda ctxt: ctxt, lambda ctxt: ACLProvider(ctxt).list()),
+    'summary': (lambda ctxt: ctxt, _summary),
+}
+
+
+def _rows(result: Any) -> Optional[int]:
+    if isinstance(result, str):
+        return result.count('\n')
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def run_case(name: str, client: FakeRESTClient, repeat: int,
+             jobs: int) -> Dict[str, Any]:
+    """
+    Run a case (once to warm up the responses, then "repeat" times) with a
+    fresh context each time, so nothing is memoized between the runs
+    """
+    prepare, func = CASES[name]
+
+    def context() -> SkyNetCtxt:
+        ctxt = SkyNetCtxt(jobs=jobs)
+        ctxt.set_rest_cli(client)
+        return ctxt
+
+    func(prepare(context()))
+
+    best = float('inf')
+    result = None
+    queries = 0
+    response_bytes = 0
+    for _ in range(repeat):
+        arg = prepare(context())
+        before = (client.queries, client.bytes)
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+        queries = client.queries - before[0]
+        response_bytes = client.bytes - before[1]
+
+    return {
+        'case': name,
+        'seconds': round(best, 4),
+        'rows': _rows(result),
+        'queries': queries,
+        'response_bytes': response_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', default='10000,100000',
+                        help='Comma separated number of nodes')
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help='Comma separated cases: ' + ', '.join(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=SkyNetCtxt.DEFAULT_JOBS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cases = [case for case in args.cases.split(',') if case]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error('Unknown cases: %s' % ', '.join(unknown))
+
+    for scale in [int(scale) for scale in args.scales.split(',') if scale]:
+        topology = Topology.scaled(scale, args.seed)
+        start = time.perf_counter()
+        graph = topology.generate()
+        nodes = sizes(graph)
+        print(json.dumps({
+            'scale': scale,
+            'nodes': sum(nodes.values()),
+            'edges': len(graph.edges()),
+            'generate_seconds': round(time.perf_counter() - start, 4),
+            'topology': topology.params(),
+            'types': nodes,
+        }))
+        sys.stdout.flush()
+
+        client = FakeRESTClient(graph)
+        for case in cases:
+            result = run_case(case, client, args.repeat, args.jobs)
+            result['scale'] = scale
+            print(json.dumps(result))
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+Synthetic Skydive topologies used by the benchmarks
+
+A topology is made of:
+    - hosts, each one with some OvS bridges. Each bridge has some ports (with
+      one interface each) and some OpenFlow rules
+    - a logical switch per host with the logical switch ports of its pods
+    - k8s pods, each one with a container and a logical switch port
+    - logical flows, ACLs and the k8s ovn-config
+"""
+import random
+import uuid
+from typing import Any, Dict, List
+
+from skynet.common.graph import Graph
+from benchmarks import payloads
+
+
+class Topology():
+    """
+    Topology holds the size parameters of a synthetic topology
+    """
+    def __init__(self,
+                 hosts: int = 3,
+                 bridges: int = 2,
+                 ports: int = 10,
+                 ofrules: int = 100,
+                 lflows: int = 1000,
+                 pods: int = 30,
+                 acls: int = 50,
+                 seed: int = 0):
+        """
+        Topology constructor
+        Args:
+            hosts: The number of hosts
+            bridges: The number of OvS bridges per host
+            ports: The number of ports per bridge
+            ofrules: The number of OpenFlow rules per bridge
+            lflows: The number of logical flows
+            pods: The number of pods
+            acls: The number of ACLs
+            seed: The seed of the random generator
+        """
+        self.hosts = max(hosts, 1)
+        self.bridges = bridges
+        self.ports = ports
+        self.ofrules = ofrules
+        self.lflows = lflows
+        self.pods = pods
+        self.acls = acls
+        self.seed = seed
+
+    @classmethod
+    def scaled(cls, nodes: int, seed: int = 0) -> 'Topology':
+        """
+        Returns a topology of (roughly) a number of nodes. OpenFlow rules and
+        logical flows make up most of it, as in real clusters
+        """
+        hosts = max(nodes // 5000, 2)
+        bridges = 2
+        ports = max(nodes // (hosts * bridges * 40), 1)
+        ofrules = max(nodes // (hosts * bridges * 2), 1)
+        return cls(hosts=hosts,
+                   bridges=bridges,
+                   ports=ports,
+                   ofrules=ofrules,
+                   lflows=nodes * 3 // 10,
+                   pods=nodes // 50,
+                   acls=nodes // 100,
+                   seed=seed)
+
+    def params(self) -> Dict[str, int]:
+        return {
+            'hosts': self.hosts,
+            'bridges': self.bridges,
+            'ports': self.ports,
+            'ofrules': self.ofrules,
+            'lflows': self.lflows,
+            'pods': self.pods,
+            'acls': self.acls,
+        }
+
+    def generate(self) -> Graph:
+        """
+        Generate the topology graph
+        """
+        return _Generator(self).generate()
+
+
+class _Generator():
+    """
+    Builds the Graph of a Topology
+    """
+    def __init__(self, topology: Topology):
+        self._topo = topology
+        self._rnd = random.Random(topology.seed)
+        self._graph = Graph()
+
+    def generate(self) -> Graph:
+        self._add(
+            'ovn-master', {
+                'Type': 'configmap',
+                'Name': 'ovn-config',
+                'Manager': 'k8s',
+                'K8s': {
+                    'Namespace': 'openshift-ovn-kubernetes',
+                    'Extra': {
+                        'Data': {
+                            'mtu': '1400',
+                            'net_cidr': '10.244.0.0/16',
+                            'svc_cidr': '10.96.0.0/12',
+                        }
+                    }
+                }
+            })
+        switches = [self._host(pos) for pos in range(self._topo.hosts)]
+        for pos in range(self._topo.pods):
+            self._pod(pos, switches[pos % len(switches)])
+        for _ in range(self._topo.lflows):
+            self._graph.add_node(payloads.logical_flow(self._rnd))
+        for pos in range(self._topo.acls):
+            self._acl(pos)
+        return self._graph
+
+    def _add(self, host: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return self._add_node(payloads._node(self._rnd, host, metadata))
+
+    def _add_node(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        self._graph.add_node(node)
+        return node
+
+    def _link(self, parent: Dict[str, Any], child: Dict[str, Any],
+              relation: str) -> None:
+        self._graph.add_edge({
+            'ID': self._uuid(),
+            'Parent': parent['ID'],
+            'Child': child['ID'],
+            'Host': parent['Host'],
+            'Metadata': {
+                'RelationType': relation
+            },
+        })
+
+    def _uuid(self) -> str:
+        return str(uuid.UUID(int=self._rnd.getrandbits(128)))
+
+    def _host(self, pos: int) -> Dict[str, Any]:
+        """
+        Add a host with its bridges and its logical switch. Returns the
+        logical switch
+        """
+        name = 'node%i' % pos
+        host = self._add(
+            name, {
+                'Type': 'host',
+                'Name': name,
+                'Hostname': name,
+                'OS': 'linux',
+                'Platform': 'centos',
+                'PlatformFamily': 'rhel',
+                'PlatformVersion': '8.2',
+                'KernelVersion': '4.18.0',
+                'CPU': [{
+                    'CPU': 0,
+                    'Model': 'synthetic'
+                }],
+            })
+        for bridge in ['br-int', 'br-ex', 'br-local'][:self._topo.bridges]:
+            self._bridge(host, bridge)
+        for num in range(3, self._topo.bridges):
+            self._bridge(host, 'br-%i' % num)
+
+        switch = self._add(
+            'ovn-nb', {
+                'Type': 'logical_switch',
+                'Name': name,
+                'UUID': self._uuid(),
+                'Manager': 'ovn',
+                'OVN': {
+                    'ExtID': {}
+                },
+            })
+        return switch
+
+    def _bridge(self, host: Dict[str, Any], name: str) -> None:
+        hostname = host['Host']
+        bridge = self._add(hostname, {
+            'Type': 'ovsbridge',
+            'Name': name,
+            'ExtID': {
+                'bridge-id': name
+            },
+        })
+        self._link(host, bridge, 'ownership')
+
+        for pos in range(self._topo.ports):
+            port_name = name if pos == 0 else '%s-p%i' % (name, pos)
+            port = self._add(hostname, {
+                'Type': 'ovsport',
+                'Name': port_name,
+                'ExtID': {},
+            })
+            self._link(bridge, port, 'ownership')
+            self._link(bridge, port, 'layer2')
+            iface = self._add(
+                hostname, {
+                    'Type': 'internal' if pos == 0 else 'veth',
+                    'Name': port_name,
+                    'MAC': self._mac(),
+                    'MTU': 1400,
+                    'OfPort': pos + 1,
+                    'State': 'UP',
+                    'ExtID': {
+                        'iface-id': port_name
+                    },
+                })
+            self._link(host, iface, 'ownership')
+            self._link(port, iface, 'layer2')
+
+        for _ in range(self._topo.ofrules):
+            rule = self._add_node(payloads.ofrule(self._rnd, hostname))
+            self._link(bridge, rule, 'ownership')
+
+    def _pod(self, pos: int, switch: Dict[str, Any]) -> None:
+        namespace = 'ns%i' % (pos % 10)
+        name = 'pod%i' % pos
+        k8s = {
+            'Namespace': namespace,
+            'Status': 'Running',
+            'IP': '10.244.%i.%i' % (pos // 250 % 256, pos % 250 + 2),
+            'Node': switch['Metadata']['Name'],
+            'Extra': {
+                'HostNetwork': False,
+                'Status': {
+                    'HostIP': '192.168.0.%i' % (pos % 250 + 2)
+                },
+            },
+        }
+        pod = self._add('k8s', {
+            'Type': 'pod',
+            'Name': name,
+            'Manager': 'k8s',
+            'K8s': k8s,
+        })
+        container = self._add(
+            'k8s', {
+                'Type': 'container',
+                'Name': name + '-c',
+                'Manager': 'k8s',
+                'K8s': {
+                    'Namespace': namespace,
+                    'Pod': name,
+                    'Extra': {
+                        'Ports': [{
+                            'containerPort': 8080
+                        }]
+                    },
+                },
+            })
+        self._link(pod, container, 'association')
+
+        lsp = self._add(
+            'ovn-nb', {
+                'Type': 'logical_switch_port',
+                'Name': '{}_{}'.format(namespace, name),
+                'UUID': self._uuid(),
+                'Manager': 'ovn',
+                'OVN': {
+                    'Addresses': ['{} {}'.format(self._mac(), k8s['IP'])],
+                    'Type': '',
+                    'Options': {},
+                    'ExtID': {
+                        'pod': 'true'
+                    },
+                },
+            })
+        self._link(switch, lsp, 'ownership')
+        self._link(pod, lsp, 'association')
+
+    def _acl(self, pos: int) -> None:
+        self._add(
+            'ovn-nb', {
+                'Type': 'acl',
+                'Name': self._uuid(),
+                'Manager': 'ovn',
+                'OVN': {
+                    'Action': self._rnd.choice(['allow', 'drop']),
+                    'Match': 'ip4.dst == 10.96.%i.%i' %
+                    (pos // 250 % 256, pos % 250 + 1),
+                    'Direction': self._rnd.choice(['from-lport', 'to-lport']),
+                },
+            })
+
+    def _mac(self) -> str:
+        return '0a:58:' + ':'.join(
+            '%02x' % self._rnd.randint(0, 255) for _ in range(4))
+
+
+def sizes(graph: Graph) -> Dict[str, int]:
+    """
+    Returns the number of nodes of each type of a topology graph
+    """
+    counts: Dict[str, int] = {}
+    nodes: List[Dict[str, Any]] = graph.nodes()
+    for node in nodes:
+        node_type = str(Graph.node_type(node))
+        counts[node_type] = counts.get(node_type, 0) + 1
+    return counts
@@ -0,0 +1,145 @@
+"""
+Benchmark of the HTTP transport: a new connection per request (RESTClient)
+vs the pooled keep-alive connections of SkyNetRESTClient, for a sequence of
+small queries (as "summary" sends) with or without compressed responses
+
+The responses are served by a local HTTP/1.1 server, which can also answer
+some of the requests with a 503 status to exercise the retries
+
+Usage:
+    python -m benchmarks.transport [--requests N] [--rows N] [--jobs N]
+                                   [--overload RATIO]
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict
+
+from skydive.rest.client import RESTClient
+
+from skynet.context import SkyNetCtxt
+from skynet.common.profile import profiling
+from skynet.common.rest import SkyNetRESTClient
+from benchmarks import payloads
+
+QUERY = 'G.V().Has("Type", "ofrule")'
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    connections = 0
+
+
+def serve(body: bytes, overload: float) -> Server:
+    """
+    Start an HTTP/1.1 server that answers every query with the same body
+    (compressed if the client accepts it) and answers a ratio of them with a
+    503 status
+    """
+    compressed = gzip.compress(body)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # The headers and the body are sent separately
+        disable_nagle_algorithm = True
+
+        def setup(self) -> None:
+            super().setup()
+            self.server.connections += 1  # type: ignore
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers['Content-Length']))
+            if random.random() < overload:
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            data = body
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                data = compressed
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = Server(('localhost', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(ctxt: SkyNetCtxt, client: RESTClient, requests: int) -> Any:
+    """
+    Send the queries (up to "jobs" concurrently). Returns the results
+    """
+    with profiling(ctxt.profiler()):
+        return ctxt.map(lambda _: client.lookup(QUERY), range(requests))
+
+
+def measure(name: str, server: Server, make: Callable[[], RESTClient],
+            args: argparse.Namespace, expected: Any) -> Dict[str, Any]:
+    connections = server.connections
+    ctxt = SkyNetCtxt(jobs=args.jobs)
+    ctxt.profiler().start(trace_memory=False)
+    start = time.perf_counter()
+    results = run(ctxt, make(), args.requests)
+    elapsed = time.perf_counter() - start
+    report = ctxt.profiler().stop()
+    if any(result != expected for result in results):
+        raise Exception('Mismatch with %s' % name)
+
+    result = {
+        'impl': name,
+        'requests': args.requests,
+        'seconds': round(elapsed, 4),
+        'requests_per_sec': round(args.requests / elapsed, 1),
+        'connections': server.connections - connections,
+    }
+    if 'http' in report['phases']:
+        phase = report['phases']['http']
+        result.update(wire_bytes=phase['bytes'], retries=phase['retries'],
+                      latency_ms=report['latency_ms']['http'])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--overload',
+                        type=float,
+                        default=0.0,
+                        help='Ratio of the queries answered with a 503 status')
+    args = parser.parse_args()
+
+    body = json.dumps(payloads.ofrules(args.rows)).encode()
+    expected = json.loads(body.decode())
+    server = serve(body, args.overload)
+    api = 'localhost:{}'.format(server.server_address[1])
+
+    impls = [
+        ('pooled', lambda: SkyNetRESTClient(api, pool_size=args.jobs)),
+    ]
+    if not args.overload:
+        # RESTClient does not retry
+        impls.insert(0, ('urllib', lambda: RESTClient(api)))
+
+    results = [measure(name, server, make, args, expected)
+               for name, make in impls]
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,10 @@ setup(name='skynet',
       long_description=LONG_DESC,
       license=["Apache License 2.0"],
       scripts=['bin/skynet'],
+      extras_require={
+          # "skynet snapshot" and --snapshot
+          'snapshot': ['pyarrow'],
+      },
       classifiers=[
           'Development Status :: 2 - Pre-Alpha',
           'Environment :: Console',
@@ -0,0 +1,30 @@
+import click
+
+from skynet.context import SkyNetCtxt
+
+
+@click.group(name='cache')
+@click.pass_obj
+def cachecli(obj: SkyNetCtxt) -> None:
+    """
+    On-disk query cache commands
+    """
+
+
+@cachecli.command()
+@click.pass_obj
+def stats(obj: SkyNetCtxt) -> None:
+    """
+    Print the query cache statistics
+    """
+    for key, value in obj.cache().stats().items():
+        print("{key:<10} {value}".format(key=key + ':', value=value))
+
+
+@cachecli.command()
+@click.pass_obj
+def clear(obj: SkyNetCtxt) -> None:
+    """
+    Remove all the entries of the query cache
+    """
+    print("Removed {} entries".format(obj.cache().clear()))
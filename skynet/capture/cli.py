@@ -81,7 +81,7 @@ def get(obj: SkyNetCtxt, capture: str) -> None:
     prov = CaptureProvider(obj)
     flows = prov.get(capture)
     if not flows.is_empty():
-        print(flows.data().to_string(columns=show_cols))
+        print(flows.data(show_cols).to_string(columns=show_cols))
 
 
 @capturecli.command()
@@ -2,6 +2,7 @@ from typing import Dict, Any, List, Callable, Optional
 from skydive.captures import Capture
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveData, Field, SkyDiveDataProvider
 
 
@@ -90,15 +91,14 @@ class CaptureProvider(SkyDiveDataProvider):
         """
         Create a capture
         """
-        gremlin = "V().Has('Type', '{}', 'Name', '{}')".format(
-            node_type, node_name)
-        count = self._run_query(gremlin + ".Count()")
+        query = Query.V().has('Type', node_type, 'Name', node_name)
+        count = self._run_query(query.count())
         if count == 0:
             raise Exception(
                 "There is no port or interface of type {} and name {}".format(
                     node_type, node_name))
 
-        gremlin = "G." + gremlin
+        gremlin = "G.{}".format(query)
 
         cap_data = self._ctxt.rest_cli().capture_create(
             query=gremlin,
@@ -113,8 +113,8 @@ class CaptureProvider(SkyDiveDataProvider):
         """
         Get a Capture (it's flows)
         """
-        query = "Flows().Has('CaptureID', '{}')".format(capture)
-        data = self._run_query(query)
+        query = Query.flows().has('CaptureID', capture)
+        data = self._run_query(query, FlowData.projection())
         return FlowData(data)
 
     def delete(self, capture: str) -> None:
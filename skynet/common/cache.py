@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from skynet.common import codec
+
+GO_DURATION = re.compile(r'^[-+]?(\d+(\.\d*)?(ns|us|µs|ms|s|m|h))+$')
+
+
+def is_absolute_time(at: Optional[str]) -> bool:
+    """
+    Returns whether the time specification (as accepted by the --at option)
+    is an absolute point in time. Relative times are expressed in Go Duration
+    Format (e.g: "-1.5h", "-200ms") and no time at all means "now"
+    """
+    if not at:
+        return False
+    return not GO_DURATION.match(at.strip())
+
+
+class QueryCache:
+    """
+    QueryCache is a persistent on-disk cache of query results.
+    Entries are keyed by the Skydive API address and the full query
+    string (including the At() step). Each entry is stored in its own file
+    that contains a header line followed by the JSON-encoded result.
+
+    Entries expire after a TTL unless they are permanent (i.e: the query
+    points to an absolute time so its result cannot change). The total size
+    of the cache is bounded: the least recently used entries are evicted
+    first
+    """
+    DEFAULT_TTL = 300
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+    SUFFIX = '.json'
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 ttl: float = DEFAULT_TTL,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        """
+        QueryCache constructor
+        Args:
+            path: (optional) The cache directory. Defaults to
+                $XDG_CACHE_HOME/skynet (or ~/.cache/skynet)
+            ttl: The time to live of non-permanent entries (in seconds)
+            max_size: The maximum size of the cache (in bytes)
+        """
+        self._path = path or self.default_path()
+        self._ttl = ttl
+        self._max_size = max_size
+        self._log = logging.getLogger("Cache")
+
+    @classmethod
+    def default_path(cls) -> str:
+        """
+        Returns the default cache directory
+        """
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+            os.path.expanduser('~'), '.cache')
+        return os.path.join(base, 'skynet')
+
+    def path(self) -> str:
+        """
+        Returns the cache directory
+        """
+        return self._path
+
+    def get(self, api: str, query: str) -> Any:
+        """
+        Get the cached result of a query
+        Returns None if the query is not cached or the entry has expired
+        """
+        filename = self._filename(api, query)
+        try:
+            with open(filename) as entry:
+                header = json.loads(entry.readline())
+                if header.get('Query') != query or header.get('API') != api:
+                    return None
+                if not header.get('Permanent') and \
+                        time.time() - header.get('Created', 0) > self._ttl:
+                    self._log.debug('Expired entry: %s' % query)
+                    self._remove(filename)
+                    return None
+                data = codec.loads(entry.read())
+        except (OSError, ValueError):
+            return None
+
+        # Update the access time for the LRU eviction
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+
+        self._log.debug('Hit: %s' % query)
+        return data
+
+    def put(self, api: str, query: str, data: Any,
+            permanent: bool = False) -> None:
+        """
+        Store the result of a query
+        Args:
+            api: The Skydive API address
+            query: The full query string
+            data: The query result
+            permanent: Whether the entry never expires
+        """
+        header = {
+            'API': api,
+            'Query': query,
+            'Created': time.time(),
+            'Permanent': permanent,
+        }
+        try:
+            os.makedirs(self._path, exist_ok=True)
+            fd, tmpname = tempfile.mkstemp(dir=self._path, suffix='.tmp')
+            with os.fdopen(fd, 'w') as entry:
+                entry.write(json.dumps(header) + '\n')
+                json.dump(data, entry)
+            os.replace(tmpname, self._filename(api, query))
+        except OSError as err:
+            self._log.warning('Failed to store cache entry: %s' % err)
+            return
+
+        self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache statistics
+        """
+        entries = self._entries()
+        permanent = 0
+        expired = 0
+        now = time.time()
+        for entry in entries:
+            header = self._header(entry.path)
+            if header.get('Permanent'):
+                permanent += 1
+            elif now - header.get('Created', 0) > self._ttl:
+                expired += 1
+
+        return {
+            'Path': self._path,
+            'Entries': len(entries),
+            'Permanent': permanent,
+            'Expired': expired,
+            'Size': sum(entry.stat().st_size for entry in entries),
+            'MaxSize': self._max_size,
+            'TTL': self._ttl,
+        }
+
+    def clear(self) -> int:
+        """
+        Remove all the entries
+        Returns the number of removed entries
+        """
+        entries = self._entries()
+        for entry in entries:
+            self._remove(entry.path)
+        return len(entries)
+
+    def _filename(self, api: str, query: str) -> str:
+        digest = hashlib.sha256('{}\n{}'.format(api,
+                                                query).encode()).hexdigest()
+        return os.path.join(self._path, digest + self.SUFFIX)
+
+    def _entries(self) -> List[os.DirEntry]:
+        try:
+            return [
+                entry for entry in os.scandir(self._path)
+                if entry.is_file() and entry.name.endswith(self.SUFFIX)
+            ]
+        except OSError:
+            return []
+
+    @classmethod
+    def _header(cls, filename: str) -> Dict[str, Any]:
+        try:
+            with open(filename) as entry:
+                return json.loads(entry.readline())
+        except (OSError, ValueError):
+            return {}
+
+    def _remove(self, filename: str) -> None:
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used entries until the size of the cache
+        is below its maximum
+        """
+        entries = [(entry.path, entry.stat()) for entry in self._entries()]
+        size = sum(stat.st_size for _, stat in entries)
+        if size <= self._max_size:
+            return
+
+        for filename, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+            if size <= self._max_size:
+                break
+            self._log.debug('Evicting %s' % filename)
+            self._remove(filename)
+            size -= stat.st_size
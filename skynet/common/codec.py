@@ -0,0 +1,65 @@
+"""
+JSON decoding of the Skydive responses with the fastest available backend:
+orjson if it is installed, the standard library otherwise
+"""
+import gc
+import json
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+"""
+BACKEND is the name of the JSON backend in use
+"""
+
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector while decoding: decoded JSON values
+    are trees, so they have no reference cycles to collect, but the
+    collector would scan the growing result again and again. The collector
+    is resumed when the last concurrent decoding ends
+    """
+    global _gc_pauses
+    with _gc_lock:
+        # Unless someone else disabled it
+        paused = _gc_pauses > 0 or gc.isenabled()
+        if paused:
+            _gc_pauses += 1
+            gc.disable()
+    try:
+        yield
+    finally:
+        if paused:
+            with _gc_lock:
+                _gc_pauses -= 1
+                if _gc_pauses == 0:
+                    gc.enable()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document as json.loads does. Documents orjson rejects
+    (e.g: with NaN) are decoded by the standard library. Note orjson decodes
+    integers wider than 64 bits as floats, which Skydive (written in Go)
+    never sends
+    Args:
+        data: The JSON document (UTF-8 encoded or not)
+    """
+    with paused_gc():
+        if orjson is not None:
+            try:
+                return orjson.loads(data)
+            except ValueError:
+                pass
+        return json.loads(data)
@@ -0,0 +1,406 @@
+"""
+The skynet daemon ("skynet serve") runs the commands of the CLI in a warm
+process, so they do not pay for the interpreter startup, the imports and
+the cold connections each time.
+
+The CLI forwards its command line to the daemon through a Unix socket and
+the daemon streams the output back. Both sides speak JSON lines:
+
+    request:  {"argv": [...], "cwd": "/home/user", "env": {"SKYNET_CACHE": "1"}}
+    response: {"out": "..."} or {"err": "..."} (any number of them)
+              {"exit": 0}
+
+Only the user running the daemon can use it: the socket is only
+accessible to them and both sides check the credentials of their peer.
+
+This module only uses the standard library: it is imported by the CLI
+before anything else
+"""
+import json
+import logging
+import os
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import traceback
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from typing import Any, Dict, List, Optional, Tuple
+
+SOCKET_ENV = 'SKYNET_SOCKET'
+DISABLE_ENV = 'SKYNET_DAEMON'
+LOCAL_COMMANDS = {'serve'}
+"""
+LOCAL_COMMANDS are never forwarded to the daemon
+"""
+
+VALUE_OPTIONS = {
+    '--at', '--log', '-l', '--api', '-a', '--cache-ttl', '--jobs', '-j',
+    '--timeout', '--retries', '--chunk-size', '--profile-file', '--record',
+    '--snapshot'
+}
+"""
+VALUE_OPTIONS are the global options that take a value, which tell the
+command apart from the option values
+"""
+
+INTERACTIVE_OPTIONS = {'--interactive', '-i'}
+"""
+INTERACTIVE_OPTIONS make a command read its stdin (e.g: "ovs flows list
+-i"), so it is not forwarded to the daemon, which has none
+"""
+
+_commands = threading.local()
+
+
+def socket_path() -> str:
+    """
+    Returns the path of the daemon socket: $SKYNET_SOCKET or a per-user
+    socket in the runtime (or temporary) directory
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    directory = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(directory, 'skynet-{}.sock'.format(os.getuid()))
+
+
+def command_line() -> List[str]:
+    """
+    Returns the command line arguments of the command the current thread
+    runs: the forwarded ones in the daemon, the ones of the process otherwise
+    """
+    argv = getattr(_commands, 'argv', None)
+    return sys.argv[1:] if argv is None else argv
+
+
+def _command_position(argv: List[str]) -> int:
+    """
+    Returns the position of the (first level) command in a command line
+    (its length if there is none)
+    """
+    position = 0
+    while position < len(argv):
+        arg = argv[position]
+        if arg == '--':
+            return position + 1
+        if not arg.startswith('-'):
+            return position
+        # The value of an option is the next argument
+        position += 2 if arg in VALUE_OPTIONS else 1
+    return len(argv)
+
+
+def _interactive(arg: str) -> bool:
+    """
+    Returns whether an argument is an interactive option. Short options may
+    be combined (e.g: -if json)
+    """
+    return arg in INTERACTIVE_OPTIONS or (
+        arg.startswith('-') and not arg.startswith('--') and 'i' in arg[1:])
+
+
+def _local(argv: List[str]) -> bool:
+    """
+    Returns whether a command line has to run locally
+    """
+    position = _command_position(argv)
+    if position >= len(argv):
+        return False
+    return argv[position] in LOCAL_COMMANDS or any(
+        _interactive(arg) for arg in argv[position + 1:])
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """
+    Returns the user ID of the process at the other end of a Unix socket
+    (or None if the platform cannot tell)
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', creds)
+    return uid
+
+
+def _private(path: str) -> bool:
+    """
+    Returns whether a socket belongs to the current user and is only
+    accessible to them, so no one else can be listening on it
+    """
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid() and \
+        stat.S_IMODE(info.st_mode) == 0o600
+
+
+def _environment() -> Dict[str, str]:
+    """
+    Returns the skynet environment variables that configure a command
+    """
+    return {
+        key: value
+        for key, value in os.environ.items()
+        if key.startswith('SKYNET_') and key not in (SOCKET_ENV, DISABLE_ENV)
+    }
+
+
+def connect(path: Optional[str] = None) -> Optional[socket.socket]:
+    """
+    Returns a connection to the daemon (or None if it is not running or it
+    does not belong to the current user)
+    """
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    if not _private(path):
+        print('Ignoring the skynet daemon socket {}: it must belong to the '
+              'user and have mode 0600'.format(path), file=sys.stderr)
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    if _peer_uid(sock) not in (None, os.getuid()):
+        sock.close()
+        return None
+    return sock
+
+
+def forward(argv: List[str], path: Optional[str] = None) -> Optional[int]:
+    """
+    Run a command line on the daemon, writing its output to stdout and
+    stderr. Returns the exit code of the command or None if it was not
+    forwarded (the daemon is not running, it is disabled with SKYNET_DAEMON=0
+    or the command has to run locally, see LOCAL_COMMANDS and
+    INTERACTIVE_OPTIONS)
+    Args:
+        argv: The command line arguments (without the program name)
+        path: (optional) The daemon socket
+    """
+    if os.environ.get(DISABLE_ENV) == '0' or _local(argv):
+        return None
+    sock = connect(path)
+    if sock is None:
+        return None
+
+    request = {'argv': argv, 'cwd': os.getcwd(), 'env': _environment()}
+    with sock, sock.makefile('rwb') as stream:
+        stream.write(json.dumps(request).encode() + b'\n')
+        stream.flush()
+        for line in stream:
+            frame = json.loads(line.decode())
+            if 'exit' in frame:
+                return frame['exit']
+            output = sys.stdout if 'out' in frame else sys.stderr
+            output.write(frame.get('out', frame.get('err', '')))
+            output.flush()
+    print('Connection to the skynet daemon lost', file=sys.stderr)
+    return 1
+
+
+class _Output:
+    """
+    File-like object that sends the output of a command to its client
+    """
+    encoding = 'utf-8'
+    errors = 'strict'
+
+    def __init__(self, stream: Any, key: str, lock: threading.Lock):
+        self._stream = stream
+        self._key = key
+        self._lock = lock
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            raise TypeError('write() argument must be str')
+        if text:
+            frame = json.dumps({self._key: text}).encode() + b'\n'
+            with self._lock:
+                self._stream.write(frame)
+        return len(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._stream.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+class _ThreadStream:
+    """
+    Replacement of sys.stdout or sys.stderr that writes the output of each
+    thread running a command to its client (and anything else to the
+    original stream)
+    """
+    def __init__(self, original: Any, outputs: threading.local, key: str):
+        self._original = original
+        self._outputs = outputs
+        self._key = key
+
+    def _target(self) -> Any:
+        return getattr(self._outputs, self._key, None) or self._original
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+
+class _Workdir:
+    """
+    The working directory and the environment are shared by the whole
+    process. Commands that need the same ones run concurrently, the others
+    wait for them to finish
+    """
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._current: Optional[Tuple[str, Tuple[Tuple[str, str], ...]]] = None
+        self._active = 0
+
+    def enter(self, cwd: str, env: Dict[str, str]) -> None:
+        key = (cwd, tuple(sorted(env.items())))
+        with self._cond:
+            while self._active and self._current != key:
+                self._cond.wait()
+            if self._current != key:
+                os.chdir(cwd)
+                for name in list(_environment()):
+                    del os.environ[name]
+                os.environ.update(env)
+                self._current = key
+            self._active += 1
+
+    def leave(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+
+class _DaemonHandler(StreamRequestHandler):
+    """
+    Runs the command line of a client
+    """
+    wbufsize = 65536
+    server: 'DaemonServer'
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline().decode())
+            argv = [str(arg) for arg in request['argv']]
+        except (ValueError, KeyError, TypeError):
+            return
+
+        lock = threading.Lock()
+        outputs = self.server.outputs
+        outputs.out = _Output(self.wfile, 'out', lock)
+        outputs.err = _Output(self.wfile, 'err', lock)
+        self.server.workdir.enter(request.get('cwd') or os.getcwd(),
+                                  request.get('env') or {})
+        _commands.argv = argv
+        try:
+            code = self.server.run(argv)
+        finally:
+            self.server.workdir.leave()
+            outputs.out = outputs.err = None
+            _commands.argv = None
+
+        try:
+            self.wfile.write(json.dumps({'exit': code}).encode() + b'\n')
+            self.wfile.flush()
+        except OSError:
+            pass
+
+
+class DaemonServer(ThreadingUnixStreamServer):
+    """
+    DaemonServer runs the command lines forwarded by the CLI (see forward)
+    in threads of the current process. The stdout and stderr of each command
+    are sent to its client.
+    The commands run as the user running the daemon, so only they can
+    connect to it
+    """
+    daemon_threads = True
+
+    def __init__(self, command: Any, obj: Any, path: Optional[str] = None):
+        """
+        DaemonServer constructor
+        Args:
+            command: The (click) command that runs the command lines
+            obj: The object passed to the command (e.g: the state shared by
+                the commands)
+            path: (optional) The socket to listen on (default: socket_path())
+        """
+        self.path = os.path.abspath(path or socket_path())
+        if connect(self.path) is not None:
+            raise OSError('A skynet daemon is already listening on {}'.format(
+                self.path))
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        # The socket is created with mode 0600
+        umask = os.umask(0o177)
+        try:
+            super(DaemonServer, self).__init__(self.path, _DaemonHandler)
+        finally:
+            os.umask(umask)
+        self.command = command
+        self.obj = obj
+        self.workdir = _Workdir()
+        self.outputs = threading.local()
+        self._streams = (sys.stdout, sys.stderr)
+        sys.stdout = _ThreadStream(sys.stdout, self.outputs, 'out')  # type: ignore
+        sys.stderr = _ThreadStream(sys.stderr, self.outputs, 'err')  # type: ignore
+        # The log messages of the commands are sent to their clients too
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and \
+                    handler.stream is self._streams[1]:
+                handler.stream = sys.stderr
+
+    def verify_request(self, request: Any, client_address: Any) -> bool:
+        return _peer_uid(request) in (None, os.getuid())
+
+    def run(self, argv: List[str]) -> int:
+        """
+        Run a command line. Returns its exit code
+        """
+        try:
+            self.command.main(args=argv, prog_name='skynet', obj=self.obj)
+        except SystemExit as err:
+            code = err.code
+            if isinstance(code, int):
+                return code
+            if code is not None:
+                print(code, file=sys.stderr)
+                return 1
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            return 1
+        return 0
+
+    def server_close(self) -> None:
+        super(DaemonServer, self).server_close()
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and \
+                    handler.stream is sys.stderr:
+                handler.stream = self._streams[1]
+        sys.stdout, sys.stderr = self._streams
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        logging.getLogger("Daemon").debug("Stopped listening on {}".format(
+            self.path))
@@ -1,11 +1,61 @@
+import ipaddress
 import logging
-from typing import Any, Callable, Dict, List, Optional
-from pandas import DataFrame, Timestamp
+import re
+import time
+from functools import lru_cache
+from itertools import compress
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy
+from pandas import DataFrame, Index, RangeIndex, Series, array, factorize, \
+    to_datetime
 
 from skynet.context import SkyNetCtxt
+from skynet.common.cache import is_absolute_time
+from skynet.common.filter import And, Comparison, Expression, \
+    FilterParseError, Not, Or, comparisons, conjuncts, nnf, parse
+from skynet.common.memo import node_value, parse_literals
+from skynet.common.query import Predicate, Query, Raw, Step, optimize
+from skynet.common.profile import phase, profiled, profiler
 
 MetadataList = List[Dict[str, Callable]]
 RawData = List[Dict[str, Any]]
+Columns = Dict[str, List[Any]]
+
+
+def compile_path(path: Tuple[str, ...]) -> Callable[[Any], Any]:
+    """
+    Compile a key path into a getter callable.
+    The returned callable walks the nested dictionaries following the path.
+    The lookup stops at the first empty value, which is returned as is
+    Args:
+        path: The tuple of keys to follow
+    """
+    if len(path) == 1:
+        key, = path
+
+        def get_one(data: Any) -> Any:
+            return data.get(key) if data else data
+
+        return get_one
+
+    if len(path) == 2:
+        first, second = path
+
+        def get_two(data: Any) -> Any:
+            value = data.get(first) if data else data
+            return value.get(second) if value else value
+
+        return get_two
+
+    def get_many(data: Any) -> Any:
+        value = data
+        for key in path:
+            if not value:
+                break
+            value = value.get(key)
+        return value
+
+    return get_many
 
 
 class Field:
@@ -16,14 +66,21 @@ class Field:
         eg: "L0.L1"
     trans: The transformation callable to apply to the value if any
     key_name: The name of the key in the resulting field
+    dtype: The dtype of the resulting column if any (see typed_column), e.g:
+        "category" for strings with few distinct values or "Int16" for small
+        integers that can be missing
     """
     def __init__(self,
                  name: str,
-                 trans: Callable = None,
-                 key_name: str = None):
+                 trans: Optional[Callable] = None,
+                 key_name: Optional[str] = None,
+                 dtype: Optional[str] = None):
         self.name = name
         self.key_name = key_name if key_name else name
         self.trans = trans
+        self.dtype = dtype
+        self.path = tuple(name.split('.'))
+        self._getter = compile_path(self.path)
 
     def value(self, data: Dict[str, Any]) -> Any:
         """
@@ -31,17 +88,22 @@ class Field:
         Args:
             data: The data dictoronary where the data shall be extracted from
         """
-        value: Optional[Dict] = data
-        for key in self.name.split('.'):
-            if not value:
-                logging.getLogger("Data").debug(
-                    "key {} not found in dictionary {}".format(
-                        self.name, data))
-                continue
+        value = self._getter(data)
+        return self.trans(value) if self.trans else value
 
-            value = value.get(key)
+    def source(self, data: RawData) -> List[Any]:
+        """
+        Returns the list of objects the Field values are extracted from
+        Args:
+            data: The raw data
+        """
+        return data
 
-        return self.trans(value) if self.trans else value
+    def raw_path(self) -> Tuple[str, ...]:
+        """
+        Returns the path of the Field in the raw data
+        """
+        return self.path
 
     def key(self):
         """
@@ -56,10 +118,11 @@ class Metadata(Field):
     """
     def __init__(self,
                  name: str,
-                 trans: Callable = None,
-                 key_name: str = None):
+                 trans: Optional[Callable] = None,
+                 key_name: Optional[str] = None,
+                 dtype: Optional[str] = None):
 
-        super(Metadata, self).__init__(name, trans, key_name)
+        super(Metadata, self).__init__(name, trans, key_name, dtype)
 
     def value(self, data: Dict[str, Any]) -> Any:
         """
@@ -71,6 +134,279 @@ class Metadata(Field):
 
         return super().value(meta_value)
 
+    def source(self, data: RawData) -> List[Any]:
+        """
+        Returns the list of Metadata objects of the raw data
+        """
+        metadata = [el.get('Metadata') for el in data]
+        if not all(metadata):
+            missing = next(el for el, meta in zip(data, metadata) if not meta)
+            raise Exception('Metadata not found in {}'.format(missing))
+
+        return metadata
+
+    def raw_path(self) -> Tuple[str, ...]:
+        """
+        Returns the path of the Field in the raw data
+        """
+        return ('Metadata', ) + self.path
+
+
+class Nested:
+    """
+    A Nested defines a Field whose values are lists or dictionaries (e.g:
+    the match Filters of an OpenFlow rule or the ExtID of a port) that is
+    exploded into a long side table with one row per item (see
+    SkyDiveData.nested). It has the following values
+    name: The key of the Field
+    columns: The columns of the side table. The items that are
+        dictionaries (e.g: {"Type": "reg14", "Value": "0x5"}) are split into
+        these keys, the dictionaries themselves into (key, value) and any
+        other item is stored in the first column. The table is indexed by the
+        first column
+    """
+    def __init__(self, name: str, columns: Optional[List[str]] = None):
+        self.name = name
+        self.columns = columns or ['Key', 'Value']
+
+    def explode(self, owners: List[Any], values: List[Any]) -> Tuple[List[Any], Columns]:
+        """
+        Explode the values of the Field into one row per item
+        Returns the owner of each row and the columns
+        Args:
+            owners: The index of the row each value belongs to
+            values: The values of the Field
+        """
+        items: List[Any] = []
+        row_owners: List[Any] = []
+        for owner, value in zip(owners, values):
+            if not value:
+                continue
+            if isinstance(value, dict):
+                value = list(value.items())
+            items.extend(value)
+            row_owners.extend([owner] * len(value))
+
+        # Each column is built at once when all the items have the same shape
+        if all(type(item) is dict for item in items):
+            return row_owners, {
+                col: [item.get(col) for item in items]
+                for col in self.columns
+            }
+        if items and all(type(item) is tuple for item in items):
+            pairs = list(zip(*items))
+            return row_owners, {
+                col: list(pairs[pos]) if pos < 2 else [None] * len(items)
+                for pos, col in enumerate(self.columns)
+            }
+        return row_owners, {
+            col: [self._cell(item, pos, col) for item in items]
+            for pos, col in enumerate(self.columns)
+        }
+
+    @classmethod
+    def _cell(cls, item: Any, pos: int, col: str) -> Any:
+        if isinstance(item, dict):
+            return item.get(col)
+        if isinstance(item, tuple):
+            return item[pos] if pos < len(item) else None
+        return None if pos else item
+
+
+def epoch_column(values: List[Any], unit: str = 'ms') -> Any:
+    """
+    Build a datetime column from epoch integers (e.g: the CreatedAt of the
+    Skydive nodes, in milliseconds) converting the whole column at once.
+    Missing and zero values are NaT
+    Args:
+        values: The epoch values
+        unit: The unit of the values
+    """
+    epochs = numpy.array([value or 0 for value in values], dtype='int64')
+    return to_datetime(epochs, unit=unit).where(epochs != 0)
+
+
+def typed_column(values: List[Any],
+                 dtype: Optional[str],
+                 name: Optional[str] = None) -> Any:
+    """
+    Build a column with the given dtype. Categorical columns store each
+    distinct value once and nullable integer columns ("Int8"..."Int64") take
+    a fraction of the memory of a column of Python objects (and sort faster).
+    Datetime dtypes (e.g: "datetime64[ms]") convert epoch integers in the
+    unit of the dtype (see epoch_column).
+    If the values cannot be converted (i.e: the dtype of the Field does not
+    match its values), a warning is logged and they are left as they are
+    Args:
+        values: The values of the column
+        dtype: The dtype (None to let pandas infer it)
+        name: (optional) The name of the column, for the warning
+    """
+    if dtype is None:
+        return values
+    try:
+        if dtype.startswith('datetime64['):
+            return epoch_column(values, dtype[len('datetime64['):-1])
+        return array(values, dtype=dtype)
+    except (TypeError, ValueError, OverflowError) as err:
+        logging.getLogger("Data").warning(
+            'Cannot convert the column %s to %s, keeping its values: %s' %
+            (name or '', dtype, err))
+        return values
+
+
+class Extractor:
+    """
+    Extractor is the compiled form of a set of basic fields and a list of
+    Fields. It extracts the data column by column: each level of a Field's
+    path is looked up once for all the elements and shared between the Fields
+    that have a common prefix (e.g: "OVN.ExtID.source" and "OVN.Table")
+    """
+    # The maximum number of compiled extractors kept (the long-running
+    # daemon, see "serve", would otherwise keep one per projection forever)
+    CACHE_SIZE = 256
+
+    def __init__(self, basic_fields: Dict[str, Optional[Callable]],
+                 meta: List[Field]):
+        """
+        Extractor constructor. Use compile() instead to reuse extractors
+        """
+        self._basic: List[Tuple[str, Optional[Callable]]] = list(
+            basic_fields.items())
+        self._plan = [(field,
+                       [field.path[:depth + 1]
+                        for depth in range(len(field.path))])
+                      for field in meta]
+
+    @classmethod
+    def compile(cls, basic_fields: Dict[str, Optional[Callable]],
+                meta: List[Field]) -> 'Extractor':
+        """
+        Returns the (cached) Extractor for the given fields
+        """
+        return _compile_extractor(tuple(basic_fields.items()), tuple(meta))
+
+    def extract(self, data: RawData) -> Columns:
+        """
+        Extract the columns from the raw data
+        Returns a dictionary of key to list of values (one per element)
+        """
+        columns: Columns = {}
+        for name, trans in self._basic:
+            values = [el[name] for el in data]
+            columns[name] = [trans(value)
+                             for value in values] if trans else values
+
+        levels: Dict[Tuple, List[Any]] = {}
+        for field, prefixes in self._plan:
+            values = levels.get((type(field), ())) or []
+            if (type(field), ()) not in levels:
+                values = field.source(data)
+                levels[(type(field), ())] = values
+
+            for prefix in prefixes:
+                level = levels.get((type(field), prefix))
+                if level is None:
+                    key = prefix[-1]
+                    level = [
+                        value.get(key) if value else value
+                        for value in values
+                    ]
+                    levels[(type(field), prefix)] = level
+                values = level
+
+            if field.trans:
+                trans = field.trans
+                values = [trans(value) for value in values]
+            columns[field.key()] = values
+
+        return columns
+
+
+@lru_cache(maxsize=Extractor.CACHE_SIZE)
+def _compile_extractor(basic_fields: Tuple[Tuple[str, Optional[Callable]], ...],
+                       meta: Tuple[Field, ...]) -> Extractor:
+    return Extractor(dict(basic_fields), list(meta))
+
+
+class Projection:
+    """
+    A Projection defines the subset of the keys of the raw Skydive data that
+    is needed to build SkyDiveData objects. Keys that are not part of the
+    projection (e.g: "RoutingTables", "FDB", "Features"...) are pruned from
+    the results as soon as they are received
+    """
+    def __init__(self, paths: List[Tuple[str, ...]] = []):
+        """
+        Projection constructor
+        Args:
+            paths: The list of key paths to keep. A path keeps the entire
+                value under it
+        """
+        self._tree: Dict[str, Any] = {}
+        for path in paths:
+            self.add(path)
+
+    @classmethod
+    def from_fields(cls, basic_fields: Dict[str, Any],
+                    meta: List[Field]) -> 'Projection':
+        """
+        Build a Projection from a set of basic fields and a list of Fields
+        """
+        return cls([(name, ) for name in basic_fields] +
+                   [field.raw_path() for field in meta])
+
+    def add(self, path: Tuple[str, ...]) -> None:
+        """
+        Add a key path to the projection
+        """
+        tree: Optional[Dict[str, Any]] = self._tree
+        for key in path[:-1]:
+            if tree is None:
+                return
+            if key in tree:
+                tree = tree[key]
+            else:
+                tree = tree.setdefault(key, {})
+
+        if tree is not None:
+            tree[path[-1]] = None
+
+    def union(self, other: 'Projection') -> 'Projection':
+        """
+        Returns a new Projection that contains the keys of both projections
+        """
+        return Projection(self.paths() + other.paths())
+
+    def paths(self) -> List[Tuple[str, ...]]:
+        """
+        Returns the list of key paths of the projection
+        """
+        def walk(tree: Dict[str, Any], prefix: Tuple[str, ...]):
+            for key, subtree in tree.items():
+                if subtree is None:
+                    yield prefix + (key, )
+                else:
+                    yield from walk(subtree, prefix + (key, ))
+
+        return list(walk(self._tree, ()))
+
+    def prune(self, data: RawData) -> RawData:
+        """
+        Returns a copy of the data that only contains the projected keys
+        """
+        tree = self._tree
+        return [self._prune(el, tree) for el in data]
+
+    @classmethod
+    def _prune(cls, obj: Any, tree: Dict[str, Any]) -> Any:
+        if not isinstance(obj, dict):
+            return obj
+        return {
+            key: obj[key] if subtree is None else cls._prune(obj[key], subtree)
+            for key, subtree in tree.items() if key in obj
+        }
+
 
 class SkyDiveData:
     """
@@ -78,24 +414,54 @@ class SkyDiveData:
     Skydive. It provides basic data manipulation functionality
     """
 
-    BASIC_FIELDS = {
+    BASIC_FIELDS: Dict[str, Optional[Callable]] = {
         "ID": None,
         "Host": None,
-        "CreatedAt": Timestamp,
-        "UpdatedAt": Timestamp,
-        "DeletedAt": Timestamp,
+        "CreatedAt": None,
+        "UpdatedAt": None,
+        "DeletedAt": None,
     }
     """
     BASIC FIELDS is an string to Callable dictionary of basic information
     fields to extract. They are common to most tables, however a subclass my
     override this value to specify their own set of basic fields
     """
+
+    BASIC_DTYPES: Dict[str, str] = {
+        "Host": "category",
+        "CreatedAt": "datetime64[ms]",
+        "UpdatedAt": "datetime64[ms]",
+        "DeletedAt": "datetime64[ms]",
+    }
+    """
+    BASIC_DTYPES are the dtypes of the basic fields columns (see Field.dtype).
+    The times are epochs in milliseconds, converted once per column
+    """
+
+    METADATA: List[Field] = []
+    """
+    METADATA is the list of Fields subclasses extract from the raw data
+    """
+
+    SORT_BY: List[str] = []
+    SORT_ASCENDING: List[bool] = []
+    """
+    SORT_BY is the list of keys the DataFrame is sorted by (SORT_ASCENDING
+    specifies the order of each of them). These keys are always extracted
+    """
+
+    NESTED: List[Nested] = []
+    """
+    NESTED is the list of Fields (lists or dictionaries) that can be exploded
+    into side tables (see nested())
+    """
     def __init__(self,
                  data: RawData,
                  meta: List[Field],
                  index: str = None) -> None:
         """
         SkyDiveData Constructor
+        The DataFrame is not built until it's needed (see data())
         Args:
             data: The raw data coming from SkyDive
             meta: The list of Metadata fields to process
@@ -104,7 +470,18 @@ class SkyDiveData:
         self._raw = data
         self._index = index
         self._meta = meta
-        self._data = self._to_dataframe()
+        self._data: Optional[DataFrame] = None
+        self._nested: Dict[str, DataFrame] = {}
+
+    @classmethod
+    def projection(cls) -> Projection:
+        """
+        Returns the Projection of the raw data this class needs
+        """
+        return Projection.from_fields(cls.BASIC_FIELDS, cls.METADATA)
+
+    def __len__(self) -> int:
+        return len(self._raw)
 
     def is_empty(self):
         """
@@ -112,6 +489,7 @@ class SkyDiveData:
         """
         return len(self._raw) == 0
 
+    @profiled('render')
     def to_string(self,
                   columns: List[str] = None,
                   justify: str = "center") -> str:
@@ -121,8 +499,9 @@ class SkyDiveData:
         if self.is_empty():
             return "No data"
 
-        return self._data.to_string(columns=columns, justify=justify)
+        return self.data(columns).to_string(columns=columns, justify=justify)
 
+    @profiled('render')
     def to_json(self, *args, **kwargs):
         """
         Print to json. Based on Dataframe.to_json. See:
@@ -130,8 +509,9 @@ class SkyDiveData:
         """
         if self.is_empty():
             return "{}"
-        return self._data.to_json(*args, **kwargs)
+        return self.data().to_json(*args, **kwargs)
 
+    @profiled('render')
     def to_html(self, *args, **kwargs):
         """
         Print to html. Based on Dataframe.to_html. See:
@@ -140,38 +520,159 @@ class SkyDiveData:
         if self.is_empty():
             return "No data"
 
-        return self._data.to_html(*args, **kwargs)
+        return self.data(kwargs.get('columns')).to_html(*args, **kwargs)
 
-    def data(self) -> DataFrame:
+    def data(self, columns: Optional[List[str]] = None) -> DataFrame:
         """
         Returns the processed DataFrame
+        Args:
+            columns: (optional) Only extract the given columns (the index is
+                always extracted). If not specified, all the columns are
+                extracted and the resulting DataFrame is kept for later calls
         """
-        return self._data
+        if self._data is not None:
+            return self._data if columns is None else self._data[[
+                col for col in columns if col in self._data.columns
+            ]]
+
+        if columns is None:
+            self._data = self._to_dataframe()
+            return self._data
 
-    def _to_dataframe(self) -> DataFrame:
+        return self._to_dataframe(columns)
+
+    def nested(self, name: str) -> DataFrame:
+        """
+        Returns the side table of a nested Field (see NESTED): one row per
+        item, with the index of the row it belongs to as first column. The
+        table is indexed (and sorted) by its first declared column, e.g: the
+        match field of the OpenFlow Filters or the key of the ExtID. It is
+        built once and kept for later calls
+        Args:
+            name: The key of the nested Field
+        """
+        table = self._nested.get(name)
+        if table is not None:
+            return table
+
+        spec = next((nested for nested in self.NESTED if nested.name == name),
+                    None)
+        if spec is None:
+            raise KeyError('{} is not a nested field of {}'.format(
+                name,
+                type(self).__name__))
+
+        owner = self._index or 'Row'
+        with phase('nested', rows=len(self._raw)):
+            # E.g: Fields that are only extracted for some types of rows
+            values: List[Any] = [None] * len(self._raw)
+            if self._data is not None:
+                owners = list(self._data.index)
+                if name in self._data.columns:
+                    values = list(self._data[name])
+            else:
+                extracted = self._extract([name])
+                values = extracted.get(name, values)
+                owners = extracted[self._index] if self._index else list(
+                    range(len(values)))
+
+            row_owners, columns = spec.explode(owners, values)
+            key = spec.columns[0]
+            table = DataFrame({
+                owner: row_owners,
+                **columns, key: typed_column(columns[key], 'category')
+            })
+            table = table.set_index(key, drop=False).sort_index(kind='stable')
+        self._nested[name] = table
+        return table
+
+    def having(self, name: str, key: Any, values: Optional[List[Any]] = None) -> DataFrame:
+        """
+        Returns the rows whose nested Field has an item with the given key
+        (and one of the given values), e.g: the flows matching on reg14=0x5
+        or the interfaces with a given iface-id in their ExtID
+            data.having('Filters', 'reg14', ['0x5'])
+        The items are looked up in the (indexed) side table and joined with
+        the data, so the rows keep their order
+        Args:
+            name: The key of the nested Field
+            key: The value of the first column of the side table
+            values: (optional) The accepted values of the second column
+        """
+        if self.is_empty():
+            return self.data()
+
+        table = self.nested(name)
+        items = table.loc[[key]] if key in table.index else table.iloc[:0]
+        if values is not None:
+            spec = next(nested for nested in self.NESTED if nested.name == name)
+            items = items[items[spec.columns[1]].isin(values)]
+
+        data = self.data()
+        return data[data.index.isin(items[self._index or 'Row'])]
+
+    def _to_dataframe(self, columns: Optional[List[str]] = None) -> DataFrame:
         """
         Process the raw data into a DataFrame
+        Args:
+            columns: (optional) Only extract the given columns
         """
         if len(self._raw) == 0:
             return None
 
-        dataframe = DataFrame.from_records(data=self._extract(),
-                                           index=self._index)
+        with phase('dataframe', rows=len(self._raw)):
+            extracted = self._extract(columns)
+            index = None
+            if self._index:
+                index = Index(extracted.pop(self._index), name=self._index)
+
+            dtypes = self._dtypes()
+            dataframe = DataFrame(
+                {
+                    key: typed_column(values, dtypes.get(key), key)
+                    for key, values in extracted.items()
+                },
+                index=index)
+            if self.SORT_BY:
+                dataframe.sort_values(by=self.SORT_BY,
+                                      ascending=self.SORT_ASCENDING,
+                                      inplace=True)
+
+        if columns is not None:
+            dataframe = dataframe[[
+                col for col in columns if col in dataframe.columns
+            ]]
         return dataframe
 
-    def _extract(self) -> List[Dict[str, Any]]:
+    def _dtypes(self) -> Dict[str, str]:
+        """
+        Returns the dtypes of the columns that declare one
+        """
+        dtypes = dict(self.BASIC_DTYPES)
+        dtypes.update(
+            {field.key(): field.dtype
+             for field in self._meta if field.dtype})
+        return dtypes
+
+    def _extract(self, columns: Optional[List[str]] = None) -> Columns:
         """"
-        Extract the relevant metadata from the raw data
+        Extract the relevant metadata from the raw data into columns
+        Args:
+            columns: (optional) Only extract the given columns (and the ones
+                needed to index and sort the data)
         """
-        extracted = [{
-            **{
-                field: trans(el[field]) if trans else el[field]
-                for field, trans in self.BASIC_FIELDS.items()
-            },
-            **{meta.key(): meta.value(el)
-               for meta in self._meta}
-        } for el in self._raw]
-        return extracted
+        basic_fields = self.BASIC_FIELDS
+        meta = self._meta
+        if columns is not None:
+            keys = set(columns) | set(self.SORT_BY) | {self._index}
+            basic_fields = {
+                name: trans
+                for name, trans in basic_fields.items() if name in keys
+            }
+            meta = [field for field in meta if field.key() in keys]
+
+        with phase('extract', rows=len(self._raw)):
+            return Extractor.compile(basic_fields, meta).extract(self._raw)
 
 
 class SkyDiveDataProvider:
@@ -185,14 +686,25 @@ class SkyDiveDataProvider:
         """
         self._ctxt = ctxt
 
-    def _run_query(self, query: str) -> Any:
+    def _run_query(self,
+                   query: Union[str, Query],
+                   projection: Optional[Projection] = None,
+                   process: Optional[Callable[[RawData], RawData]] = None) -> Any:
         """
         Run a Skydive Query
         Args:
-            query: The query string
+            query: The query (string or Query)
                 It must not contain the initial G.At() ,
                 that part will be prepended by
                 this function
+            projection: (optional) The Projection to apply to the resulting
+                nodes. Skydive's gremlin has no step that returns a subset
+                of the keys of each node, so the projection is applied as
+                soon as the result is received
+            process: (optional) The processing of the (projected) nodes,
+                e.g: the post filters. With the "chunk_size" option, the
+                nodes are projected and processed in chunks as they are
+                received (see _stream_query)
         """
 
         at = "At('%s')." % self._ctxt.options().get(
@@ -202,12 +714,136 @@ class SkyDiveDataProvider:
 
         log = logging.getLogger("Data")
         log.debug('Query: %s' % full_query)
-        data = self._ctxt.rest_cli().lookup(full_query)
+        if projection is not None and self._ctxt.options().get('chunk_size'):
+            data = self._stream_query(full_query, projection, process)
+            if data is not None:
+                log.debug('Result len: %i (streamed)' % len(data))
+                return data
+
+        data = self._lookup(full_query)
         if isinstance(data, list):
             log.debug('Result len: %i' % len(data))
+            if projection is not None:
+                with phase('prune', rows=len(data)):
+                    data = projection.prune(data)
+            if process is not None:
+                data = process(data)
+
+        return data
+
+    def _stream_query(self, full_query: str, projection: Projection,
+                      process: Optional[Callable[[RawData], RawData]] = None) -> Optional[RawData]:
+        """
+        Run a full query streaming its result: the nodes are decoded as the
+        response is received and projected (and processed) in chunks of
+        "chunk_size" nodes, so the raw response and its complete nodes are
+        never buffered whole. The kept (pruned) nodes are still accumulated
+        into the returned list, so that list grows with the filtered result.
+        The result is neither memoized nor cached (it is projected).
+        Returns None if the query cannot be streamed, e.g: the on-disk cache
+        is enabled or the client is not a Skydive REST client
+        """
+        from skynet.common.codec import paused_gc
+        from skynet.common.stream import stream_lookup
 
+        options = self._ctxt.options()
+        if options.get('cache'):
+            return None
+        data = self._ctxt.memo().get(full_query)
+        if data is not None:
+            profiler().add('memo', hits=1)
+            data = projection.prune(data)
+            return process(data) if process is not None else data
+
+        data = []
+        elapsed = 0.0
+        with self._ctxt.slots():
+            nodes = stream_lookup(self._ctxt.rest_cli(), full_query)
+            if nodes is None:
+                return None
+            with nodes, paused_gc():
+                chunks = nodes.chunks(int(options['chunk_size']))
+                while True:
+                    start = time.perf_counter()
+                    chunk = next(chunks, None)
+                    elapsed += time.perf_counter() - start
+                    if chunk is None:
+                        break
+                    with phase('prune', rows=len(chunk)):
+                        chunk = projection.prune(chunk)
+                    data.extend(process(chunk) if process is not None else chunk)
+
+        profiler().add('query', elapsed, calls=1, bytes=nodes.bytes, rows=len(data))
         return data
 
+    def _run_filtered_query(self,
+                            query: Query,
+                            projection: Projection,
+                            filter_obj: Optional['SkyDiveDataFilter'] = None) -> Any:
+        """
+        Run a Skydive Query filtered by a SkyDiveDataFilter: the gremlin part
+        of the filter is appended to the query and the rest of the filter is
+        evaluated on the results
+        Args:
+            query: The query string (see _run_query)
+            projection: The Projection to apply to the resulting nodes
+            filter_obj: (optional) The filter
+        """
+        if filter_obj is None:
+            return self._run_query(query, projection)
+
+        return self._run_query(query.extend(filter_obj.steps()),
+                               projection.union(filter_obj.projection()),
+                               filter_obj.post_process)
+
+    def _lookup(self, full_query: str) -> Any:
+        """
+        Lookup a full query. Results are memoized for the lifetime of the
+        context (see SkyNetCtxt.memo()) and the on-disk query cache is used
+        if enabled (see the "cache" and "refresh" options)
+        """
+        memo = self._ctxt.memo()
+        with memo.lock(full_query):
+            data = memo.get(full_query)
+            if data is not None:
+                profiler().add('memo', hits=1)
+                return data
+
+            options = self._ctxt.options()
+            cache = self._ctxt.cache() if options.get('cache') else None
+            if cache and not options.get('refresh'):
+                data = cache.get(self._ctxt.api(), full_query)
+                if data is not None:
+                    profiler().add('cache', hits=1)
+
+            if data is None:
+                # The size of the response is accounted by the client (see
+                # the "http" phase of SkyNetRESTClient)
+                with self._ctxt.slots(), phase('query') as counters:
+                    data = self._ctxt.rest_cli().lookup(full_query)
+                    counters['rows'] = len(data) if isinstance(data, list) else 1
+                if cache:
+                    cache.put(self._ctxt.api(),
+                              full_query,
+                              data,
+                              permanent=is_absolute_time(options.get('at')))
+
+            memo.put(full_query, data)
+        return data
+
+    def _run_queries(self,
+                     queries: List[Union[str, Query]],
+                     projection: Optional[Projection] = None) -> List[Any]:
+        """
+        Run several independent Skydive Queries concurrently
+        Returns the list of results (in the same order as the queries)
+        Args:
+            queries: The queries (see _run_query())
+            projection: (optional) The Projection to apply to the results
+        """
+        return self._ctxt.map(lambda query: self._run_query(query, projection),
+                              queries)
+
 
 class SkyDiveFilterError(Exception):
     pass
@@ -230,6 +866,147 @@ class SkyDivePostFilter:
         self.trans = trans if trans else SkyDiveFilter.noop
 
 
+class SkyDiveColumnFilter(SkyDivePostFilter):
+    """
+    SkyDiveColumnFilter defines a post filter that is evaluated on a whole column of
+    the fetched data at once
+    The columns are built by SkyDiveDataFilter.columns(), func must accept a column
+    (a pandas Series) and the transformed filter value and return a boolean mask
+    (a numpy array).
+    This class includes some predefined pairs of transformation and mask functions, all of
+    them accept IN-lists ("Value1|Value2")
+    """
+    def __init__(self,
+                 name: str,
+                 func: Callable,
+                 trans: Any = None,
+                 column: str = ""):
+        """
+        SkyDiveColumnFilter constructor
+        Args:
+            name: The name of the filter
+            func: A callable that must accept a column and the filter value and return a boolean mask
+            trans: (optional) The transformation to apply to the filter value (e.g: parsing)
+            column: (optional) The column name to apply the filter to (default: same as 'name')
+        """
+        super(SkyDiveColumnFilter, self).__init__(name, func, trans)
+        self.column = column if column != "" else name
+
+    @classmethod
+    def values(cls, val: str) -> List[str]:
+        """
+        Transformation function that splits an IN-list
+        """
+        return val.split('|')
+
+    @classmethod
+    def in_values(cls, column: Series, values: List[Any]) -> numpy.ndarray:
+        """
+        Mask function that selects the items equal to any of the values
+        """
+        return column.isin(values).to_numpy()
+
+    @classmethod
+    def ranges(cls, val: str) -> List[Tuple[int, int]]:
+        """
+        Transformation function that parses a list of numbers or ranges ("First..Last"
+        or "First-Last"). Numbers can be decimal or hexadecimal (e.g: 0x0800) and
+        negative (e.g: -2..2)
+        """
+        ranges = []
+        for item in cls.values(val):
+            first, sep, last = item.partition('..')
+            if not sep:
+                # "First-Last" is the former syntax (the sign of First is not a separator)
+                pos = item.find('-', 1)
+                if pos > 0:
+                    first, sep, last = item[:pos], '-', item[pos + 1:]
+            low = cls._parse_number(first)
+            ranges.append((low, cls._parse_number(last) if sep else low))
+        return ranges
+
+    @classmethod
+    def in_ranges(cls, column: Series,
+                  ranges: List[Tuple[int, int]]) -> numpy.ndarray:
+        """
+        Mask function that selects the numbers that are in any of the ranges
+        """
+        numbers = cls._convert(column, cls._to_number, float('nan'))
+        mask = numpy.zeros(len(column), dtype=bool)
+        for low, high in ranges:
+            mask |= (numbers >= low) & (numbers <= high)
+        return mask
+
+    @classmethod
+    def networks(cls, val: str) -> List[ipaddress.IPv4Network]:
+        """
+        Transformation function that parses a list of IPv4 addresses or prefixes
+        (e.g: 10.0.0.0/8 or 10.0.0.0/255.0.0.0)
+        """
+        try:
+            return [
+                ipaddress.IPv4Network(item, strict=False)
+                for item in cls.values(val)
+            ]
+        except ValueError as err:
+            raise SkyDiveFilterError('Wrong IPv4 address: %s' % err)
+
+    @classmethod
+    def in_networks(cls, column: Series,
+                    networks: List[ipaddress.IPv4Network]) -> numpy.ndarray:
+        """
+        Mask function that selects the IPv4 addresses that belong to any of the networks
+        Masked addresses (e.g: 10.0.0.0/24) are compared by their network address
+        """
+        addresses = cls._convert(column, cls._to_address, -1)
+        mask = numpy.zeros(len(column), dtype=bool)
+        for network in networks:
+            netmask = int(network.netmask)
+            mask |= (addresses >= 0) & (
+                (addresses & netmask) == int(network.network_address))
+        return mask
+
+    @classmethod
+    def _convert(cls, column: Series, func: Callable,
+                 missing: Any) -> numpy.ndarray:
+        """
+        Convert the values of a column, calling func only once per distinct value
+        """
+        codes, uniques = factorize(column)
+        converted = numpy.array([func(value) for value in uniques] + [missing])
+        # Missing values have code -1, i.e: the last element
+        return converted[codes]
+
+    @classmethod
+    def _parse_number(cls, val: str) -> int:
+        try:
+            return int(val, 0)
+        except ValueError:
+            raise SkyDiveFilterError('Wrong number: %s' % val)
+
+    @classmethod
+    def _to_number(cls, value: Any) -> float:
+        if isinstance(value, (int, float)):
+            return value
+        try:
+            return int(value, 0)
+        except (TypeError, ValueError):
+            return float('nan')
+
+    @classmethod
+    def _to_address(cls, value: Any) -> int:
+        # Equivalent to int(IPv4Address(value)) but several times faster
+        octets = str(value).partition('/')[0].split('.')
+        if len(octets) != 4 or not all(octet.isdigit() for octet in octets):
+            return -1
+        address = 0
+        for octet in map(int, octets):
+            if octet > 255:
+                return -1
+            address = address << 8 | octet
+        return address
+
+
 class SkyDiveFilter:
     """
     SkyDiveFilter defines one filter information
@@ -276,6 +1053,15 @@ class SkyDiveFilter:
 class SkyDiveDataFilter:
     """
     SkyDiveFilter implements filtering on skydive queries
+    Filter strings are parsed into expressions (see skynet.common.filter).
+    The parts of the expression that Skydive can evaluate are pushed down into
+    the gremlin filter (see generate_gremlin) and the rest is evaluated on
+    the fetched data (see post_process)
+    """
+    COMPARATORS = {'<': 'Lt', '<=': 'Lte', '>': 'Gt', '>=': 'Gte'}
+    RANGE = re.compile(r'^(-?(?:0[xX][0-9a-fA-F]+|\d+))(?:\.\.|-)(-?(?:0[xX][0-9a-fA-F]+|\d+))$')
+    """
+    RANGE matches "First..Last" (or "First-Last") values
     """
     def __init__(self,
                  filters: List[SkyDiveFilter],
@@ -285,26 +1071,21 @@ class SkyDiveDataFilter:
         """
         self._filters = filters
         self._post_filters = post_filters
-        self._processed: Dict[str, Any] = {}
-        self._post_processed: List[Dict[str, Any]] = []
+        self._expr: Optional[Expression] = None
+        self._steps: List[Step] = []
+        self._local: Optional[Expression] = None
 
     def _filter_names(self) -> List[str]:
         return [f.name for f in self._filters]
 
-    def _process_filter(self, key: str, val: str) -> None:
+    def _find(self, key: str) -> Union[SkyDiveFilter, SkyDivePostFilter]:
         for filt in self._filters:
             if filt.name == key:
-                self._processed[filt.key_name] = filt.trans(val)
-                return
+                return filt
 
-        if self._post_filters:
-            for post_filt in self._post_filters:
-                if post_filt.name == key:
-                    self._post_processed.append({
-                        "func": post_filt.func,
-                        "value": post_filt.trans(val),
-                    })
-                    return
+        for post_filt in self._post_filters:
+            if post_filt.name == key:
+                return post_filt
 
         raise SkyDiveFilterError('Filter not found: %s' % key)
 
@@ -312,49 +1093,353 @@ class SkyDiveDataFilter:
         """
         Run the filter The Filter Format is as follows:
         Key1=Val1,Key2=Val2
-        The Conditions are ANDed
+        The Conditions are ANDed. Conditions can also be combined with AND,
+        OR, NOT and parentheses and compared with =, !=, <, <=, >, >= and
+        ~ (regex). "Key=Val1|Val2" matches any of the values and
+        "Key=First..Last" a range of numbers
 
         raises: SkyDiveFilterError if there is an
         issue with the string format
         """
-        if filter_str == "":
+        try:
+            expr = parse(filter_str)
+        except FilterParseError as err:
+            raise SkyDiveFilterError('Wrong filter format: %s' % err)
+
+        if expr is None:
             return
 
-        for filter_elem in filter_str.split(','):
-            filter_parts = filter_elem.split('=')
-            if len(filter_parts) < 2:
-                raise SkyDiveFilterError('Wrong filter format')
-            key = filter_parts[0]
-            val = filter_elem[len(key) + 1:]
-            if not key or not val:
-                raise SkyDiveFilterError('Wrong filter format')
+        for cmp in comparisons(expr):
+            self._check(cmp)
+
+        self._expr = nnf(And([self._expr, expr]) if self._expr else expr)
+        self._plan()
+
+    def _check(self, cmp: Comparison) -> None:
+        """
+        Check that a comparison is supported by its filter (and its value can
+        be transformed)
+        """
+        filt = self._find(cmp.key)
+        try:
+            if isinstance(filt, SkyDiveFilter):
+                for value in cmp.value.split('|'):
+                    if self._range(filt, value) is None:
+                        filt.trans(value)
+            elif cmp.op in ['=', '!=']:
+                filt.trans(cmp.value)
+            elif not isinstance(filt, SkyDiveColumnFilter) or cmp.op in [
+                    '~', '!~'
+            ]:
+                raise SkyDiveFilterError(
+                    'Operator %s not supported by %s' % (cmp.op, cmp.key))
+
+            if cmp.op in self.COMPARATORS:
+                self._number(filt, cmp.value)
+        except ValueError as err:
+            raise SkyDiveFilterError('Wrong value for %s: %s' %
+                                     (cmp.key, err))
+
+    def _plan(self) -> None:
+        """
+        Split the expression into the gremlin filter steps and the local
+        remainder
+        """
+        steps: List[Step] = []
+        local = []
+        for term in conjuncts(self._expr):
+            if isinstance(term, Comparison):
+                pairs = self._push(term)
+                if pairs is not None:
+                    steps.extend(Step('Has', key, value) for key, value in pairs)
+                    continue
+            elif isinstance(term, Or):
+                either = self._push_either(term)
+                if either is not None:
+                    steps.append(either)
+                    continue
+            local.append(term)
+
+        # Has steps go first so they can be merged (see query.optimize)
+        self._steps = optimize(
+            sorted(steps, key=lambda step: step.name != 'Has'))
+        self._local = (local[0] if len(local) == 1 else
+                       And(local)) if local else None
+
+    def _push_either(self, term: Or) -> Optional[Step]:
+        """
+        Returns the HasEither step that implements a disjunction of simple
+        comparisons, or None if Skydive cannot evaluate it
+        """
+        either: List[Any] = []
+        for child in term.children:
+            if not isinstance(child, Comparison):
+                return None
+            child_pairs = self._push(child)
+            if child_pairs is None or len(child_pairs) != 1:
+                return None
+            either.extend(child_pairs[0])
+
+        return Step('HasEither', *either)
+
+    def _push(self, cmp: Comparison) -> Optional[List[Tuple[str, Any]]]:
+        """
+        Returns the key, value pairs that implement a comparison in gremlin,
+        or None if Skydive cannot evaluate it
+        """
+        filt = self._find(cmp.key)
+        if not isinstance(filt, SkyDiveFilter):
+            return None
+
+        key = filt.key_name
+        if cmp.op == '~':
+            return [(key, Predicate.regex(cmp.value))]
+
+        if cmp.op in self.COMPARATORS:
+            return [(key,
+                     Predicate(self.COMPARATORS[cmp.op],
+                               self._number(filt, cmp.value)))]
+
+        if cmp.op not in ['=', '!=']:
+            return None
+
+        value_range = self._range(filt, cmp.value)
+        if value_range is not None:
+            return [(key, Predicate('Gte', value_range[0])),
+                    (key, Predicate('Lte', value_range[1]))] if cmp.op == '=' else None
+
+        values = [self._argument(filt.trans(value)) for value in cmp.value.split('|')]
+        if any(isinstance(value, (Predicate, Raw)) for value in values):
+            return [(key, values[0])] if (len(values) == 1
+                                          and cmp.op == '=') else None
+
+        if len(values) == 1:
+            return [(key, values[0] if cmp.op == '=' else Predicate.ne(values[0]))]
+
+        return [(key, Predicate.within(*values)
+                 if cmp.op == '=' else Predicate.without(*values))]
+
+    @classmethod
+    def _argument(cls, value: Any) -> Any:
+        """
+        Convert a transformed value (a gremlin literal or predicate, e.g:
+        "'name'" or "Regex('a.*')") into a Step argument
+        """
+        if not isinstance(value, str):
+            return value
+
+        args = parse_literals(value)
+        if args is not None and len(args) == 1:
+            return args[0]
+
+        name, sep, rest = value.partition('(')
+        if sep and rest.endswith(')') and name.isidentifier():
+            args = parse_literals(rest[:-1])
+            if args is not None:
+                return Predicate(name, *args)
+
+        return Raw(value)
 
-            self._process_filter(key, val)
+    def _range(self, filt: Union[SkyDiveFilter, SkyDivePostFilter],
+               value: str) -> Optional[Tuple[int, int]]:
+        """
+        Returns the bounds of a "First-Last" numeric range value (or None)
+        """
+        match = self.RANGE.match(value)
+        if not match:
+            return None
+        try:
+            first, last = (self._number(filt, bound) for bound in match.groups())
+        except ValueError:
+            return None
+        return first, last
+
+    @classmethod
+    def _number(cls, filt: Union[SkyDiveFilter, SkyDivePostFilter],
+                value: str) -> int:
+        """
+        Transform a value that is expected to be a number
+        """
+        if isinstance(filt, SkyDiveFilter):
+            number = filt.trans(value)
+            if not isinstance(number, int):
+                raise ValueError('%s is not a number' % value)
+            return number
+        return SkyDiveColumnFilter._parse_number(value)
 
     def generate_gremlin(self) -> str:
         """
         Generate a gremlin query string based on a the filter
         """
-        gremlin_filters = []
-        if not self._processed:
-            return ""
+        return "".join(".{}".format(step) for step in self._steps)
 
-        for filter_key, filter_val in self._processed.items():
-            filter_val_str = "{}".format(filter_val)
-            gremlin_filters.append("'{}',{}".format(filter_key,
-                                                    filter_val_str))
+    def steps(self) -> List[Step]:
+        """
+        Returns the gremlin steps of the filter
+        """
+        return self._steps
 
-        return '.Has({})'.format(
-            ','.join(gremlin_filters) if len(gremlin_filters) > 0 else "")
+    def _local_columns(self) -> List[str]:
+        """
+        Returns the names of the columns the local remainder is evaluated on
+        """
+        names = []
+        for cmp in comparisons(self._local):
+            filt = self._find(cmp.key)
+            if isinstance(filt, SkyDiveFilter):
+                names.append(filt.key_name)
+            elif isinstance(filt, SkyDiveColumnFilter):
+                names.append(filt.column)
+        return list(dict.fromkeys(names))
+
+    def column_path(self, name: str) -> Tuple[str, ...]:
+        """
+        Returns the path of the raw data a column is built from
+        """
+        if name in SkyDiveData.BASIC_FIELDS:
+            return (name, )
+        return ('Metadata', ) + tuple(name.split('.'))
+
+    def projection(self) -> Projection:
+        """
+        Returns the Projection of the raw data needed by post_process
+        """
+        return Projection(
+            [self.column_path(name) for name in self._local_columns()])
+
+    def columns(self, data: List[Dict[str, Any]],
+                names: List[str]) -> Dict[str, Series]:
+        """
+        Build the columns the filter remainder is evaluated on
+        By default, each column holds the (dotted) Metadata key of the same
+        name or the basic field of the same name.
+        A column can also hold several values per item (or none): its index is
+        then the position of the item of each value, and an item satisfies a
+        comparison if any of its values does
+        """
+        columns = {}
+        for name in names:
+            if name in SkyDiveData.BASIC_FIELDS:
+                values = [item.get(name) for item in data]
+            else:
+                values = [node_value(item, name)[1] for item in data]
+            columns[name] = Series(values, dtype=object)
+        return columns
 
     def post_process(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Applies post filters and retuns the resulting filtered data
         """
-        if self._post_processed:
-            return list(
-                filter(
-                    lambda item: all(filt["func"](item, filt["value"])
-                                     for filt in self._post_processed), data))
+        if self._local is None or not data:
+            return data
 
-        return data
+        with phase('filter', rows=len(data)):
+            columns = self.columns(data, self._local_columns())
+            return list(compress(data, self._mask(self._local, data,
+                                                  columns)))
+
+    def _mask(self, expr: Expression, data: List[Dict[str, Any]],
+              columns: Dict[str, Series]) -> numpy.ndarray:
+        """
+        Evaluate an expression on the data
+        """
+        if isinstance(expr, Comparison):
+            return self._compare(expr, data, columns)
+        if isinstance(expr, Not):
+            return ~self._mask(expr.child, data, columns)
+
+        masks = [self._mask(child, data, columns) for child in expr.children]
+        if isinstance(expr, And):
+            return numpy.logical_and.reduce(masks)
+        return numpy.logical_or.reduce(masks)
+
+    def _compare(self, cmp: Comparison, data: List[Dict[str, Any]],
+                 columns: Dict[str, Series]) -> numpy.ndarray:
+        """
+        Evaluate a comparison on the data
+        """
+        if cmp.op in ['!=', '!~']:
+            return ~self._compare(cmp.negate(), data, columns)
+
+        filt = self._find(cmp.key)
+        if not isinstance(filt, (SkyDiveFilter, SkyDiveColumnFilter)):
+            value = filt.trans(cmp.value)
+            return numpy.array([filt.func(item, value) for item in data],
+                               dtype=bool)
+
+        column = columns[filt.key_name if isinstance(filt, SkyDiveFilter)
+                         else filt.column]
+        return self._items(self._compare_column(filt, cmp, column), column,
+                           len(data))
+
+    def _compare_column(self, filt: Union[SkyDiveFilter, SkyDiveColumnFilter],
+                        cmp: Comparison, column: Series) -> numpy.ndarray:
+        """
+        Evaluate a (positive) comparison on each value of a column
+        """
+        if cmp.op == '~':
+            return self._regex(column, cmp.value)
+
+        if cmp.op != '=':
+            numbers = SkyDiveColumnFilter._convert(
+                column, SkyDiveColumnFilter._to_number, float('nan'))
+            return self.COMPARE[cmp.op](numbers, self._number(filt, cmp.value))
+
+        if isinstance(filt, SkyDiveColumnFilter):
+            return numpy.asarray(filt.func(column, filt.trans(cmp.value)),
+                                 dtype=bool)
+
+        return numpy.logical_or.reduce([
+            self._equal(filt, column, value)
+            for value in cmp.value.split('|')
+        ])
+
+    @classmethod
+    def _items(cls, mask: numpy.ndarray, column: Series,
+               size: int) -> numpy.ndarray:
+        """
+        Reduce the mask of the values of a column to the mask of the items:
+        an item is selected if any of its values is (see columns)
+        """
+        if isinstance(column.index, RangeIndex) and len(column) == size:
+            return mask
+        items = numpy.zeros(size, dtype=bool)
+        items[column.index.to_numpy()[mask]] = True
+        return items
+
+    COMPARE = {
+        '<': numpy.less,
+        '<=': numpy.less_equal,
+        '>': numpy.greater,
+        '>=': numpy.greater_equal,
+    }
+
+    def _equal(self, filt: SkyDiveFilter, column: Series,
+               value: str) -> numpy.ndarray:
+        """
+        Evaluate "key = value" on a column the way Skydive would evaluate
+        the transformed value
+        """
+        value_range = self._range(filt, value)
+        if value_range is not None:
+            return SkyDiveColumnFilter.in_ranges(column, [value_range])
+
+        argument = self._argument(filt.trans(value))
+        if isinstance(argument, Predicate) and argument.name == 'Regex' and len(
+                argument.args) == 1:
+            return self._regex(column, argument.args[0])
+        if isinstance(argument, (Predicate, Raw)):
+            raise SkyDiveFilterError('Cannot evaluate %s=%s locally' %
+                                     (filt.name, value))
+        return column.isin([argument]).to_numpy()
+
+    @classmethod
+    def _regex(cls, column: Series, pattern: str) -> numpy.ndarray:
+        """
+        Evaluate a regex on a column. Skydive anchors regexes so they have to
+        match the whole value
+        """
+        regex = re.compile(pattern)
+        return SkyDiveColumnFilter._convert(
+            column, lambda value: value is not None and regex.fullmatch(
+                str(value)) is not None, False).astype(bool)
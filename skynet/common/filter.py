@@ -0,0 +1,284 @@
+import re
+from typing import List, NoReturn, Optional, Union
+
+OPERATORS = ['!=', '<=', '>=', '!~', '=', '<', '>', '~']
+"""
+The comparison operators, ordered so that the longest ones are tried first
+"""
+
+NEGATED = {
+    '=': '!=',
+    '!=': '=',
+    '<': '>=',
+    '>=': '<',
+    '>': '<=',
+    '<=': '>',
+    '~': '!~',
+    '!~': '~',
+}
+
+KEY = re.compile(r'[A-Za-z0-9_.\-]+')
+KEYWORD = re.compile(r'(AND|OR|NOT)(?![A-Za-z0-9_.\-])', re.IGNORECASE)
+
+
+class FilterParseError(ValueError):
+    pass
+
+
+class Comparison:
+    """
+    Comparison is the leaf of a filter expression: "Key OP Value"
+    For the "=" and "!=" operators, the value can be a list of alternatives
+    ("Value1|Value2")
+    """
+    def __init__(self, key: str, op: str, value: str):
+        self.key = key
+        self.op = op
+        self.value = value
+
+    def negate(self) -> 'Comparison':
+        """
+        Returns the opposite comparison
+        """
+        return Comparison(self.key, NEGATED[self.op], self.value)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Comparison) and (
+            self.key, self.op, self.value) == (other.key, other.op,
+                                               other.value)
+
+    def __repr__(self) -> str:
+        return "{}{}'{}'".format(self.key, self.op, self.value)
+
+
+class And:
+    """
+    And is the conjunction of its children
+    """
+    def __init__(self, children: List['Expression']):
+        self.children = children
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, And) and self.children == other.children
+
+    def __repr__(self) -> str:
+        return '(' + ' AND '.join(repr(child)
+                                  for child in self.children) + ')'
+
+
+class Or:
+    """
+    Or is the disjunction of its children
+    """
+    def __init__(self, children: List['Expression']):
+        self.children = children
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Or) and self.children == other.children
+
+    def __repr__(self) -> str:
+        return '(' + ' OR '.join(repr(child) for child in self.children) + ')'
+
+
+class Not:
+    """
+    Not is the negation of its child
+    """
+    def __init__(self, child: 'Expression'):
+        self.child = child
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Not) and self.child == other.child
+
+    def __repr__(self) -> str:
+        return 'NOT ' + repr(self.child)
+
+
+Expression = Union[Comparison, And, Or, Not]
+
+
+def parse(text: str) -> Optional[Expression]:
+    """
+    Parse a filter expression. The grammar is:
+
+        expression := term (OR term)*
+        term       := factor ((AND | ',') factor)*
+        factor     := NOT factor | '(' expression ')' | comparison
+        comparison := Key OP Value
+
+    Keywords are case insensitive, "||", "&&" and "!" can be used instead of
+    OR, AND and NOT. Values can be single or double quoted, otherwise they
+    end at the first whitespace, comma or unbalanced parenthesis
+
+    Returns None if the text is empty
+    raises: FilterParseError if the text is not a valid expression
+    """
+    if not text.strip():
+        return None
+    return _Parser(text).parse()
+
+
+def nnf(expr: Expression) -> Expression:
+    """
+    Returns the negation normal form of an expression: negations are pushed
+    down into the comparisons (so the result contains no Not) and nested
+    conjunctions and disjunctions are flattened
+    """
+    return _nnf(expr, False)
+
+
+def _nnf(expr: Expression, negate: bool) -> Expression:
+    if isinstance(expr, Comparison):
+        return expr.negate() if negate else expr
+    if isinstance(expr, Not):
+        return _nnf(expr.child, not negate)
+
+    children = [_nnf(child, negate) for child in expr.children]
+    # De Morgan: negating a conjunction yields a disjunction and vice versa
+    klass = type(expr) if not negate else (Or if isinstance(expr, And) else And)
+    flat: List[Expression] = []
+    for child in children:
+        if isinstance(child, klass):
+            flat.extend(child.children)
+        else:
+            flat.append(child)
+    return klass(flat) if len(flat) > 1 else flat[0]
+
+
+def conjuncts(expr: Optional[Expression]) -> List[Expression]:
+    """
+    Returns the list of top level terms of an expression that are ANDed
+    """
+    if expr is None:
+        return []
+    if isinstance(expr, And):
+        return expr.children
+    return [expr]
+
+
+def comparisons(expr: Optional[Expression]) -> List[Comparison]:
+    """
+    Returns all the comparisons of an expression
+    """
+    if expr is None:
+        return []
+    if isinstance(expr, Comparison):
+        return [expr]
+    if isinstance(expr, Not):
+        return comparisons(expr.child)
+    return [cmp for child in expr.children for cmp in comparisons(child)]
+
+
+class _Parser:
+    """
+    Recursive descent parser of filter expressions
+    """
+    def __init__(self, text: str):
+        self._text = text
+        self._pos = 0
+
+    def parse(self) -> Expression:
+        expr = self._expression()
+        self._skip()
+        if self._pos != len(self._text):
+            self._error('Unexpected input')
+        return expr
+
+    def _expression(self) -> Expression:
+        children = [self._term()]
+        while self._accept('||') or self._keyword('OR'):
+            children.append(self._term())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _term(self) -> Expression:
+        children = [self._factor()]
+        while self._accept(',') or self._accept('&&') or self._keyword('AND'):
+            children.append(self._factor())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _factor(self) -> Expression:
+        if self._keyword('NOT'):
+            return Not(self._factor())
+        self._skip()
+        if self._text.startswith('!', self._pos) and not self._text.startswith(
+                ('!=', '!~'), self._pos):
+            self._pos += 1
+            return Not(self._factor())
+        if self._accept('('):
+            expr = self._expression()
+            if not self._accept(')'):
+                self._error('Missing closing parenthesis')
+            return expr
+        return self._comparison()
+
+    def _comparison(self) -> Comparison:
+        self._skip()
+        match = KEY.match(self._text, self._pos)
+        if not match:
+            self._error('Expected a filter name')
+        self._pos = match.end()
+
+        self._skip()
+        for op in OPERATORS:
+            if self._text.startswith(op, self._pos):
+                self._pos += len(op)
+                break
+        else:
+            self._error('Expected an operator')
+
+        return Comparison(match.group(), op, self._value())
+
+    def _value(self) -> str:
+        self._skip()
+        if self._pos < len(self._text) and self._text[self._pos] in '\'"':
+            return self._quoted()
+
+        start = self._pos
+        depth = 0
+        while self._pos < len(self._text):
+            char = self._text[self._pos]
+            if char.isspace() or char == ',' or (char == ')' and depth == 0):
+                break
+            depth += {'(': 1, ')': -1}.get(char, 0)
+            self._pos += 1
+
+        if self._pos == start:
+            self._error('Expected a value')
+        return self._text[start:self._pos]
+
+    def _quoted(self) -> str:
+        quote = self._text[self._pos]
+        chars = []
+        pos = self._pos + 1
+        while pos < len(self._text) and self._text[pos] != quote:
+            if self._text[pos] == '\\' and pos + 1 < len(self._text):
+                pos += 1
+            chars.append(self._text[pos])
+            pos += 1
+        if pos == len(self._text):
+            self._error('Missing closing quote')
+        self._pos = pos + 1
+        return ''.join(chars)
+
+    def _skip(self) -> None:
+        while self._pos < len(self._text) and self._text[self._pos].isspace():
+            self._pos += 1
+
+    def _accept(self, token: str) -> bool:
+        self._skip()
+        if self._text.startswith(token, self._pos):
+            self._pos += len(token)
+            return True
+        return False
+
+    def _keyword(self, keyword: str) -> bool:
+        self._skip()
+        match = KEYWORD.match(self._text, self._pos)
+        if match and match.group(1).upper() == keyword:
+            self._pos = match.end()
+            return True
+        return False
+
+    def _error(self, message: str) -> NoReturn:
+        raise FilterParseError('{} at position {}: {}'.format(
+            message, self._pos, self._text))
@@ -0,0 +1,215 @@
+from typing import Any, Dict, List, Optional
+
+Node = Dict[str, Any]
+Edge = Dict[str, Any]
+
+
+class Graph:
+    """
+    Graph indexes the nodes and edges of a Skydive graph (e.g: the output
+    of a Subgraph() query) by node ID, by node Type and Name and by
+    parent -> children adjacency, so looking up nodes and their relatives
+    does not require scanning the whole graph.
+    Nodes and edges can be updated (added again with the same ID) and
+    removed, so the index can follow a changing graph
+    """
+    def __init__(self, nodes: List[Node] = [], edges: List[Edge] = []):
+        """
+        Graph constructor
+        Args:
+            nodes: The list of nodes
+            edges: The list of edges
+        """
+        self.clear()
+        for node in nodes:
+            self.add_node(node)
+        for edge in edges:
+            self.add_edge(edge)
+
+    def clear(self) -> None:
+        """
+        Remove all the nodes and edges
+        """
+        self._nodes: Dict[str, Node] = {}
+        self._position: Dict[str, int] = {}
+        self._next = 0
+        # Dictionaries are used as insertion ordered sets
+        self._types: Dict[Optional[str], Dict[str, None]] = {}
+        self._names: Dict[Any, Dict[str, None]] = {}
+        self._edges: Dict[str, Edge] = {}
+        # The edges of each node by ID, so they are removed in constant time
+        self._out: Dict[str, Dict[str, Edge]] = {}
+        self._in: Dict[str, Dict[str, Edge]] = {}
+
+    @classmethod
+    def from_subgraph(cls, graph: Dict[str, List[Dict[str, Any]]]) -> 'Graph':
+        """
+        Build a Graph from the output of a Subgraph() query
+        """
+        return cls(graph.get('Nodes') or [], graph.get('Edges') or [])
+
+    def add_node(self, node: Node) -> None:
+        """
+        Add a node to the graph (or replace the node with the same ID, which
+        keeps its position)
+        """
+        node_id = node['ID']
+        old = self._nodes.get(node_id)
+        if old is not None:
+            self._unindex(old)
+        else:
+            self._position[node_id] = self._next
+            self._next += 1
+        self._nodes[node_id] = node
+        self._types.setdefault(self.node_type(node), {})[node_id] = None
+        self._names.setdefault(self._name(node), {})[node_id] = None
+
+    def remove_node(self, node_id: str) -> None:
+        """
+        Remove a node and its edges from the graph
+        """
+        node = self._nodes.pop(node_id, None)
+        if node is None:
+            return
+        self._unindex(node)
+        del self._position[node_id]
+        for edge in self.out_edges(node_id) + self.in_edges(node_id):
+            self.remove_edge(edge['ID'])
+
+    def _unindex(self, node: Node) -> None:
+        for index, key in [(self._types, self.node_type(node)),
+                           (self._names, self._name(node))]:
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(node['ID'], None)
+                if not ids:
+                    del index[key]
+
+    @classmethod
+    def _name(cls, node: Node) -> Any:
+        name = (node.get('Metadata') or {}).get('Name')
+        return name if isinstance(name, (str, int)) else None
+
+    def add_edge(self, edge: Edge) -> None:
+        """
+        Add an edge to the graph (or replace the edge with the same ID)
+        """
+        if edge['ID'] in self._edges:
+            self.remove_edge(edge['ID'])
+        self._edges[edge['ID']] = edge
+        self._out.setdefault(edge['Parent'], {})[edge['ID']] = edge
+        self._in.setdefault(edge['Child'], {})[edge['ID']] = edge
+
+    def remove_edge(self, edge_id: str) -> None:
+        """
+        Remove an edge from the graph
+        """
+        edge = self._edges.pop(edge_id, None)
+        if edge is None:
+            return
+        for adjacency, node_id in [(self._out, edge['Parent']),
+                                   (self._in, edge['Child'])]:
+            edges = adjacency[node_id]
+            del edges[edge_id]
+            if not edges:
+                del adjacency[node_id]
+
+    @classmethod
+    def node_type(cls, node: Node) -> Optional[str]:
+        """
+        Returns the Type of a node
+        """
+        return (node.get('Metadata') or {}).get('Type')
+
+    def node(self, node_id: str) -> Optional[Node]:
+        """
+        Returns the node with the given ID (or None)
+        """
+        return self._nodes.get(node_id)
+
+    def nodes(self, node_type: Optional[str] = None) -> List[Node]:
+        """
+        Returns the nodes of the graph (in insertion order)
+        Args:
+            node_type: (optional) Only return the nodes of this Type
+        """
+        if node_type is None:
+            return list(self._nodes.values())
+        return [self._nodes[node_id] for node_id in self._types.get(node_type, {})]
+
+    def lookup(self, key: str, value: Any) -> Optional[List[str]]:
+        """
+        Returns the IDs of the nodes whose key has the given value (in
+        insertion order) or None if the key is not indexed. Only the ID, the
+        Type and the Name of the nodes are indexed
+        """
+        if key == 'Type':
+            return list(self._types.get(value, {}))
+        if key == 'Name' and isinstance(value, (str, int)):
+            return list(self._names.get(value, {}))
+        if key == 'ID':
+            return [value] if value in self._nodes else []
+        return None
+
+    def edges(self) -> List[Edge]:
+        """
+        Returns the edges of the graph
+        """
+        return list(self._edges.values())
+
+    def out_edges(self, node_id: str) -> List[Edge]:
+        """
+        Returns the edges whose parent is the given node
+        """
+        return list(self._out.get(node_id, {}).values())
+
+    def in_edges(self, node_id: str) -> List[Edge]:
+        """
+        Returns the edges whose child is the given node
+        """
+        return list(self._in.get(node_id, {}).values())
+
+    def children(self,
+                 node_id: str,
+                 relation_type: Optional[str] = None,
+                 node_type: Optional[str] = None) -> List[Node]:
+        """
+        Returns the children of a node (in insertion order)
+        Args:
+            node_id: The parent node ID
+            relation_type: (optional) Only follow edges of this RelationType
+            node_type: (optional) Only return the children of this Type
+        """
+        return self._related(self.out_edges(node_id), 'Child', relation_type,
+                             node_type)
+
+    def parents(self,
+                node_id: str,
+                relation_type: Optional[str] = None,
+                node_type: Optional[str] = None) -> List[Node]:
+        """
+        Returns the parents of a node (in insertion order)
+        Args:
+            node_id: The child node ID
+            relation_type: (optional) Only follow edges of this RelationType
+            node_type: (optional) Only return the parents of this Type
+        """
+        return self._related(self.in_edges(node_id), 'Parent', relation_type,
+                             node_type)
+
+    def _related(self, edges: List[Edge], end: str,
+                 relation_type: Optional[str],
+                 node_type: Optional[str]) -> List[Node]:
+        ids = {
+            edge[end]
+            for edge in edges if relation_type is None or (
+                edge.get('Metadata') or {}).get('RelationType') == relation_type
+        }
+        nodes = [
+            self._nodes[node_id]
+            for node_id in sorted(ids & self._nodes.keys(),
+                                  key=self._position.__getitem__)
+        ]
+        if node_type is not None:
+            nodes = [node for node in nodes if self.node_type(node) == node_type]
+        return nodes
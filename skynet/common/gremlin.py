@@ -0,0 +1,445 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from skynet.common.graph import Graph
+from skynet.common.memo import node_value, parse_literals, split_steps
+from skynet.common.query import Predicate
+
+BASIC_KEYS = [
+    'ID', 'Host', 'Origin', 'CreatedAt', 'UpdatedAt', 'DeletedAt', 'Revision'
+]
+"""
+BASIC_KEYS are the keys of nodes and edges that are not part of their
+Metadata
+"""
+
+EDGE_KEYS = BASIC_KEYS + ['Parent', 'Child']
+
+
+class GremlinError(Exception):
+    pass
+
+
+def split_args(args: str) -> List[str]:
+    """
+    Split the arguments of a step at the top level commas
+    """
+    parts = []
+    start = 0
+    depth = 0
+    quote = ''
+    for pos, char in enumerate(args):
+        if quote:
+            if char == quote and args[pos - 1] != '\\':
+                quote = ''
+        elif char in '\'"':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(args[start:pos])
+            start = pos + 1
+    parts.append(args[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_args(args: str) -> List[Any]:
+    """
+    Parse the arguments of a step: literals and predicates
+    (e.g: Within('a', 'b'))
+    """
+    values: List[Any] = []
+    for arg in split_args(args):
+        if arg[0] in '\'"' and len(arg) > 1 and arg[-1] == arg[0]:
+            values.append(arg[1:-1].replace('\\' + arg[0], arg[0]))
+            continue
+        literals = parse_literals(arg)
+        if literals is not None and len(literals) == 1:
+            values.append(literals[0])
+            continue
+        if arg in ['true', 'false']:
+            values.append(arg == 'true')
+            continue
+
+        name, sep, rest = arg.partition('(')
+        if not sep or not rest.endswith(')') or not name.isidentifier():
+            raise GremlinError('Cannot parse argument: %s' % arg)
+        values.append(Predicate(name, *parse_args(rest[:-1])))
+    return values
+
+
+def parse_step(step: str) -> Tuple[str, List[Any]]:
+    """
+    Parse a step into its name and its arguments
+    """
+    name, sep, rest = step.partition('(')
+    if not sep or not rest.endswith(')'):
+        raise GremlinError('Cannot parse step: %s' % step)
+    return name, parse_args(rest[:-1])
+
+
+def element_value(element: Dict[str, Any], key: str) -> Tuple[bool, Any]:
+    """
+    Get the value of a key of a node or an edge: either one of its basic keys
+    or a (dotted) Metadata key
+    """
+    if key in EDGE_KEYS and key in element:
+        return True, element[key]
+    return node_value(element, key)
+
+
+def _numeric(func: Callable[..., bool]) -> Callable[..., bool]:
+    def compare(value: Any, *bounds: Any) -> bool:
+        try:
+            return func(value, *bounds)
+        except TypeError:
+            return False
+
+    return compare
+
+
+PREDICATES: Dict[str, Callable[..., bool]] = {
+    'Ne': lambda value, other: value != other,
+    'Within': lambda value, *values: value in values,
+    'Without': lambda value, *values: value not in values,
+    'Gt': _numeric(lambda value, bound: value > bound),
+    'Gte': _numeric(lambda value, bound: value >= bound),
+    'Lt': _numeric(lambda value, bound: value < bound),
+    'Lte': _numeric(lambda value, bound: value <= bound),
+    'Between': _numeric(lambda value, low, high: low <= value < high),
+    'Inside': _numeric(lambda value, low, high: low < value < high),
+    'Outside': _numeric(lambda value, low, high: value < low or value > high),
+}
+
+
+def matches(value: Any, expected: Any) -> bool:
+    """
+    Returns whether a value matches a literal or a predicate. A list of values
+    matches if any of its elements does
+    """
+    if isinstance(value, list):
+        return any(matches(item, expected) for item in value)
+
+    if not isinstance(expected, Predicate):
+        return value == expected
+
+    if expected.name == 'Regex':
+        # Skydive anchors the regexes
+        return isinstance(value, str) and _regex(
+            expected.args[0]).fullmatch(value) is not None
+
+    func = PREDICATES.get(expected.name)
+    if func is None:
+        raise GremlinError('Unsupported predicate: %s' % expected.name)
+    return func(value, *expected.args)
+
+
+_REGEXES: Dict[str, Any] = {}
+
+
+def _regex(pattern: str) -> Any:
+    regex = _REGEXES.get(pattern)
+    if regex is None:
+        regex = _REGEXES.setdefault(pattern, re.compile(pattern))
+    return regex
+
+
+def has(element: Dict[str, Any], args: List[Any]) -> bool:
+    """
+    Returns whether an element matches all the key, value pairs of a Has
+    step (or has the key if only one argument is given)
+    """
+    if len(args) == 1:
+        return element_value(element, args[0])[0]
+
+    for key, expected in zip(args[::2], args[1::2]):
+        found, value = element_value(element, key)
+        if not found or not matches(value, expected):
+            return False
+    return True
+
+
+def has_either(element: Dict[str, Any], args: List[Any]) -> bool:
+    """
+    Returns whether an element matches any of the key, value pairs of a
+    HasEither step
+    """
+    for key, expected in zip(args[::2], args[1::2]):
+        found, value = element_value(element, key)
+        if found and matches(value, expected):
+            return True
+    return False
+
+
+class Evaluator:
+    """
+    Evaluator answers Skydive gremlin queries from a local Graph. It supports
+    the subset of the language skynet uses:
+        G, At, V, E, Flows, Has, HasKey, HasEither, HasNot, Out, In, Both,
+        OutE, InE, BothE, OutV, InV, BothV, Descendants, Subgraph, Dedup,
+        Limit, Count
+    and the Ne, Within, Without, Gt, Gte, Lt, Lte, Between, Inside, Outside
+    and Regex predicates.
+    Time-travel (At) is ignored: the graph is a single point in time
+    """
+    def __init__(self, graph: Graph):
+        """
+        Evaluator constructor
+        Args:
+            graph: The graph to query
+        """
+        self._graph = graph
+
+    def evaluate(self, query: str) -> Any:
+        """
+        Evaluate a gremlin query
+        raises: GremlinError if the query is not supported
+        """
+        steps = [parse_step(step) if step != 'G' else ('G', [])
+                 for step in split_steps(query.strip())]
+        steps = [(name, args) for name, args in steps if name not in ['G', 'At']]
+        if not steps:
+            raise GremlinError('Empty query: %s' % query)
+
+        elements: Any = None
+        for pos, (name, args) in enumerate(steps):
+            if pos == 0:
+                elements, skip = self._start(name, args, steps[1:])
+                continue
+            if skip:
+                skip = False
+                continue
+            method = getattr(self, '_step_' + name.lower(), None)
+            if method is None:
+                raise GremlinError('Unsupported step: %s' % name)
+            if not isinstance(elements, list):
+                raise GremlinError('Step %s after a terminal step' % name)
+            if name in ['Out', 'In', 'Both'] and not args and pos + 1 < len(
+                    steps) and steps[pos + 1][0] == 'Has':
+                # Out().Has(...) is Out(...): the nodes can be selected by
+                # Type before they are fetched from the graph
+                args = steps[pos + 1][1]
+                skip = True
+            elements = method(elements, args)
+        return elements
+
+    def _start(self, name: str, args: List[Any],
+               rest: List[Tuple[str, List[Any]]]) -> Tuple[List[Any], bool]:
+        """
+        Evaluate the first step. Returns the elements and whether the next
+        step has already been applied (V().Has(...) uses the indexes of the
+        graph, see Graph.lookup)
+        """
+        if name == 'V':
+            if args:
+                return [node for node in map(self._graph.node, args)
+                        if node is not None], False
+            if rest and rest[0][0] == 'Has' and len(rest[0][1]) % 2 == 0:
+                ids = self._lookup(rest[0][1])
+                if ids is not None:
+                    nodes = [self._graph.node(node_id) for node_id in ids]
+                    return [node for node in nodes
+                            if node is not None and has(node, rest[0][1])], True
+            return self._graph.nodes(), False
+        if name == 'E':
+            edges = self._graph.edges()
+            return [edge for edge in edges if not args or edge['ID'] in args], False
+        if name == 'Flows':
+            return [], False
+        raise GremlinError('Unsupported first step: %s' % name)
+
+    def _lookup(self, args: List[Any]) -> Optional[List[str]]:
+        """
+        Returns the IDs of the candidate nodes of a Has step from the most
+        selective index of the graph (or None if no key is indexed)
+        """
+        best: Optional[List[str]] = None
+        for key, value in zip(args[::2], args[1::2]):
+            if isinstance(value, Predicate):
+                if value.name != 'Within':
+                    continue
+                values = list(value.args)
+            else:
+                values = [value]
+            ids: List[str] = []
+            for item in values:
+                found = self._graph.lookup(key, item)
+                if found is None:
+                    break
+                ids.extend(found)
+            else:
+                if best is None or len(ids) < len(best):
+                    best = ids
+        return best
+
+    def _step_has(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return [element for element in elements if has(element, args)]
+
+    def _step_haskey(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return [element for element in elements if has(element, args[:1])]
+
+    def _step_hasnot(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return [element for element in elements if not has(element, args[:1])]
+
+    def _step_haseither(self, elements: List[Any],
+                        args: List[Any]) -> List[Any]:
+        return [element for element in elements if has_either(element, args)]
+
+    def _step_out(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        node_type = self._type(args)
+        return self._filter([
+            child for node in elements
+            for child in self._graph.children(node['ID'], node_type=node_type)
+        ], args)
+
+    def _step_in(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        node_type = self._type(args)
+        return self._filter([
+            parent for node in elements
+            for parent in self._graph.parents(node['ID'], node_type=node_type)
+        ], args)
+
+    def _step_both(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._step_out(elements, args) + self._step_in(elements, args)
+
+    def _step_oute(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._filter([
+            edge for node in elements
+            for edge in self._graph.out_edges(node['ID'])
+        ], args)
+
+    def _step_ine(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._filter([
+            edge for node in elements
+            for edge in self._graph.in_edges(node['ID'])
+        ], args)
+
+    def _step_bothe(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._filter(
+            self._step_oute(elements, []) + self._step_ine(elements, []), args)
+
+    def _step_outv(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._filter(self._ends(elements, ['Parent']), args)
+
+    def _step_inv(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._filter(self._ends(elements, ['Child']), args)
+
+    def _step_bothv(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._filter(self._ends(elements, ['Parent', 'Child']), args)
+
+    def _step_descendants(self, elements: List[Any],
+                          args: List[Any]) -> List[Any]:
+        """
+        The nodes and all their descendants through ownership edges
+        """
+        max_depth = args[0] if args else None
+        seen = {node['ID'] for node in elements}
+        result = list(elements)
+        current = list(elements)
+        depth = 0
+        while current and (max_depth is None or depth < max_depth):
+            children = []
+            for node in current:
+                for child in self._graph.children(node['ID'], 'ownership'):
+                    if child['ID'] not in seen:
+                        seen.add(child['ID'])
+                        children.append(child)
+            result.extend(children)
+            current = children
+            depth += 1
+        return result
+
+    def _step_subgraph(self, elements: List[Any],
+                       args: List[Any]) -> List[Any]:
+        """
+        The subgraph made of the elements: for edges, the edges and the
+        nodes they link. For nodes, the nodes and the edges between them
+        """
+        edges = [element for element in elements if 'Parent' in element]
+        nodes = [element for element in elements if 'Parent' not in element]
+        if edges:
+            nodes = self._dedup(nodes + self._ends(edges, ['Parent', 'Child']))
+        else:
+            ids = {node['ID'] for node in nodes}
+            edges = [
+                edge for node in nodes
+                for edge in self._graph.out_edges(node['ID'])
+                if edge['Child'] in ids
+            ]
+        return [{'Nodes': nodes, 'Edges': self._dedup(edges)}]
+
+    def _step_dedup(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return self._dedup(elements)
+
+    def _step_limit(self, elements: List[Any], args: List[Any]) -> List[Any]:
+        return elements[:args[0]]
+
+    def _step_count(self, elements: List[Any], args: List[Any]) -> int:
+        return len(elements)
+
+    def _ends(self, edges: List[Any], keys: List[str]) -> List[Any]:
+        nodes = []
+        for edge in edges:
+            for key in keys:
+                node = self._graph.node(edge[key])
+                if node is not None:
+                    nodes.append(node)
+        return nodes
+
+    @classmethod
+    def _type(cls, args: List[Any]) -> Optional[str]:
+        """
+        Returns the Type a Has step requires (if it is a literal)
+        """
+        for key, value in zip(args[::2], args[1::2]):
+            if key == 'Type' and isinstance(value, str):
+                return value
+        return None
+
+    @classmethod
+    def _filter(cls, elements: List[Any], args: List[Any]) -> List[Any]:
+        if not args:
+            return elements
+        return [element for element in elements if has(element, args)]
+
+    @classmethod
+    def _dedup(cls, elements: List[Any]) -> List[Any]:
+        seen: Dict[str, Any] = {}
+        for element in elements:
+            seen.setdefault(element['ID'], element)
+        return list(seen.values())
+
+
+class LocalClient:
+    """
+    LocalClient is a drop-in replacement of skydive's RESTClient (see
+    SkyNetCtxt.set_rest_cli) that answers the topology queries from a local
+    Graph instead of a Skydive analyzer
+    """
+    def __init__(self, graph: Graph):
+        """
+        LocalClient constructor
+        Args:
+            graph: The graph to query
+        """
+        self._evaluator = Evaluator(graph)
+
+    def lookup(self, gremlin: str, klass: Optional[Any] = None) -> Any:
+        return self._evaluator.evaluate(gremlin)
+
+    def lookup_nodes(self, gremlin: str) -> Any:
+        return self.lookup(gremlin)
+
+    def lookup_edges(self, gremlin: str) -> Any:
+        return self.lookup(gremlin)
+
+    def capture_list(self) -> List[Any]:
+        return []
+
+    def capture_create(self, *args, **kwargs) -> Any:
+        raise GremlinError('Captures are not supported on a local graph')
+
+    def capture_delete(self, *args, **kwargs) -> Any:
+        raise GremlinError('Captures are not supported on a local graph')
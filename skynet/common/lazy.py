@@ -0,0 +1,61 @@
+import importlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    LazyGroup is a click Group whose subcommands are only imported when they
+    are run, so a command does not pay for the dependencies of all the
+    others (e.g: pandas, graphviz or IPython)
+    The subcommands are given as:
+
+        {'name': ('package.module:attribute', 'Short help')}
+
+    The short help is what "--help" lists, so it does not import them either
+    """
+    def __init__(self,
+                 *args: Any,
+                 lazy_commands: Optional[Dict[str, Tuple[str, str]]] = None,
+                 **kwargs: Any):
+        """
+        LazyGroup constructor
+        Args:
+            lazy_commands: The subcommands imported when they are used
+        """
+        super(LazyGroup, self).__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context,
+                    cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            self.add_command(self.load(cmd_name), cmd_name)
+        return self.commands.get(cmd_name)
+
+    def load(self, cmd_name: str) -> click.Command:
+        """
+        Import a lazy subcommand
+        """
+        module, attribute = self.lazy_commands[cmd_name][0].split(':')
+        return getattr(importlib.import_module(module), attribute)
+
+    def format_commands(self, ctx: click.Context,
+                        formatter: click.HelpFormatter) -> None:
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            command = self.commands.get(name)
+            if command is None:
+                rows.append((name, self.lazy_commands[name][1]))
+            elif not command.hidden:
+                rows.append((name, command.get_short_help_str(limit)))
+
+        with formatter.section('Commands'):
+            formatter.write_dl(rows)
@@ -0,0 +1,226 @@
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+LITERAL = re.compile(r"\s*('(?:[^'\\]|\\.)*'|-?\d+)\s*(?:,|$)")
+
+
+def split_steps(query: str) -> List[str]:
+    """
+    Split a gremlin query into its top level steps
+    E.g: "G.V().Has('Name', 'a.b')" -> ["G", "V()", "Has('Name', 'a.b')"]
+    """
+    steps = []
+    start = 0
+    depth = 0
+    quote = ''
+    for pos, char in enumerate(query):
+        if quote:
+            if char == quote and query[pos - 1] != '\\':
+                quote = ''
+        elif char in '\'"':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '.' and depth == 0:
+            steps.append(query[start:pos])
+            start = pos + 1
+    steps.append(query[start:])
+    return steps
+
+
+def parse_literals(args: str) -> Optional[List[Any]]:
+    """
+    Parse the arguments of a step if they are all literals (single-quoted
+    strings or integers). Returns None otherwise
+    """
+    values: List[Any] = []
+    pos = 0
+    while pos < len(args):
+        match = LITERAL.match(args, pos)
+        if not match:
+            return None
+        token = match.group(1)
+        if token.startswith("'"):
+            values.append(token[1:-1].replace("\\'", "'"))
+        else:
+            values.append(int(token))
+        pos = match.end()
+    return values
+
+
+def normalize(query: str) -> str:
+    """
+    Normalize the formatting of the Has() steps of a query that only have
+    literal arguments, e.g: "V().Has('Type','host')" ->
+    "V().Has('Type', 'host')"
+    """
+    steps = []
+    for step in split_steps(query):
+        if step.startswith('Has(') and step.endswith(')'):
+            values = parse_literals(step[len('Has('):-1])
+            if values:
+                step = "Has({})".format(", ".join(
+                    literal(value) for value in values))
+        steps.append(step)
+    return '.'.join(steps)
+
+
+def literal(value: Any) -> str:
+    """
+    Format a literal value as a gremlin argument
+    """
+    if isinstance(value, str):
+        return "'{}'".format(value.replace("'", "\\'"))
+    return str(value)
+
+
+def node_value(node: Dict[str, Any], key: str) -> Tuple[bool, Any]:
+    """
+    Get the value of a (dotted) Metadata key of a node
+    Returns whether the key exists and its value
+    """
+    value: Any = node.get('Metadata')
+    for name in key.split('.'):
+        if not isinstance(value, dict) or name not in value:
+            return False, None
+        value = value[name]
+    return True, value
+
+
+class QueryMemo:
+    """
+    QueryMemo is a request-scoped table of query results shared by all the
+    providers of a SkyNetCtxt, so identical queries are only sent to
+    Skydive once. Some queries are also answered from the result of a
+    broader query that has already been fetched:
+        - "<base>.Count()" is the length of the result of "<base>"
+        - "<base>.Has(k1, v1, k2, v2)" is the result of "<base>" or
+          "<base>.Has(k1, v1)" filtered locally, if the step only has
+          literal values
+    """
+    UNDERIVABLE_KEYS = ['ID', 'Host']
+    """
+    Keys that are not part of the Metadata of the nodes
+    """
+    def __init__(self):
+        self._results: Dict[str, Any] = {}
+        # The lock of each query being fetched and its number of holders
+        # and waiters
+        self._pending: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._log = logging.getLogger("Memo")
+        self.queries = 0
+        self.saved = 0
+
+    def get(self, query: str) -> Optional[Any]:
+        """
+        Get the result of a query if it has already been fetched or it can be
+        derived from other results. Returns None otherwise
+        """
+        key = normalize(query)
+        with self._lock:
+            self.queries += 1
+            data = self._results.get(key)
+            if data is None:
+                data = self._derive(key)
+                if data is not None:
+                    self._results[key] = data
+            if data is not None:
+                self.saved += 1
+                self._log.debug('Saved round-trip: %s' % query)
+            return data
+
+    @contextmanager
+    def lock(self, query: str) -> Iterator[None]:
+        """
+        Hold a lock specific to a query. Holding it while the query is
+        fetched makes concurrent identical queries wait for the first result.
+        The lock is dropped when its last holder releases it
+        """
+        key = normalize(query)
+        with self._lock:
+            pending = self._pending.setdefault(key, [threading.Lock(), 0])
+            pending[1] += 1
+        try:
+            with pending[0]:
+                yield
+        finally:
+            with self._lock:
+                pending[1] -= 1
+                if not pending[1]:
+                    del self._pending[key]
+
+    def put(self, query: str, data: Any) -> None:
+        """
+        Store the result of a query
+        """
+        key = normalize(query)
+        with self._lock:
+            self._results[key] = data
+
+    def clear(self) -> None:
+        """
+        Remove all the results
+        """
+        with self._lock:
+            self._results.clear()
+
+    def _derive(self, query: str) -> Optional[Any]:
+        steps = split_steps(query)
+        last = steps[-1]
+        prefix = '.'.join(steps[:-1])
+        if last == 'Count()':
+            base = self._results.get(prefix)
+            if base is None:
+                base = self._derive(prefix)
+            return len(base) if isinstance(base, list) else None
+
+        if last.startswith('Has(') and last.endswith(')'):
+            return self._derive_has(prefix, last[len('Has('):-1])
+
+        return None
+
+    def _derive_has(self, prefix: str, args: str) -> Optional[Any]:
+        values = parse_literals(args)
+        if not values or len(values) % 2 or any(
+                key in self.UNDERIVABLE_KEYS for key in values[::2]):
+            return None
+
+        pairs = list(zip(values[::2], values[1::2]))
+        # Look for the broadest fetched result: the prefix itself or the
+        # prefix followed by a Has() step with a subset of the pairs
+        for count in range(len(pairs)):
+            for base_pairs in self._subsets(pairs, count):
+                base_query = prefix
+                if base_pairs:
+                    base_query += ".Has({})".format(", ".join(
+                        literal(v) for pair in base_pairs for v in pair))
+                base = self._results.get(base_query)
+                if isinstance(base, list) and all(
+                        isinstance(node, dict) and 'Metadata' in node
+                        for node in base):
+                    return [
+                        node for node in base if all(
+                            node_value(node, key) == (True, value)
+                            for key, value in pairs)
+                    ]
+        return None
+
+    @classmethod
+    def _subsets(cls, pairs: List[Tuple[Any, Any]],
+                 count: int) -> List[List[Tuple[Any, Any]]]:
+        """
+        Returns the ordered subsets of pairs that have count elements
+        """
+        if count == 0:
+            return [[]]
+        if count > len(pairs):
+            return []
+        return [[pairs[0]] + rest
+                for rest in cls._subsets(pairs[1:], count - 1)
+                ] + cls._subsets(pairs[1:], count)
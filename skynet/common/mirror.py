@@ -0,0 +1,247 @@
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from skydive.websocket.client import WSClient, WSClientDefaultProtocol, \
+    WSMessage, SyncRequestMsg, SyncRequestMsgType, SyncReplyMsgType, \
+    NodeAddedMsgType, NodeUpdatedMsgType, NodeDeletedMsgType, \
+    EdgeAddedMsgType, EdgeUpdatedMsgType, EdgeDeletedMsgType, \
+    OriginGraphDeletedMsgType
+
+from skynet.common.graph import Graph
+from skynet.common.gremlin import LocalClient
+
+
+class MirrorError(Exception):
+    pass
+
+
+class GraphMirror:
+    """
+    GraphMirror keeps an in-memory copy of the Skydive graph. It subscribes
+    to the analyzer's topology websocket endpoint, loads the whole graph
+    once (SyncRequest) and then applies the node and edge events as they
+    arrive. If the connection is lost, it reconnects and loads the graph
+    again.
+    The websocket client runs in its own thread, every access to the graph
+    must hold lock()
+    """
+    DEFAULT_TIMEOUT = 30.0
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self, api: str, path: str = '/ws/subscriber'):
+        """
+        GraphMirror constructor
+        Args:
+            api: The Skydive API address (IP:PORT)
+            path: The path of the websocket endpoint
+        """
+        self._url = 'ws://{}{}'.format(api, path)
+        self._graph = Graph()
+        self._lock = threading.RLock()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # The protocol of the current connection (if any)
+        self._protocol: Optional[Any] = None
+        self._log = logging.getLogger("Mirror")
+        self.syncs = 0
+        self.events = 0
+
+        self._handlers: Dict[str, Callable[[Any], None]] = {
+            NodeAddedMsgType: self._graph.add_node,
+            NodeUpdatedMsgType: self._graph.add_node,
+            NodeDeletedMsgType: lambda node: self._graph.remove_node(node['ID']),
+            EdgeAddedMsgType: self._graph.add_edge,
+            EdgeUpdatedMsgType: self._graph.add_edge,
+            EdgeDeletedMsgType: lambda edge: self._graph.remove_edge(edge['ID']),
+            OriginGraphDeletedMsgType: self._remove_origin,
+        }
+
+    def graph(self) -> Graph:
+        return self._graph
+
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def synced(self) -> bool:
+        """
+        Returns whether the graph has been loaded (and the mirror is
+        connected)
+        """
+        return self._synced.is_set()
+
+    def start(self) -> 'GraphMirror':
+        """
+        Start following the graph in the background
+        """
+        self._thread = threading.Thread(target=self._run,
+                                        name='mirror',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float = DEFAULT_TIMEOUT) -> bool:
+        """
+        Wait until the graph has been loaded. Returns whether it was
+        """
+        return self._synced.wait(timeout)
+
+    def stop(self) -> None:
+        """
+        Stop following the graph
+        """
+        self._stopped.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def apply(self, message: Dict[str, Any]) -> bool:
+        """
+        Apply a message of the Graph namespace. Returns False if the message
+        could not be applied and the graph has to be loaded again
+        """
+        if message.get('Namespace') != 'Graph':
+            return True
+
+        msg_type = message.get('Type', '')
+        obj = message.get('Obj')
+        if msg_type == SyncReplyMsgType:
+            self._sync(obj or {})
+            return True
+
+        handler = self._handlers.get(msg_type)
+        if handler is None:
+            # E.g: partial updates, which only carry the modified keys
+            self._log.debug('Unsupported message %s: resyncing' % msg_type)
+            return False
+
+        with self._lock:
+            handler(obj)
+            self.events += 1
+        return True
+
+    def _sync(self, graph: Dict[str, Any]) -> None:
+        with self._lock:
+            self._graph.clear()
+            for node in graph.get('Nodes') or []:
+                self._graph.add_node(node)
+            for edge in graph.get('Edges') or []:
+                self._graph.add_edge(edge)
+            self.syncs += 1
+        self._log.debug('Graph loaded: %i nodes, %i edges' % (len(
+            graph.get('Nodes') or []), len(graph.get('Edges') or [])))
+        self._synced.set()
+
+    def _remove_origin(self, origin: str) -> None:
+        for node in self._graph.nodes():
+            if node.get('Origin') == origin:
+                self._graph.remove_node(node['ID'])
+        for edge in self._graph.edges():
+            if edge.get('Origin') == origin:
+                self._graph.remove_edge(edge['ID'])
+
+    def _disconnected(self, reason: Any) -> None:
+        self._synced.clear()
+        if not self._stopped.is_set():
+            self._log.warning('Connection to %s lost: %s' % (self._url, reason))
+
+    def _run(self) -> None:
+        """
+        Follow the graph, reconnecting until stopped
+        """
+        delay = self.RECONNECT_DELAY
+        while not self._stopped.is_set():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            try:
+                client = WSClient('skynet-' + uuid.uuid4().hex[:8],
+                                  self._url,
+                                  protocol=_MirrorProtocol,
+                                  persistent=False,
+                                  mirror=self)
+                client.connect()
+                delay = self.RECONNECT_DELAY
+                if not self._stopped.is_set():
+                    loop.run_forever()
+            except OSError as err:
+                self._log.debug('Cannot connect to %s: %s' % (self._url, err))
+            except RuntimeError:
+                # stop() stopped the loop while connecting
+                if not self._stopped.is_set():
+                    raise
+            finally:
+                self._synced.clear()
+                self._close(loop)
+
+            self._stopped.wait(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    def _close(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Close the connection (if still open, e.g: when stopped) and its loop
+        """
+        protocol, self._protocol = self._protocol, None
+        try:
+            if protocol is not None and protocol.transport is not None:
+                protocol.transport.close()
+                # Let the transport close its socket. stop() may have queued
+                # a stop of the loop, which run_until_complete() would fail on
+                loop.call_soon(loop.stop)
+                loop.run_forever()
+        finally:
+            loop.close()
+
+
+class _MirrorProtocol(WSClientDefaultProtocol):
+    """
+    Websocket protocol that feeds a GraphMirror
+    """
+    def _mirror(self) -> GraphMirror:
+        return self.factory.kwargs['mirror']
+
+    def onOpen(self) -> None:
+        self._mirror()._protocol = self
+        self._sync()
+
+    def _sync(self) -> None:
+        self.sendWSMessage(
+            WSMessage('Graph', SyncRequestMsgType, SyncRequestMsg('')))
+
+    def onMessage(self, payload: bytes, isBinary: bool) -> None:
+        if not self._mirror().apply(json.loads(payload.decode('utf8'))):
+            self._sync()
+
+    def onClose(self, wasClean: bool, code: int, reason: Any) -> None:
+        self._mirror()._disconnected(reason)
+        self.stop()
+
+
+class MirrorClient(LocalClient):
+    """
+    MirrorClient is a drop-in replacement of skydive's RESTClient (see
+    SkyNetCtxt.set_rest_cli) that answers the topology queries from a
+    GraphMirror
+    """
+    def __init__(self, mirror: GraphMirror):
+        """
+        MirrorClient constructor
+        Args:
+            mirror: The (started) graph mirror
+        """
+        super(MirrorClient, self).__init__(mirror.graph())
+        self._mirror = mirror
+
+    def lookup(self, gremlin: str, klass: Optional[Any] = None) -> Any:
+        if not self._mirror.synced():
+            raise MirrorError('The graph mirror is not synchronized')
+        with self._mirror.lock():
+            return super(MirrorClient, self).lookup(gremlin, klass)
@@ -2,6 +2,8 @@ import textwrap
 import pprint
 from pandas import Series
 
+from skynet.common.profile import profiled
+
 
 class SeriesPrinter():
     """
@@ -12,6 +14,7 @@ class SeriesPrinter():
     def __init__(self):
         pass
 
+    @profiled('render')
     def print(self, series: Series, indent: int = 0) -> str:
         """
         Return a string representation of the Series.
@@ -0,0 +1,250 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List
+
+
+class Profiler:
+    """
+    Profiler accumulates the wall time and some counters (e.g: rows, bytes)
+    of each phase of a command (querying, extracting, building DataFrames,
+    rendering...)
+    Phases can be nested (e.g: "extract" runs within "dataframe") and can run
+    concurrently (e.g: "query"), so their times are inclusive and cumulative.
+    It also keeps the latency of each operation of some kinds (e.g: the HTTP
+    requests), which is reported as percentiles.
+    Each command has its own profiler (see SkyNetCtxt.profiler), which is
+    bound to the threads that run it (see profiling).
+    While it is not started, profiling has (almost) no overhead
+    """
+    PERCENTILES = [50, 90, 99]
+
+    def __init__(self):
+        self._enabled = False
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._latencies: Dict[str, List[float]] = {}
+        self._start = 0.0
+        self._tracing = False
+
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def start(self, trace_memory: bool = True) -> None:
+        """
+        Start profiling
+        Args:
+            trace_memory: Whether to trace the peak memory usage (tracemalloc
+                slows down allocations considerably). The peak is the one of
+                the whole process, so it is only meaningful if no other
+                command runs concurrently
+        """
+        self._phases = {}
+        self._latencies = {}
+        self._start = time.perf_counter()
+        if trace_memory and not self._tracing:
+            _start_tracing()
+            self._tracing = True
+        self._enabled = True
+
+    def stop(self) -> Dict[str, Any]:
+        """
+        Stop profiling and return the report
+        """
+        report = self.report()
+        self._enabled = False
+        if self._tracing:
+            _stop_tracing()
+            self._tracing = False
+        return report
+
+    @contextmanager
+    def phase(self, name: str, **counters: int) -> Iterator[Dict[str, int]]:
+        """
+        Measure the wall time of a phase. The yielded dictionary can be
+        used to add counters to the phase, e.g:
+
+            with profiler.phase('extract', rows=len(data)) as counters:
+                ...
+                counters['columns'] = len(columns)
+        """
+        if not self._enabled:
+            yield counters
+            return
+
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.add(name, time.perf_counter() - start, calls=1, **counters)
+
+    def add(self, name: str, seconds: float = 0.0, **counters: int) -> None:
+        """
+        Add time and counters to a phase (without counting a call unless
+        calls is given)
+        """
+        if not self._enabled:
+            return
+
+        with self._lock:
+            phase = self._phases.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            phase['seconds'] += seconds
+            for key, value in counters.items():
+                phase[key] = phase.get(key, 0) + value
+
+    def latency(self, name: str, seconds: float) -> None:
+        """
+        Add the latency of an operation (e.g: an HTTP request)
+        """
+        if not self._enabled:
+            return
+
+        with self._lock:
+            self._latencies.setdefault(name, []).append(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the profiling report: the total wall time, the peak memory
+        (if traced), the per-phase time and counters and the latency
+        percentiles (in milliseconds)
+        """
+        with self._lock:
+            phases = {
+                name: dict(phase, seconds=round(phase['seconds'], 6))
+                for name, phase in self._phases.items()
+            }
+            latencies = {
+                name: self._percentiles(samples)
+                for name, samples in self._latencies.items()
+            }
+        report: Dict[str, Any] = {
+            'wall_seconds': round(time.perf_counter() - self._start, 6),
+            'phases': phases,
+        }
+        if latencies:
+            report['latency_ms'] = latencies
+        if self._tracing:
+            report['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        return report
+
+    @classmethod
+    def _percentiles(cls, samples: List[float]) -> Dict[str, Any]:
+        ordered = sorted(samples)
+        result: Dict[str, Any] = {'count': len(ordered)}
+        for percentile in cls.PERCENTILES:
+            pos = min(len(ordered) - 1, len(ordered) * percentile // 100)
+            result['p{}'.format(percentile)] = round(ordered[pos] * 1000, 3)
+        result['max'] = round(ordered[-1] * 1000, 3)
+        return result
+
+    @classmethod
+    def format_report(cls, report: Dict[str, Any]) -> str:
+        """
+        Format a report as a table
+        """
+        keys = sorted({
+            key
+            for phase in report['phases'].values()
+            for key in phase if key not in ['calls', 'seconds']
+        })
+        header = ['phase', 'calls', 'seconds'] + keys
+        rows = [header] + [[name, phase['calls'], phase['seconds']] +
+                           [phase.get(key, '') for key in keys]
+                           for name, phase in report['phases'].items()]
+        widths = [max(len(str(row[i])) for row in rows) for i in range(len(header))]
+        lines = [
+            '  '.join(str(value).rjust(width) if pos else str(value).ljust(width)
+                      for pos, (value, width) in enumerate(zip(row, widths)))
+            for row in rows
+        ]
+        for name, latency in report.get('latency_ms', {}).items():
+            lines.append('{} latency (ms): {}'.format(
+                name, ', '.join('{}={}'.format(key, value)
+                                for key, value in latency.items())))
+        lines.append('wall: {}s'.format(report['wall_seconds']))
+        if 'peak_memory_bytes' in report:
+            lines.append('peak memory: {} bytes'.format(
+                report['peak_memory_bytes']))
+        return '\n'.join(lines)
+
+
+_tracing_lock = threading.Lock()
+_tracers = 0
+
+
+def _start_tracing() -> None:
+    """
+    Start tracing the memory allocations (unless another profiler does)
+    """
+    global _tracers
+    with _tracing_lock:
+        if _tracers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracers += 1
+
+
+def _stop_tracing() -> None:
+    """
+    Stop tracing the memory allocations when the last profiler that traces
+    them stops
+    """
+    global _tracers
+    with _tracing_lock:
+        _tracers -= 1
+        if _tracers == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+PROFILER = Profiler()
+"""
+PROFILER is the profiler of the threads that are not bound to a command
+(see profiling). It is never started by the CLI
+"""
+
+_bound = threading.local()
+
+
+def profiler() -> Profiler:
+    """
+    Returns the profiler of the command the current thread runs
+    """
+    return getattr(_bound, 'profiler', None) or PROFILER
+
+
+@contextmanager
+def profiling(prof: Profiler) -> Iterator[Profiler]:
+    """
+    Bind a profiler to the current thread: profiler() returns it until the
+    end of the block
+    """
+    previous = getattr(_bound, 'profiler', None)
+    _bound.profiler = prof
+    try:
+        yield prof
+    finally:
+        _bound.profiler = previous
+
+
+def phase(name: str, **counters: int):
+    """
+    Measure a phase with the profiler of the running command
+    (see Profiler.phase)
+    """
+    return profiler().phase(name, **counters)
+
+
+def profiled(name: str) -> Callable:
+    """
+    Decorator that measures every call of a function as a phase
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler().phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,246 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple
+
+from skynet.common.memo import literal
+
+FILTER_STEPS = ['Has', 'HasEither', 'HasKey', 'HasNot', 'Dedup']
+"""
+FILTER_STEPS are the steps that only select some of their input elements,
+so applying them twice in a row is the same as applying them once
+"""
+
+
+class Predicate:
+    """
+    Predicate is a gremlin predicate used as the value of a Has step
+    (e.g: Within('a', 'b'), Regex('a.*'), Gte(10))
+    """
+    def __init__(self, name: str, *args: Any):
+        self.name = name
+        self.args = args
+
+    @classmethod
+    def within(cls, *values: Any) -> 'Predicate':
+        return cls('Within', *values)
+
+    @classmethod
+    def without(cls, *values: Any) -> 'Predicate':
+        return cls('Without', *values)
+
+    @classmethod
+    def ne(cls, value: Any) -> 'Predicate':
+        return cls('Ne', value)
+
+    @classmethod
+    def regex(cls, pattern: str) -> 'Predicate':
+        return cls('Regex', pattern)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Predicate) and (self.name, self.args) == (
+            other.name, other.args)
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.args))
+
+    def __str__(self) -> str:
+        return "{}({})".format(self.name,
+                               ", ".join(render(arg) for arg in self.args))
+
+    __repr__ = __str__
+
+
+class Raw:
+    """
+    Raw is a gremlin expression that is already rendered (e.g: the value of
+    a filter provided by the user)
+    """
+    def __init__(self, text: str):
+        self.text = text
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Raw) and self.text == other.text
+
+    def __hash__(self) -> int:
+        return hash(self.text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    __repr__ = __str__
+
+
+def render(value: Any) -> str:
+    """
+    Render a step argument. Strings are quoted and escaped
+    """
+    if isinstance(value, (Predicate, Raw)):
+        return str(value)
+    return literal(value)
+
+
+class Step:
+    """
+    Step is a single step of a gremlin traversal, e.g: Has('Type', 'host')
+    """
+    def __init__(self, name: str, *args: Any):
+        self.name = name
+        self.args = args
+
+    def pairs(self) -> Optional[List[Tuple[Any, Any]]]:
+        """
+        Returns the key, value pairs of the step arguments (or None if the
+        number of arguments is odd)
+        """
+        if len(self.args) % 2:
+            return None
+        return list(zip(self.args[::2], self.args[1::2]))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Step) and (self.name, self.args) == (
+            other.name, other.args)
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.args))
+
+    def __str__(self) -> str:
+        return "{}({})".format(self.name,
+                               ", ".join(render(arg) for arg in self.args))
+
+    __repr__ = __str__
+
+
+class Query:
+    """
+    Query is an immutable gremlin traversal. Each method returns a new
+    Query with one more step, so partial traversals can be safely shared
+    and extended, e.g:
+
+        bridges = Query.V().has('Type', 'ovsbridge')
+        ports = bridges.out().has('Type', 'ovsport')
+
+    Traversals are optimized before being rendered (see optimize()) and the
+    rendered strings are cached
+    """
+    def __init__(self, steps: Tuple[Step, ...] = ()):
+        """
+        Query constructor
+        Args:
+            steps: The steps of the traversal
+        """
+        self._steps = steps
+
+    @classmethod
+    def V(cls, *ids: str) -> 'Query':
+        return cls((Step('V', *ids), ))
+
+    @classmethod
+    def E(cls, *ids: str) -> 'Query':
+        return cls((Step('E', *ids), ))
+
+    @classmethod
+    def flows(cls) -> 'Query':
+        return cls((Step('Flows'), ))
+
+    def step(self, name: str, *args: Any) -> 'Query':
+        """
+        Returns a new Query with one more step
+        """
+        return Query(self._steps + (Step(name, *args), ))
+
+    def extend(self, steps: Iterable[Step]) -> 'Query':
+        """
+        Returns a new Query with more steps
+        """
+        return Query(self._steps + tuple(steps))
+
+    def steps(self) -> Tuple[Step, ...]:
+        return self._steps
+
+    def has(self, *args: Any) -> 'Query':
+        return self.step('Has', *args)
+
+    def has_either(self, *args: Any) -> 'Query':
+        return self.step('HasEither', *args)
+
+    def out(self) -> 'Query':
+        return self.step('Out')
+
+    def both(self) -> 'Query':
+        return self.step('Both')
+
+    def out_e(self) -> 'Query':
+        return self.step('OutE')
+
+    def in_e(self) -> 'Query':
+        return self.step('InE')
+
+    def descendants(self) -> 'Query':
+        return self.step('Descendants')
+
+    def subgraph(self) -> 'Query':
+        return self.step('Subgraph')
+
+    def count(self) -> 'Query':
+        return self.step('Count')
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Query) and self._steps == other._steps
+
+    def __hash__(self) -> int:
+        return hash(self._steps)
+
+    def __str__(self) -> str:
+        return render_steps(self._steps)
+
+    __repr__ = __str__
+
+
+@lru_cache(maxsize=1024)
+def render_steps(steps: Tuple[Step, ...]) -> str:
+    """
+    Render (and cache) the optimized form of a traversal
+    """
+    return '.'.join(str(step) for step in optimize(steps))
+
+
+def optimize(steps: Iterable[Step]) -> List[Step]:
+    """
+    Simplify a traversal without changing its result:
+        - A filter step that is identical to the previous step is dropped
+        - Consecutive Has steps are merged into one, unless they constrain
+          the same key with different values
+    """
+    result: List[Step] = []
+    for step in steps:
+        previous = result[-1] if result else None
+        if previous is not None and step == previous and step.name in FILTER_STEPS:
+            continue
+
+        if previous is not None and step.name == 'Has' and previous.name == 'Has':
+            merged = merge_has(previous, step)
+            if merged is not None:
+                result[-1] = merged
+                continue
+
+        result.append(step)
+    return result
+
+
+def merge_has(first: Step, second: Step) -> Optional[Step]:
+    """
+    Merge two consecutive Has steps into one. Returns None if they cannot be
+    merged
+    """
+    pairs = first.pairs()
+    second_pairs = second.pairs()
+    if pairs is None or second_pairs is None:
+        return None
+
+    for key, value in second_pairs:
+        if (key, value) in pairs:
+            continue
+        if key in [k for k, _ in pairs]:
+            return None
+        pairs.append((key, value))
+
+    return Step('Has', *[arg for pair in pairs for arg in pair])
@@ -0,0 +1,234 @@
+import base64
+import gzip
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from skynet.common.memo import normalize
+
+if TYPE_CHECKING:
+    from skydive.rest.client import RESTClient
+
+TOPOLOGY_PATH = '/api/topology'
+
+
+def request_key(method: str, path: str, data: Optional[str]) -> Tuple[str, str, str]:
+    """
+    Returns the key that identifies a request in an archive. Gremlin queries
+    are normalized so formatting differences do not prevent a replay
+    """
+    body = data or ''
+    if method == 'POST' and path == TOPOLOGY_PATH and body:
+        try:
+            body = normalize(json.loads(body)['GremlinQuery'])
+        except (ValueError, KeyError, TypeError):
+            pass
+    return method, path, body
+
+
+class Recorder:
+    """
+    Recorder captures the requests sent through a Skydive RESTClient and
+    their responses into an archive: a gzip-compressed file with one JSON
+    entry per line:
+
+        {"method": "POST", "path": "/api/topology",
+         "data": "{\"GremlinQuery\": \"G.V()...\"}",
+         "status": 200, "seconds": 0.012, "response": [...]}
+
+    Responses that are not JSON are stored base64-encoded ("raw") and
+    failed requests store the error message ("error").
+    Archives are appended to, so several commands can be recorded into the
+    same file
+    """
+    def __init__(self, path: str):
+        """
+        Recorder constructor
+        Args:
+            path: The archive file
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self.entries = 0
+
+    def wrap(self, client: 'RESTClient') -> 'RESTClient':
+        """
+        Record all the requests of a client from now on. Returns the client
+        """
+        from skydive.rest.client import BadRequest
+        request = client.request
+
+        def recorded_request(path: str, method: str = 'GET', data: Optional[str] = None) -> Any:
+            start = time.perf_counter()
+            try:
+                response = request(path, method=method, data=data)
+            except BadRequest as err:
+                message = err.args[0] if err.args else ''
+                if isinstance(message, bytes):
+                    message = message.decode('utf-8', 'replace')
+                self.add(method, path, data, time.perf_counter() - start,
+                         error=str(message))
+                raise
+            self.add(method, path, data, time.perf_counter() - start,
+                     response=response)
+            return response
+
+        setattr(client, 'request', recorded_request)
+        return client
+
+    def add(self,
+            method: str,
+            path: str,
+            data: Optional[str],
+            seconds: float,
+            response: Any = None,
+            error: Optional[str] = None) -> None:
+        """
+        Add an entry to the archive
+        """
+        entry: Dict[str, Any] = {
+            'method': method,
+            'path': path,
+            'data': data,
+            'seconds': round(seconds, 6),
+        }
+        if error is not None:
+            entry.update(status=400, error=error)
+        elif isinstance(response, bytes):
+            entry.update(status=200,
+                         raw=base64.b64encode(response).decode('ascii'))
+        else:
+            entry.update(status=200, response=response)
+
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.entries += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        logging.getLogger("Record").debug(
+            "Recorded {} requests into {}".format(self.entries, self._path))
+
+
+class Archive:
+    """
+    Archive is a recorded archive loaded in memory (see Recorder)
+    If a request was recorded more than once, the last response is replayed
+    """
+    def __init__(self, entries: List[Dict[str, Any]]):
+        """
+        Archive constructor
+        Args:
+            entries: The recorded entries
+        """
+        self._entries = entries
+        self._index = {
+            request_key(entry['method'], entry['path'], entry.get('data')): entry
+            for entry in entries
+        }
+
+    @classmethod
+    def load(cls, path: str) -> 'Archive':
+        """
+        Load an archive file
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            return cls([json.loads(line) for line in archive if line.strip()])
+
+    def entries(self) -> List[Dict[str, Any]]:
+        return self._entries
+
+    def get(self, method: str, path: str,
+            data: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the entry of a request (or None if it was not recorded)
+        """
+        return self._index.get(request_key(method, path, data))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._entries)
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler that answers the requests from an archive
+    """
+    protocol_version = 'HTTP/1.1'
+    server: 'ReplayServer'
+
+    def do_GET(self) -> None:
+        self._replay()
+
+    def do_POST(self) -> None:
+        self._replay()
+
+    def do_DELETE(self) -> None:
+        self._replay()
+
+    def _replay(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(length).decode() if length else None
+        entry = self.server.archive.get(self.command, self.path, data)
+        if entry is None:
+            self.server.misses += 1
+            self._send(404, 'text/plain',
+                       'Not recorded: {} {} {}'.format(
+                           self.command, self.path, data or '').encode())
+            return
+
+        self.server.hits += 1
+        if self.server.delay:
+            time.sleep(entry.get('seconds', 0))
+        if 'error' in entry:
+            self._send(entry.get('status', 400), 'text/plain',
+                       entry['error'].encode())
+        elif 'raw' in entry:
+            self._send(200, 'application/octet-stream',
+                       base64.b64decode(entry['raw']))
+        else:
+            self._send(200, 'application/json',
+                       json.dumps(entry['response']).encode())
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.getLogger("Replay").debug(format % args)
+
+
+class ReplayServer(ThreadingMixIn, HTTPServer):
+    """
+    ReplayServer is a local HTTP server that speaks enough of the Skydive
+    REST API (topology queries and captures) to replay an archive, so
+    skynet can run against it with --api
+    """
+    daemon_threads = True
+
+    def __init__(self, archive: Archive, address: Tuple[str, int],
+                 delay: bool = False):
+        """
+        ReplayServer constructor
+        Args:
+            archive: The archive to replay
+            address: The (host, port) to listen on
+            delay: Whether to reproduce the recorded latency of each request
+        """
+        super(ReplayServer, self).__init__(address, _ReplayHandler)
+        self.archive = archive
+        self.delay = delay
+        self.hits = 0
+        self.misses = 0
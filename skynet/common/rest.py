@@ -0,0 +1,320 @@
+"""
+HTTP transport of the Skydive REST API: the requests go through a pool of
+persistent (keep-alive) connections, so the commands that send many queries
+(e.g: "summary") do not pay the TCP (and TLS) setup for each of them
+"""
+import http.client
+import logging
+import socket
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib import request
+
+from skydive.rest.client import BadRequest, RESTClient
+from skydive.tls import create_ssl_context
+
+from skynet.common import codec
+from skynet.common.profile import profiler
+
+log = logging.getLogger(__name__)
+
+# The read-only (and thus retriable) POST endpoints
+READ_ONLY_PATHS = ['/api/topology']
+# The statuses of an overloaded (or restarting) analyzer
+RETRY_STATUSES = [429, 502, 503, 504]
+
+
+class ConnectionPool:
+    """
+    ConnectionPool keeps the idle connections to an HTTP server for reuse.
+    Connections are handed out to one request at a time: there is no limit on
+    the connections in use (the concurrent queries are bounded by the
+    context, see SkyNetCtxt.slots) but up to size idle ones are kept
+    """
+    def __init__(self, connect: Callable[[], http.client.HTTPConnection],
+                 size: int):
+        """
+        ConnectionPool constructor
+        Args:
+            connect: The function that opens a new connection
+            size: The maximum number of idle connections
+        """
+        self._connect = connect
+        self._size = max(size, 1)
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Returns a connection and whether it is reused (the most recently
+        used idle connection, which is the least likely to be timed out by
+        the server) or new
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        """
+        Give back a connection whose response has been entirely read
+        """
+        with self._lock:
+            if len(self._idle) < self._size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """
+        Close the idle connections
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class PooledResponse:
+    """
+    PooledResponse is the response of a request sent by SkyNetRESTClient. Its
+    body is transparently decompressed and its connection goes back to the
+    pool once the body has been entirely read
+    """
+    def __init__(self, pool: ConnectionPool, conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse, start: float,
+                 stats: Dict[str, int]):
+        """
+        PooledResponse constructor
+        Args:
+            pool: The pool of the connection
+            conn: The connection the request was sent on
+            response: The (unread) HTTP response
+            start: When the request was first sent (see time.perf_counter)
+            stats: The counters of the request (retries, reused...)
+        """
+        self._pool = pool
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._response = response
+        self._start = start
+        self._stats = stats
+        self._bytes = 0
+        self._gzip = None
+        if response.headers.get('Content-Encoding', '') == 'gzip':
+            self._gzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    @property
+    def status(self) -> int:
+        return self._response.status
+
+    @property
+    def headers(self) -> Any:
+        return self._response.headers
+
+    def _read(self, size: int) -> bytes:
+        data = self._response.read() if size < 0 else self._response.read(size)
+        self._bytes += len(data)
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read (up to about size bytes of) the body. Returns b'' at its end
+        Args:
+            size: The size of the (compressed) block to read, -1 to read
+                the whole body
+        """
+        if self._gzip is None:
+            return self._read(size)
+
+        while True:
+            data = self._read(size)
+            if not data:
+                return self._gzip.flush()
+            data = self._gzip.decompress(data)
+            # A block may only hold the gzip header
+            if data:
+                return data
+
+    def close(self) -> None:
+        """
+        Close the response, giving its connection back to the pool if it
+        can be reused
+        """
+        if self._conn is None:
+            return
+
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(self._conn)
+        else:
+            self._response.close()
+            self._conn.close()
+        self._conn = None
+
+        elapsed = time.perf_counter() - self._start
+        profiler().add('http', elapsed, bytes=self._bytes, **self._stats)
+        profiler().latency('http', elapsed)
+
+    def __enter__(self) -> 'PooledResponse':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class SkyNetRESTClient(RESTClient):
+    """
+    SkyNetRESTClient is the Skydive REST client of skynet. It sends the
+    requests as RESTClient does (same endpoint, TLS and authentication) on
+    persistent connections (see ConnectionPool) and asks for compressed
+    responses, which are decoded with the fastest available JSON backend
+    (see codec) or streamed (see stream_lookup).
+    The read-only requests that fail because the analyzer is overloaded
+    (timeout, refused connection or 429/502/503/504 status) are retried a
+    bounded number of times, with an exponential backoff
+    """
+    DEFAULT_RETRIES = 2
+    # The delay before the first retry (doubled for each other one)
+    BACKOFF = 0.5
+    MAX_BACKOFF = 8.0
+
+    def __init__(self,
+                 endpoint: str,
+                 *args: Any,
+                 timeout: Optional[float] = None,
+                 retries: int = DEFAULT_RETRIES,
+                 pool_size: int = 8,
+                 **kwargs: Any):
+        """
+        SkyNetRESTClient constructor
+        Args:
+            endpoint: The Skydive API address
+            args, kwargs: The other arguments of RESTClient (scheme, TLS and
+                authentication)
+            timeout: (optional) The timeout (in seconds) of the connections
+                and of each read, no timeout by default
+            retries: The maximum number of retries of a read-only request
+            pool_size: The maximum number of idle connections to keep
+        """
+        super().__init__(endpoint, *args, **kwargs)
+        self.timeout = timeout
+        self.retries = max(retries, 0)
+        self._pool = ConnectionPool(self._connect, pool_size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        conn: http.client.HTTPConnection
+        if self.scheme == 'https':
+            context = create_ssl_context(self.insecure, self.cafile,
+                                         self.certfile, self.keyfile)
+            conn = http.client.HTTPSConnection(self.endpoint,
+                                               timeout=self.timeout,
+                                               context=context)
+        else:
+            conn = http.client.HTTPConnection(self.endpoint,
+                                              timeout=self.timeout)
+        conn.set_debuglevel(self.debug)
+        return conn
+
+    def _headers(self, req: request.Request) -> Dict[str, str]:
+        # The cookies (e.g: the authentication token) of the request
+        self.auth.cookie_jar.add_cookie_header(req)
+        headers = dict(req.header_items())
+        headers.update({
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip',
+            'Connection': 'keep-alive',
+        })
+        return headers
+
+    def _backoff(self, attempt: int) -> None:
+        delay = min(self.BACKOFF * 2 ** attempt, self.MAX_BACKOFF)
+        log.debug('Retrying the request to %s in %ss', self.endpoint, delay)
+        time.sleep(delay)
+
+    def _send(self, method: str, path: str, body: Optional[bytes],
+              req: request.Request, stats: Dict[str, int],
+              retriable: bool) -> Tuple[http.client.HTTPConnection,
+                                        http.client.HTTPResponse]:
+        """
+        Send a request on a pooled connection. Returns the connection and its
+        (unread) response
+        """
+        while True:
+            conn, reused = self._pool.acquire()
+            stats['reused'] += reused
+            try:
+                conn.request(method, path, body=body, headers=self._headers(req))
+                response = conn.getresponse()
+            except (OSError, http.client.HTTPException) as err:
+                conn.close()
+                # The server may have closed an idle connection: the request
+                # did not reach it, so it can be sent again on a new one
+                if reused and not isinstance(err, socket.timeout):
+                    continue
+                if not retriable or stats['retries'] >= self.retries:
+                    raise
+                log.warning('Request to %s failed: %s', self.endpoint, err)
+            else:
+                if not retriable or stats['retries'] >= self.retries \
+                        or response.status not in RETRY_STATUSES:
+                    return conn, response
+                log.warning('Request to %s failed: %s %s', self.endpoint,
+                            response.status, response.reason)
+                response.read()
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._pool.release(conn)
+            self._backoff(stats['retries'])
+            stats['retries'] += 1
+
+    def open(self, path: str, method: str = 'GET', data: Optional[str] = None) -> Any:
+        """
+        Send a request. Returns the (unread) HTTP response (see
+        PooledResponse)
+        Args:
+            path: The path of the API endpoint
+            method: The HTTP method
+            data: (optional) The body of the request
+        """
+        if self.username and not self.auth.authenticated:
+            self.auth.login()
+
+        url = '{}://{}{}'.format(self.scheme, self.endpoint, path)
+        req = request.Request(url, method=method)
+        retriable = method == 'GET' or path in READ_ONLY_PATHS
+        stats = {'calls': 1, 'retries': 0, 'reused': 0}
+
+        start = time.perf_counter()
+        conn, response = self._send(method, path,
+                                    data.encode() if data is not None else None,
+                                    req, stats, retriable)
+        self.auth.cookie_jar.extract_cookies(response, req)
+
+        resp = PooledResponse(self._pool, conn, response, start, stats)
+        if response.status >= 400:
+            with resp:
+                body = resp.read()
+            self.auth.logout()
+            raise BadRequest(body)
+        return resp
+
+    def request(self, path: str, method: str = 'GET', data: Optional[str] = None) -> Any:
+        with self.open(path, method, data) as resp:
+            body = resp.read()
+            content_type = resp.headers.get('Content-type', '')
+
+        # Skydive < 0.17 does not answer DELETE requests with JSON
+        if method == 'DELETE':
+            return body
+        if content_type.split(';')[0] == 'application/json':
+            return codec.loads(body)
+        return body
+
+    def close(self) -> None:
+        """
+        Close the idle connections
+        """
+        self._pool.close()
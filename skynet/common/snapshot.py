@@ -0,0 +1,380 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy
+
+from skynet.common.graph import Edge, Graph, Node
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+BASIC_COLUMNS = [
+    ('ID', 'string'),
+    ('Host', 'string'),
+    ('Origin', 'string'),
+    ('CreatedAt', 'int64'),
+    ('UpdatedAt', 'int64'),
+    ('DeletedAt', 'int64'),
+    ('Revision', 'int64'),
+]
+"""
+BASIC_COLUMNS are the columns of the keys shared by nodes and edges
+"""
+
+METADATA_COLUMNS = ['Name', 'Manager']
+"""
+METADATA_COLUMNS are the (string) Metadata keys that are also stored as
+columns, so they can be indexed
+"""
+
+INDEXED_COLUMNS = ['Type', 'Host'] + METADATA_COLUMNS
+"""
+INDEXED_COLUMNS are the node columns indexed when a snapshot is loaded
+(besides ID)
+"""
+
+BATCH_SIZE = 65536
+SCHEMA_KEY = b'skynet.snapshot'
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _require_pyarrow() -> None:
+    if pyarrow is None:
+        raise SnapshotError(
+            'Snapshots require pyarrow. Install the snapshot extra: '
+            'pip install skynet[snapshot]')
+
+
+def save(path: str,
+         nodes: List[Node],
+         edges: List[Edge],
+         info: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Save a graph into a snapshot: an Arrow IPC file with one row per node
+    and edge. The basic keys, the Type, some Metadata keys (see
+    METADATA_COLUMNS) and the end nodes of the edges are stored as columns (so they can be indexed without decoding
+    anything) and the Metadata as JSON
+    Args:
+        path: The snapshot file
+        nodes: The nodes of the graph
+        edges: The edges of the graph
+        info: (optional) Information about the snapshot (e.g: the API
+            address and the time it was taken)
+    """
+    _require_pyarrow()
+    info = dict(info or {}, created=time.time(), nodes=len(nodes),
+                edges=len(edges))
+    schema = pyarrow.schema(
+        [(name, getattr(pyarrow, kind)()) for name, kind in BASIC_COLUMNS] + [
+            ('Type', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+        ] + [(name, pyarrow.string()) for name in METADATA_COLUMNS] + [
+            ('Parent', pyarrow.string()),
+            ('Child', pyarrow.string()),
+            ('Metadata', pyarrow.large_string()),
+        ],
+        metadata={SCHEMA_KEY: json.dumps(info)})
+
+    elements = nodes + edges
+    # Edges are told apart from nodes by their Parent, their Type is their
+    # RelationType. IPC files need a single dictionary for all the batches
+    types = [(element.get('Metadata') or {}).get(
+        'RelationType' if 'Parent' in element else 'Type')
+        for element in elements]
+    dictionary = sorted({value for value in types if value is not None})
+    codes = {value: code for code, value in enumerate(dictionary)}
+    type_dictionary = pyarrow.array(dictionary, type=pyarrow.string())
+
+    tmp = path + '.tmp'
+    with pyarrow.OSFile(tmp, 'wb') as sink, pyarrow.ipc.new_file(
+            sink, schema) as writer:
+        for start in range(0, len(elements), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            type_column = pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array([codes.get(value) for value in types[start:end]],
+                              type=pyarrow.int32()), type_dictionary)
+            writer.write_batch(
+                _batch(schema, elements[start:end], type_column))
+    os.replace(tmp, path)
+
+
+def _batch(schema: Any, elements: List[Dict[str, Any]],
+           type_column: Any) -> Any:
+    metadata = [element.get('Metadata') or {} for element in elements]
+    columns = {
+        name: [element.get(name) for element in elements]
+        for name, _ in BASIC_COLUMNS
+    }
+    columns.update({
+        name: [meta.get(name) if isinstance(meta.get(name), str) else None
+               for meta in metadata]
+        for name in METADATA_COLUMNS
+    })
+    columns.update({
+        'Parent': [element.get('Parent') for element in elements],
+        'Child': [element.get('Child') for element in elements],
+        'Metadata': [json.dumps(meta, separators=(',', ':')) for meta in metadata],
+    })
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(columns[field.name], type=field.type)
+         if field.name != 'Type' else type_column for field in schema],
+        schema=schema)
+
+
+class SnapshotGraph(Graph):
+    """
+    SnapshotGraph is a Graph backed by a memory-mapped snapshot file.
+    The indexes (see INDEXED_COLUMNS) and the adjacency lists are built
+    from the columns with Arrow compute functions when the snapshot is
+    loaded: they are arrays of row numbers, no Python object is created
+    per node or edge. The nodes and edges themselves are only decoded (and
+    then kept) when they are accessed, so the commands only pay for the part
+    of the graph they query
+    """
+    def __init__(self, path: str):
+        """
+        SnapshotGraph constructor
+        Args:
+            path: The snapshot file
+        """
+        _require_pyarrow()
+        super(SnapshotGraph, self).__init__()
+        self._source = pyarrow.memory_map(path, 'r')
+        reader = pyarrow.ipc.open_file(self._source)
+        self.info = json.loads(
+            (reader.schema.metadata or {}).get(SCHEMA_KEY, b'{}'))
+        self._table = reader.read_all().unify_dictionaries()
+
+        self._decoded: Dict[int, Dict[str, Any]] = {}
+        # The rows of the nodes whose ID has been looked up or decoded
+        self._rows: Dict[str, int] = {}
+        self._indexes: Dict[str, Tuple[Any, numpy.ndarray, numpy.ndarray]] = {}
+        self._build()
+
+    def _build(self) -> None:
+        # Edges are told apart from nodes by their Parent
+        is_edge = self._table.column('Parent').is_valid()
+        edge_mask = is_edge.to_numpy(zero_copy_only=False)
+        self._node_rows = numpy.flatnonzero(~edge_mask)
+        self._edge_rows = numpy.flatnonzero(edge_mask)
+        self._node_ids = pyarrow.compute.filter(
+            self._table.column('ID'), pyarrow.compute.invert(is_edge)).combine_chunks()
+
+        # The row of the end nodes of each edge (-1 for the nodes and the
+        # unknown ends)
+        self._parents = self._end_rows('Parent')
+        self._children = self._end_rows('Child')
+        self._out_rows = self._adjacency(self._parents)
+        self._in_rows = self._adjacency(self._children)
+
+        for key in INDEXED_COLUMNS:
+            dictionary, codes = self._codes(key)
+            if key == 'Type':
+                # Also the RelationType of the edges
+                self._type_codes = codes
+            self._indexes[key] = self._index(dictionary, codes)
+
+    def _end_rows(self, end: str) -> numpy.ndarray:
+        positions = pyarrow.compute.index_in(
+            self._table.column(end), value_set=self._node_ids)
+        positions = positions.fill_null(-1).to_numpy()
+        return numpy.where(positions >= 0,
+                           self._node_rows[numpy.maximum(positions, 0)], -1)
+
+    def _adjacency(self, ends: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the edge rows sorted by end node row and the offsets of the
+        edges of each row in them
+        """
+        edges = self._edge_rows[ends[self._edge_rows] >= 0]
+        order = edges[numpy.argsort(ends[edges], kind='stable')]
+        offsets = numpy.searchsorted(ends[order],
+                                     numpy.arange(self._table.num_rows + 1))
+        return order, offsets
+
+    def _codes(self, key: str) -> Tuple[Any, numpy.ndarray]:
+        """
+        Returns the dictionary of a column and the code of each row in it
+        (-1 for the missing values)
+        """
+        column = self._table.column(key)
+        if not pyarrow.types.is_dictionary(column.type):
+            column = pyarrow.compute.dictionary_encode(column)
+        column = column.combine_chunks()
+        return column.dictionary, column.indices.fill_null(-1).to_numpy()
+
+    def _index(self, dictionary: Any,
+               codes: numpy.ndarray) -> Tuple[Any, numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the index of the nodes by the value of a column (see _codes):
+        the values, the node rows sorted by value and the offsets of the rows
+        of each value in them
+        """
+        codes = codes[self._node_rows]
+        order = numpy.argsort(codes, kind='stable')
+        offsets = numpy.searchsorted(codes[order],
+                                     numpy.arange(len(dictionary) + 1))
+        return dictionary, self._node_rows[order], offsets
+
+    def _indexed(self, key: str, value: Any) -> numpy.ndarray:
+        """
+        Returns the rows of the nodes whose key has the given value
+        """
+        dictionary, rows, offsets = self._indexes[key]
+        code = pyarrow.compute.index(dictionary, value).as_py()
+        if code < 0:
+            return rows[:0]
+        return rows[offsets[code]:offsets[code + 1]]
+
+    def _row(self, node_id: str) -> Optional[int]:
+        """
+        Returns the row of a node (or None)
+        """
+        row = self._rows.get(node_id)
+        if row is None:
+            position = pyarrow.compute.index(self._node_ids, node_id).as_py()
+            if position < 0:
+                return None
+            row = int(self._node_rows[position])
+            self._rows[node_id] = row
+        return row
+
+    def _value(self, name: str, row: int) -> Any:
+        return self._table.column(name)[row].as_py()
+
+    def _element(self, row: int) -> Dict[str, Any]:
+        """
+        Decode the node or edge of a row
+        """
+        element = self._decoded.get(row)
+        if element is not None:
+            return element
+
+        element = {name: self._value(name, row) for name, _ in BASIC_COLUMNS}
+        parent = self._value('Parent', row)
+        if parent is not None:
+            element['Parent'] = parent
+            element['Child'] = self._value('Child', row)
+        else:
+            self._rows[element['ID']] = row
+        element['Metadata'] = json.loads(self._value('Metadata', row))
+        self._decoded[row] = element
+        return element
+
+    def add_node(self, node: Node) -> None:
+        raise SnapshotError('Snapshots are read-only')
+
+    def add_edge(self, edge: Edge) -> None:
+        raise SnapshotError('Snapshots are read-only')
+
+    def node(self, node_id: str) -> Optional[Node]:
+        row = self._row(node_id)
+        return self._element(row) if row is not None else None
+
+    def nodes(self, node_type: Optional[str] = None) -> List[Node]:
+        rows = self._node_rows if node_type is None else self._indexed(
+            'Type', node_type)
+        return [self._element(row) for row in sorted(rows)]
+
+    def lookup(self, key: str, value: Any) -> Optional[List[str]]:
+        """
+        Returns the IDs of the nodes whose key has the given value.
+        The ID and the INDEXED_COLUMNS of the nodes are indexed
+        """
+        if key == 'ID':
+            return [value] if isinstance(value, str) and self._row(
+                value) is not None else []
+        if key not in self._indexes or not isinstance(value, str):
+            # Only string values are stored in the columns
+            return None
+        rows = self._indexed(key, value)
+        ids = self._table.column('ID').take(pyarrow.array(rows)).to_pylist()
+        self._rows.update(zip(ids, map(int, rows)))
+        return ids
+
+    def edges(self) -> List[Edge]:
+        return [self._element(row) for row in self._edge_rows.tolist()]
+
+    def _adjacent(self, adjacency: Tuple[numpy.ndarray, numpy.ndarray],
+                  end: str, node_id: str) -> numpy.ndarray:
+        """
+        Returns the rows of the edges of a node (see _adjacency)
+        """
+        row = self._row(node_id)
+        if row is None:
+            # The edges of an ID that is not a node are not indexed
+            matches = pyarrow.compute.equal(self._table.column(end), node_id)
+            return numpy.flatnonzero(
+                matches.fill_null(False).to_numpy(zero_copy_only=False))
+        order, offsets = adjacency
+        return order[offsets[row]:offsets[row + 1]]
+
+    def out_edges(self, node_id: str) -> List[Edge]:
+        return [self._element(row)
+                for row in self._adjacent(self._out_rows, 'Parent', node_id)]
+
+    def in_edges(self, node_id: str) -> List[Edge]:
+        return [self._element(row)
+                for row in self._adjacent(self._in_rows, 'Child', node_id)]
+
+    def children(self,
+                 node_id: str,
+                 relation_type: Optional[str] = None,
+                 node_type: Optional[str] = None) -> List[Node]:
+        return self._ends(self._adjacent(self._out_rows, 'Parent', node_id),
+                          self._children,
+                          relation_type, node_type)
+
+    def parents(self,
+                node_id: str,
+                relation_type: Optional[str] = None,
+                node_type: Optional[str] = None) -> List[Node]:
+        return self._ends(self._adjacent(self._in_rows, 'Child', node_id),
+                          self._parents,
+                          relation_type, node_type)
+
+    def _ends(self, rows: numpy.ndarray, ends: numpy.ndarray,
+              relation_type: Optional[str],
+              node_type: Optional[str]) -> List[Node]:
+        """
+        Returns the unique end nodes of some edge rows (in row order). Neither
+        the edges nor the discarded nodes are decoded: the ends, the
+        RelationType and the Type are columns
+        """
+        if relation_type is not None:
+            rows = rows[self._typed(rows, relation_type)]
+        node_rows = numpy.unique(ends[rows])
+        node_rows = node_rows[node_rows >= 0]
+        if node_type is not None:
+            node_rows = node_rows[self._typed(node_rows, node_type)]
+        return [self._element(row) for row in node_rows]
+
+    def _typed(self, rows: numpy.ndarray, value: str) -> numpy.ndarray:
+        """
+        Returns the mask of the rows of the given Type (or RelationType)
+        """
+        code = pyarrow.compute.index(self._indexes['Type'][0], value).as_py()
+        if code < 0:
+            return numpy.zeros(len(rows), dtype=bool)
+        return self._type_codes[rows] == code
+
+    def sizes(self) -> Iterator[Tuple[str, int]]:
+        """
+        Returns the number of nodes of each Type
+        """
+        dictionary, _, offsets = self._indexes['Type']
+        for node_type, count in zip(dictionary.to_pylist(), numpy.diff(offsets)):
+            if count:
+                yield str(node_type), int(count)
+
+    def close(self) -> None:
+        self._table = None
+        self._source.close()
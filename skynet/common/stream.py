@@ -0,0 +1,184 @@
+"""
+Streaming of the Skydive query results: the response body is read in
+fixed-size blocks and the nodes are decoded one by one as they arrive, so
+the whole response (and all of its decoded nodes) never has to be in memory
+at once
+"""
+import codecs
+import json
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterable, Iterator, List, \
+    Optional
+
+if TYPE_CHECKING:
+    from skynet.common.rest import SkyNetRESTClient
+
+WHITESPACE = ' \t\n\r'
+DELIMITERS = ',]}:' + WHITESPACE
+
+
+class StreamError(Exception):
+    pass
+
+
+class _Text:
+    """
+    The decoded part of a document that has not been parsed yet
+    """
+    def __init__(self, blocks: Iterable[bytes]):
+        self._blocks = iter(blocks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """
+        Read the next block. Returns False at the end of the document
+        """
+        if self.eof:
+            return False
+        block = next(self._blocks, None)
+        self.eof = block is None
+        self.buf = self.buf[self.pos:] + self._utf8.decode(
+            block or b'', final=self.eof)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Returns the next character that is not a whitespace ('' at the end
+        of the document)
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        """
+        Decode the next JSON value
+        """
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+                # A number cut at the end of a block (e.g: "2" of "2.5")
+                # is only complete when followed by a delimiter
+                if self.eof or (end < len(self.buf)
+                                and self.buf[end] in DELIMITERS):
+                    self.pos = end
+                    return value
+            except ValueError:
+                # The value is not complete yet
+                if self.eof:
+                    raise StreamError('Invalid JSON value: {}'.format(
+                        self.buf[self.pos:self.pos + 80]))
+            self.fill()
+
+
+def iter_json_array(blocks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Incrementally decode a JSON array, yielding its elements as soon as they
+    are complete
+    Args:
+        blocks: The blocks of the UTF-8 encoded document
+    """
+    decoder = json.JSONDecoder()
+    text = _Text(blocks)
+    if text.peek() != '[':
+        raise StreamError('The response is not a JSON array')
+    text.pos += 1
+    while True:
+        char = text.peek()
+        if char == ']':
+            return
+        if not char:
+            raise StreamError('Truncated JSON array')
+        if char == ',':
+            text.pos += 1
+            continue
+        yield text.decode(decoder)
+
+
+class NodeStream:
+    """
+    NodeStream is an iterator on the nodes (or edges) of a Gremlin query
+    result that is read from an HTTP response
+    """
+    BLOCK_SIZE = 65536
+
+    def __init__(self, response: BinaryIO, block_size: int = BLOCK_SIZE):
+        """
+        NodeStream constructor
+        Args:
+            response: The (unread) HTTP response
+            block_size: The size of the blocks read from the response
+        """
+        self._response = response
+        self._block_size = block_size
+        self.bytes = 0
+        self._nodes = iter_json_array(self._blocks())
+
+    def _blocks(self) -> Iterator[bytes]:
+        while True:
+            block = self._response.read(self._block_size)
+            if not block:
+                return
+            self.bytes += len(block)
+            yield block
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._nodes
+
+    def __next__(self) -> Any:
+        return next(self._nodes)
+
+    def chunks(self, size: int) -> Iterator[List[Any]]:
+        """
+        Returns the nodes in lists of up to size nodes
+        """
+        chunk = []
+        for node in self._nodes:
+            chunk.append(node)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def close(self) -> None:
+        self._response.close()
+
+    def __enter__(self) -> 'NodeStream':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def streamable(client: Any) -> bool:
+    """
+    Returns whether the results of a client can be streamed: it has to be a
+    SkyNetRESTClient whose requests are not intercepted (e.g: recorded)
+    """
+    from skynet.common.rest import SkyNetRESTClient
+    return isinstance(client, SkyNetRESTClient) and 'request' not in vars(client)
+
+
+def stream_lookup(client: 'SkyNetRESTClient', gremlin: str,
+                  block_size: int = NodeStream.BLOCK_SIZE) -> Optional[NodeStream]:
+    """
+    Send a Gremlin query and return its (unread) result as a NodeStream.
+    Returns None if the client cannot stream (see streamable)
+    Args:
+        client: The Skydive REST client
+        gremlin: The Gremlin query
+        block_size: The size of the blocks read from the response
+    """
+    if not streamable(client):
+        return None
+    response = client.open('/api/topology', 'POST',
+                           json.dumps({'GremlinQuery': gremlin}))
+    return NodeStream(response, block_size)
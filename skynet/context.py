@@ -1,21 +1,121 @@
-from typing import Dict, Any
-from skydive.rest.client import RESTClient
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, \
+    Tuple
+
+from skynet.common.cache import QueryCache
+from skynet.common.memo import QueryMemo
+from skynet.common.profile import Profiler, profiling
+
+if TYPE_CHECKING:
+    from skydive.rest.client import RESTClient
 
 
 class SkyNetCtxt():
-    def __init__(self, skydive_conn: str = "localhost:8082"):
+    DEFAULT_JOBS = 8
+    DEFAULT_RETRIES = 2
+
+    def __init__(self,
+                 skydive_conn: str = "localhost:8082",
+                 jobs: int = DEFAULT_JOBS,
+                 timeout: Optional[float] = None,
+                 retries: int = DEFAULT_RETRIES):
         """
         SkyNetCtxt constructor
         TODO: Accept configuration
+        Args:
+            skydive_conn: The Skydive API address
+            jobs: The maximum number of concurrent queries
+            timeout: (optional) The timeout (in seconds) of the Skydive API
+                requests
+            retries: The maximum number of retries of the read-only
+                requests to an overloaded Skydive API
         """
-        self._rest = RESTClient(skydive_conn)
+        self._api = skydive_conn
+        self._timeout = timeout
+        self._retries = retries
+        self._rest: Optional['RESTClient'] = None
+        self._rest_lock = threading.Lock()
+        self._cache = QueryCache()
+        self._memo = QueryMemo()
+        self._jobs = max(jobs, 1)
+        self._slots = threading.BoundedSemaphore(self._jobs)
         self._options: Dict[str, Any] = {}
+        self._profiler = Profiler()
+
+    def api(self) -> str:
+        """
+        Returns the Skydive API address
+        """
+        return self._api
 
-    def rest_cli(self) -> RESTClient:
+    def rest_cli(self) -> 'RESTClient':
         """
-        Returns the Skydive REST API client
+        Returns the Skydive REST API client (created on first use)
         """
-        return self._rest
+        with self._rest_lock:
+            if self._rest is None:
+                from skynet.common.rest import SkyNetRESTClient
+                self._rest = SkyNetRESTClient(self._api,
+                                              timeout=self._timeout,
+                                              retries=self._retries,
+                                              pool_size=self._jobs)
+            return self._rest
+
+    def set_rest_cli(self, rest: 'RESTClient') -> None:
+        """
+        Sets the Skydive REST API client (e.g: to replay recorded responses
+        or to query a local graph)
+        """
+        self._rest = rest
+
+    def cache(self) -> QueryCache:
+        """
+        Returns the on-disk query cache
+        """
+        return self._cache
+
+    def set_cache(self, cache: QueryCache) -> None:
+        """
+        Sets the on-disk query cache
+        """
+        self._cache = cache
+
+    def memo(self) -> QueryMemo:
+        """
+        Returns the query memoization table shared by all the providers
+        """
+        return self._memo
+
+    def slots(self) -> threading.BoundedSemaphore:
+        """
+        Returns the semaphore that bounds the number of concurrent queries
+        """
+        return self._slots
+
+    def profiler(self) -> Profiler:
+        """
+        Returns the profiler of the command
+        """
+        return self._profiler
+
+    def map(self, func: Callable, items: Iterable) -> List[Any]:
+        """
+        Call func on each of the items concurrently (using up to "jobs"
+        threads). The results keep the order of the items
+        """
+        items = list(items)
+        if len(items) <= 1 or self._jobs == 1:
+            return [func(item) for item in items]
+
+        def run(item: Any) -> Any:
+            # The worker threads account to the profiler of the command
+            with profiling(self._profiler):
+                return func(item)
+
+        with ThreadPoolExecutor(
+                max_workers=min(self._jobs, len(items))) as executor:
+            return list(executor.map(run, items))
 
     def options(self) -> Dict[str, Any]:
         """
@@ -28,3 +128,65 @@ class SkyNetCtxt():
         Adds an option to the global dictionary
         """
         self._options[key] = value
+
+
+class SkyNetSession():
+    """
+    SkyNetSession holds the state shared by the commands that a long-running
+    process (see "serve") runs: the REST clients (per Skydive API) and,
+    optionally, a client that answers the queries of its API from a local
+    graph (e.g: a graph mirror). Each command still gets its own SkyNetCtxt
+    (options and query memoization)
+    """
+    def __init__(self,
+                 api: Optional[str] = None,
+                 local_cli: Optional['RESTClient'] = None):
+        """
+        SkyNetSession constructor
+        Args:
+            api: (optional) The Skydive API address answered by local_cli
+            local_cli: (optional) The client that answers the queries of
+                the current topology of api
+        """
+        self._api = api
+        self._local = local_cli
+        self._clients: Dict[Tuple[str, Optional[float], int], 'RESTClient'] = {}
+        self._lock = threading.Lock()
+
+    def context(self,
+                api: str,
+                jobs: int = SkyNetCtxt.DEFAULT_JOBS,
+                live: bool = True,
+                shared: bool = True,
+                timeout: Optional[float] = None,
+                retries: int = SkyNetCtxt.DEFAULT_RETRIES) -> SkyNetCtxt:
+        """
+        Returns a new context for a command
+        Args:
+            api: The Skydive API address
+            jobs: The maximum number of concurrent queries
+            live: Whether the command queries the current topology (and not
+                a point in the past)
+            shared: Whether the command can use the shared clients (e.g: it
+                does not if it records its requests)
+            timeout: (optional) The timeout (in seconds) of the Skydive API
+                requests
+            retries: The maximum number of retries of the read-only
+                requests to an overloaded Skydive API
+        """
+        ctxt = SkyNetCtxt(api, jobs, timeout, retries)
+        if not shared:
+            return ctxt
+        if live and self._local is not None and api == self._api:
+            ctxt.set_rest_cli(self._local)
+            return ctxt
+
+        with self._lock:
+            # The clients (and their connection pools) are shared by the
+            # commands with the same transport options
+            key = (api, timeout, retries)
+            rest = self._clients.get(key)
+            if rest is None:
+                rest = self._clients[key] = ctxt.rest_cli()
+        ctxt.set_rest_cli(rest)
+        return ctxt
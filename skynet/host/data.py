@@ -1,6 +1,7 @@
 from typing import Dict, Any, List
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveDataProvider, SkyDiveData, Metadata, Field
 
 
@@ -43,7 +44,7 @@ class HostDataProvider(SkyDiveDataProvider):
         """
         List Hosts
         """
-        query = "V().Has('Type', 'host')"
+        query = Query.V().has('Type', 'host')
 
-        data = self._run_query(query)
+        data = self._run_query(query, HostData.projection())
         return HostData(data)
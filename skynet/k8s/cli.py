@@ -31,6 +31,9 @@ def listpods(obj: SkyNetCtxt, filter: str) -> None:
 
     \b
     FILTER is a Filter string formatted as "Filter1=Value1,Filter2=Value2,..."
+    Conditions can also be combined with AND, OR, NOT and parentheses and
+    compared with =, !=, <, <=, >, >= and ~ (regex). "Filter=Value1|Value2"
+    matches any of the values and "Filter=First..Last" a range of numbers.
     Supported Filters:
         Namespace   [Namespace]
     """
@@ -97,6 +100,9 @@ def listcontainers(obj: SkyNetCtxt, filter: str) -> None:
 
     \b
     FILTER is a Filter string formatted as "Filter1=Value1,Filter2=Value2,..."
+    Conditions can also be combined with AND, OR, NOT and parentheses and
+    compared with =, !=, <, <=, >, >= and ~ (regex). "Filter=Value1|Value2"
+    matches any of the values and "Filter=First..Last" a range of numbers.
     Supported Filters:
         Namespace   [Namespace]
         Pod         [Pod]
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveDataProvider, SkyDiveData, Metadata, \
     SkyDiveFilter, SkyDiveDataFilter, Field
 from skynet.ovn.lsp.model import LSPData
@@ -12,12 +13,12 @@ class PodData(SkyDiveData):
     Pod Data from Skydive
     """
     METADATA: List[Field] = [
-        Metadata('Type'),
+        Metadata('Type', dtype='category'),
         Metadata('Name'),
-        Metadata('K8s.Namespace', None, 'Namespace'),
-        Metadata('K8s.Status', None, 'Status'),
+        Metadata('K8s.Namespace', None, 'Namespace', 'category'),
+        Metadata('K8s.Status', None, 'Status', 'category'),
         Metadata('K8s.IP', None, 'IP'),
-        Metadata('K8s.Node', None, 'Node'),
+        Metadata('K8s.Node', None, 'Node', 'category'),
         Metadata('K8s.Extra.HostNetwork', None, 'HostNetwork'),
         Metadata('K8s.Extra.Status.HostIP', None, 'HostIP'),
     ]
@@ -33,9 +34,9 @@ class ContainerData(SkyDiveData):
     Container Data from Skydive
     """
     METADATA: List[Field] = [
-        Metadata('Type'),
+        Metadata('Type', dtype='category'),
         Metadata('Name'),
-        Metadata('K8s.Namespace', None, 'Namespace'),
+        Metadata('K8s.Namespace', None, 'Namespace', 'category'),
         Metadata('K8s.Pod', None, 'Pod'),
         Metadata('K8s.Extra.Ports', None, 'Ports'),
     ]
@@ -110,39 +111,34 @@ class K8sProvider(SkyDiveDataProvider):
         """
         List Pods
         """
-        gremlin_filter = filter_obj.generate_gremlin() if filter_obj else ""
-
-        query = "V().Has('Manager', 'k8s', 'Type', 'pod'){filt}".format(
-            filt=gremlin_filter)
-        data = self._run_query(query)
+        query = Query.V().has('Manager', 'k8s', 'Type', 'pod')
+        data = self._run_filtered_query(query, PodData.projection(),
+                                        filter_obj)
         return PodData(data)
 
     def list_containers(self, filter_obj: K8sFilter) -> ContainerData:
         """
         List Containers
         """
-        gremlin_filter = filter_obj.generate_gremlin() if filter_obj else ""
-
-        query = "V().Has('Manager', 'k8s', 'Type', 'container'){filt}".format(
-            filt=gremlin_filter)
-        data = self._run_query(query)
+        query = Query.V().has('Manager', 'k8s', 'Type', 'container')
+        data = self._run_filtered_query(query, ContainerData.projection(),
+                                        filter_obj)
         return ContainerData(data)
 
     def get_pod(self, pod: str) -> Pod:
         """
         Get Pod details
         """
-        query = "V().Has('Manager', 'k8s', 'Type', 'pod', 'ID', '{pod}')".format(
-            pod=pod)
+        query = Query.V().has('Manager', 'k8s', 'Type', 'pod', 'ID', pod)
 
-        pod_data = self._run_query(query)
+        pod_data, pod_out_data = self._run_queries(
+            [query, query.out()],
+            PodData.projection().union(ContainerData.projection()).union(
+                LSPData.projection()))
 
         if len(pod_data) == 0:
             raise Exception('Pod not found')
 
-        query += ".Out()"
-        pod_out_data = self._run_query(query)
-
         container_data = list(
             filter(lambda d: d['Metadata']['Type'] == 'container',
                    pod_out_data))
@@ -154,10 +150,11 @@ class K8sProvider(SkyDiveDataProvider):
         if len(lsp_data) > 0:
             lsp_name = lsp_data[0]['Metadata']['Name']
 
-            veth_query = "V().Has('Type', 'veth', 'ExtID.iface-id', '{iface_id}')".format(
-                iface_id=lsp_name)
+            veth_query = Query.V().has('Type', 'veth', 'ExtID.iface-id',
+                                       lsp_name)
 
-            veth_data = self._run_query(veth_query)
+            veth_data = self._run_query(veth_query,
+                                        OvSIfaceData.projection())
         else:
             veth_data = []
 
@@ -1,17 +1,42 @@
 import click
+import json
 import logging
+import sys
+import time
+from functools import partial
+from typing import Optional
 
-from skynet.context import SkyNetCtxt
-from skynet.ovn.cli import ovncli
-from skynet.ovs.cli import ovscli
-from skynet.node.cli import nodecli
-from skynet.summary import summary
-from skynet.host.cli import hostcli
-from skynet.k8s.cli import k8scli
-from skynet.capture.cli import capturecli
+from skynet.context import SkyNetCtxt, SkyNetSession
+from skynet.common.cache import QueryCache
+from skynet.common.lazy import LazyGroup
+from skynet.common.daemon import command_line
+from skynet.common.profile import Profiler, profiling
 
+COMMANDS = {
+    'cache': ('skynet.cache.cli:cachecli', 'On-disk query cache commands'),
+    'capture': ('skynet.capture.cli:capturecli',
+                'Create and visualize packet captures'),
+    'host': ('skynet.host.cli:hostcli', 'Host commands'),
+    'k8s': ('skynet.k8s.cli:k8scli', 'Kubernetes Commands'),
+    'node': ('skynet.node.cli:nodecli', 'Node commands'),
+    'ovn': ('skynet.ovn.cli:ovncli', 'OVN command'),
+    'ovs': ('skynet.ovs.cli:ovscli', 'OVS command'),
+    'record': ('skynet.record.cli:recordcli',
+               'Recorded Skydive archives commands.'),
+    'serve': ('skynet.serve:serve', 'Run a skynet daemon.'),
+    'snapshot': ('skynet.snapshot.cli:snapshotcli', 'Graph snapshot commands.'),
+    'summary': ('skynet.summary:summary',
+                'Prints a summary of the network configuration'),
+}
+"""
+COMMANDS are the subcommands of skynet. They are imported when they run
+(see LazyGroup)
+"""
 
-@click.group(context_settings=dict(help_option_names=['-h', '--help']))
+
+@click.group(cls=LazyGroup,
+             lazy_commands=COMMANDS,
+             context_settings=dict(help_option_names=['-h', '--help']))
 @click.option(
     '--at',
     help='Specify a time in the past.'
@@ -28,33 +53,212 @@ from skynet.capture.cli import capturecli
               help='Skydive API: IP:PORT.'
               'E.g: localhost:8082, 172.10.10.45:8082',
               default="localhost:8082")
+@click.option('--cache/--no-cache',
+              default=False,
+              envvar='SKYNET_CACHE',
+              help='Use the on-disk query cache (default: disabled).'
+              'Can also be enabled by setting SKYNET_CACHE=1')
+@click.option('--refresh',
+              is_flag=True,
+              help='Do not use cached results but refresh the cache entries')
+@click.option('--cache-ttl',
+              type=float,
+              default=QueryCache.DEFAULT_TTL,
+              show_default=True,
+              help='Time to live (in seconds) of the cache entries. Entries '
+              'of queries with an absolute --at time never expire')
+@click.option('--jobs',
+              '-j',
+              type=int,
+              default=SkyNetCtxt.DEFAULT_JOBS,
+              show_default=True,
+              help='Maximum number of concurrent queries to the Skydive API')
+@click.option('--timeout',
+              type=click.FloatRange(min=0, min_open=True),
+              envvar='SKYNET_TIMEOUT',
+              help='Timeout (in seconds) of the connections to the Skydive '
+              'API and of each read (default: no timeout). Can also be set '
+              'with SKYNET_TIMEOUT')
+@click.option('--retries',
+              type=click.IntRange(min=0),
+              default=SkyNetCtxt.DEFAULT_RETRIES,
+              show_default=True,
+              help='Maximum number of retries (with an exponential backoff) '
+              'of the queries that fail because the Skydive API is '
+              'overloaded (timeout, refused connection, 429/502/503/504 status)')
+@click.option('--chunk-size',
+              type=click.IntRange(min=0),
+              default=0,
+              envvar='SKYNET_CHUNK_SIZE',
+              help='Stream the results of the listing queries and process '
+              'them (projection and filters) in chunks of this many nodes, '
+              'so that huge responses are never buffered whole. Results are '
+              'then not memoized and --cache disables it (default: 0, '
+              'disabled). Can also be set with SKYNET_CHUNK_SIZE')
+@click.option('--profile',
+              is_flag=True,
+              help='Print the time spent in each phase of the command '
+              '(queries, extraction, rendering...) to stderr')
+@click.option('--profile-file',
+              type=click.Path(dir_okay=False),
+              help='Append the profiling report of the command (as a JSON line)'
+              ' to a file. Implies --profile')
+@click.option('--record',
+              type=click.Path(dir_okay=False),
+              help='Record the Skydive requests and responses of the command '
+              'into an archive (gzip-compressed JSON lines). Archives can be '
+              'replayed with "record serve"')
+@click.option('--snapshot',
+              type=click.Path(exists=True, dir_okay=False),
+              help='Answer the queries from a snapshot file (see "snapshot '
+              'save") instead of the Skydive API. --at is ignored')
+@click.option('--mirror',
+              is_flag=True,
+              help='Load the graph once through the Skydive websocket API and '
+              'answer the queries from this in-memory copy. It pays off for '
+              'commands that send many queries')
 @click.pass_context
 def maincli(ctx,
             at: str = None,
             log: str = "INFO",
-            api: str = "localhost:8082"):
+            api: str = "localhost:8082",
+            cache: bool = False,
+            refresh: bool = False,
+            cache_ttl: float = QueryCache.DEFAULT_TTL,
+            jobs: int = SkyNetCtxt.DEFAULT_JOBS,
+            timeout: Optional[float] = None,
+            retries: int = SkyNetCtxt.DEFAULT_RETRIES,
+            chunk_size: int = 0,
+            profile: bool = False,
+            profile_file: Optional[str] = None,
+            record: Optional[str] = None,
+            snapshot: Optional[str] = None,
+            mirror: bool = False):
     """
     Sky Net Utility
     """
-    ctx.obj = SkyNetCtxt(api)
+    daemon = isinstance(ctx.obj, SkyNetSession)
+    if daemon:
+        # Running in a daemon (see "serve")
+        ctx.obj = ctx.obj.context(api,
+                                  jobs,
+                                  live=not at,
+                                  shared=not record,
+                                  timeout=timeout,
+                                  retries=retries)
+    else:
+        ctx.obj = SkyNetCtxt(api, jobs, timeout, retries)
+    if profile or profile_file:
+        start_profile(ctx, profile_file, trace_memory=not daemon)
     if at:
         ctx.obj.set_option("at", at)
 
+    ctx.obj.set_cache(QueryCache(ttl=cache_ttl))
+    ctx.obj.set_option("cache", cache or refresh)
+    ctx.obj.set_option("refresh", refresh)
+    ctx.obj.set_option("chunk_size", chunk_size)
+
+    if snapshot or mirror:
+        set_local_source(ctx, snapshot, mirror, record, at)
+
+    if record:
+        from skynet.common.record import Recorder
+        recorder = Recorder(record)
+        recorder.wrap(ctx.obj.rest_cli())
+        ctx.call_on_close(recorder.close)
+
     if log:
         logging.basicConfig(level=log)
 
+    ctx.call_on_close(partial(report_memo, ctx.obj))
+
+
+def set_local_source(ctx,
+                     snapshot: Optional[str] = None,
+                     mirror: bool = False,
+                     record: Optional[str] = None,
+                     at: Optional[str] = None) -> None:
+    """
+    Answer the queries of the command from a local graph: a snapshot file
+    or an in-memory mirror of the live graph
+    Args:
+        ctx: The click context
+        snapshot: The snapshot file
+        mirror: Whether to mirror the graph of the Skydive API
+        record: The --record option, which needs the Skydive API
+        at: The --at option, which --snapshot ignores
+    """
+    if snapshot and mirror:
+        raise click.UsageError('--mirror cannot be used with --snapshot')
+    if record:
+        raise click.UsageError('--record cannot be used with --{}'.format(
+            'snapshot' if snapshot else 'mirror'))
+    if mirror and at:
+        raise click.UsageError('--at cannot be used with --mirror')
+
+    if snapshot:
+        from skynet.common.gremlin import LocalClient
+        from skynet.common.snapshot import SnapshotError, SnapshotGraph
+        try:
+            graph = SnapshotGraph(snapshot)
+        except SnapshotError as err:
+            raise click.UsageError(str(err))
+        ctx.obj.set_rest_cli(LocalClient(graph))
+        ctx.call_on_close(graph.close)
+    else:
+        from skynet.common.mirror import GraphMirror, MirrorClient
+        graph_mirror = GraphMirror(ctx.obj.api()).start()
+        ctx.call_on_close(graph_mirror.stop)
+        if not graph_mirror.wait():
+            raise click.UsageError(
+                'Cannot load the graph from {}'.format(ctx.obj.api()))
+        ctx.obj.set_rest_cli(MirrorClient(graph_mirror))
+    ctx.obj.set_option("cache", False)
+
+
+def report_memo(obj: SkyNetCtxt) -> None:
+    """
+    Report how many Skydive round-trips were saved by the query memoization
+    """
+    memo = obj.memo()
+    logging.getLogger("Memo").debug(
+        "{} queries, {} round-trips saved".format(memo.queries, memo.saved))
+
+
+def start_profile(ctx,
+                  profile_file: Optional[str] = None,
+                  trace_memory: bool = True) -> None:
+    """
+    Start the profiler of the command and bind it to the current thread
+    until the results are reported
+    Args:
+        ctx: The click context
+        profile_file: (optional) The file to append the report to
+        trace_memory: Whether to trace the peak memory usage (the daemon
+            runs commands concurrently, so it does not)
+    """
+    prof = ctx.obj.profiler()
+    prof.start(trace_memory=trace_memory)
+    ctx.with_resource(profiling(prof))
+    ctx.call_on_close(partial(report_profile, prof, profile_file))
+
+
+def report_profile(prof: Profiler, profile_file: Optional[str] = None) -> None:
+    """
+    Report the profiling results to stderr or to the given file
+    """
+    report = prof.stop()
+    if profile_file:
+        report['command'] = command_line()
+        report['timestamp'] = time.time()
+        with open(profile_file, 'a') as trace:
+            trace.write(json.dumps(report) + '\n')
+    else:
+        print(Profiler.format_report(report), file=sys.stderr)
+
 
 def main():
     """
     Main Function
     """
     maincli()
-
-
-maincli.add_command(ovncli)
-maincli.add_command(ovscli)
-maincli.add_command(nodecli)
-maincli.add_command(hostcli)
-maincli.add_command(summary)
-maincli.add_command(k8scli)
-maincli.add_command(capturecli)
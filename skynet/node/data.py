@@ -1,6 +1,7 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveData, Metadata, Field, \
     SkyDiveDataProvider
 
@@ -42,7 +43,7 @@ class NodeProvider(SkyDiveDataProvider):
         """
         List Kubernetes Nodes
         """
-        query = "V().Has('Type', 'node')"
+        query = Query.V().has('Type', 'node')
 
-        data = self._run_query(query)
+        data = self._run_query(query, NodeData.projection())
         return NodeData(data)
@@ -1,17 +1,18 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveData, Field, Metadata, \
     SkyDiveDataProvider
 
 
 class ACLData(SkyDiveData):
     METADATA: List[Field] = [
-        Metadata('Type'),
+        Metadata('Type', dtype='category'),
         Metadata('Name'),
-        Metadata('OVN.Action', None, 'Action'),
+        Metadata('OVN.Action', None, 'Action', 'category'),
         Metadata('OVN.Match', None, 'Match'),
-        Metadata('OVN.Direction', None, 'Direction'),
+        Metadata('OVN.Direction', None, 'Direction', 'category'),
     ]
     """
     ACLData represents Logical Router Data
@@ -36,7 +37,7 @@ class ACLProvider(SkyDiveDataProvider):
         super(ACLProvider, self).__init__(ctxt=ctxt)
 
     def list(self) -> ACLData:
-        query = "V().Has('Type', 'acl')"
-        data = self._run_query(query)
+        query = Query.V().has('Type', 'acl')
+        data = self._run_query(query, ACLData.projection())
 
         return ACLData(data)
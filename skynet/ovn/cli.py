@@ -1,18 +1,26 @@
 import click
-from graphviz import Digraph
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any
 
 from skynet.context import SkyNetCtxt
-from skynet.ovn.lr.cli import lrcli
-from skynet.ovn.ls.cli import lscli
-from skynet.ovn.acl.cli import aclcli
-from skynet.ovn.lrp.cli import lrpcli
-from skynet.ovn.lsp.cli import lspcli
-from skynet.ovn.datapath.cli import datapathcli
-from skynet.ovn.lflow.cli import lflowcli
+from skynet.common.graph import Graph
+from skynet.common.lazy import LazyGroup
 
+if TYPE_CHECKING:
+    from graphviz import Digraph
 
-@click.group(name='ovn')
+COMMANDS = {
+    'acl': ('skynet.ovn.acl.cli:aclcli', 'ACLs commands'),
+    'datapath': ('skynet.ovn.datapath.cli:datapathcli',
+                 'Datapath Binding commands'),
+    'lflow': ('skynet.ovn.lflow.cli:lflowcli', 'Logical Flow commands'),
+    'lr': ('skynet.ovn.lr.cli:lrcli', 'Logical Router commands'),
+    'lrp': ('skynet.ovn.lrp.cli:lrpcli', 'Logical Router Ports commands'),
+    'ls': ('skynet.ovn.ls.cli:lscli', 'Logical Switch commands'),
+    'lsp': ('skynet.ovn.lsp.cli:lspcli', 'Logical Switch Ports commands'),
+}
+
+
+@click.group(name='ovn', cls=LazyGroup, lazy_commands=COMMANDS)
 @click.pass_obj
 def ovncli(obj: SkyNetCtxt) -> None:
     """
@@ -41,13 +49,15 @@ def topology(obj: SkyNetCtxt, namespace: str) -> None:
     print(dot)
 
 
-def topo2dot(name: str, graph: Dict[str, List[Any]]) -> Digraph:
+def topo2dot(name: str, graph: Dict[str, List[Any]]) -> 'Digraph':
     """
     Transform a topology graph into a Digraph object
     """
+    from graphviz import Digraph
     dot = Digraph(name=name)
+    index = Graph.from_subgraph(graph)
 
-    for node in graph.get('Nodes') or []:
+    for node in index.nodes():
         attr = {}
         if node['Metadata']['Type'] == 'logical_router':
             attr['shape'] = 'box'
@@ -66,16 +76,7 @@ def topo2dot(name: str, graph: Dict[str, List[Any]]) -> Digraph:
 
         dot.node(node['ID'], label, **attr)
 
-    for edge in graph.get('Edges') or []:
+    for edge in index.edges():
         dot.edge(edge['Parent'], edge['Child'])
 
     return dot
-
-
-ovncli.add_command(lrcli)
-ovncli.add_command(lscli)
-ovncli.add_command(aclcli)
-ovncli.add_command(lrpcli)
-ovncli.add_command(lspcli)
-ovncli.add_command(datapathcli)
-ovncli.add_command(lflowcli)
@@ -21,6 +21,9 @@ def list(obj: SkyNetCtxt, filter: str) -> None:
 
     \b
     FILTER is a Filter string formatted as "Filter1=Value1,Filter2=Value2,..."
+    Conditions can also be combined with AND, OR, NOT and parentheses and
+    compared with =, !=, <, <=, >, >= and ~ (regex). "Filter=Value1|Value2"
+    matches any of the values and "Filter=First..Last" a range of numbers.
     Supported Filters:
         TunnelKey   [TunnelKey] (tunnel key integer)
         Router      [UUID] (uuid of the logical router)
@@ -1,7 +1,8 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
-from skynet.common.data import SkyDiveData, Field, Metadata, \
+from skynet.common.query import Query
+from skynet.common.data import SkyDiveData, Field, Metadata, Nested, \
     SkyDiveDataProvider, SkyDiveFilter, SkyDiveDataFilter
 
 
@@ -9,12 +10,14 @@ class DatapathData(SkyDiveData):
     METADATA: List[Field] = [
         Metadata('Type'),
         Metadata('Name'),
-        Metadata('OVN.TunnelKey', None, 'TunnelKey'),
+        Metadata('OVN.TunnelKey', None, 'TunnelKey', 'Int32'),
         Metadata('OVN.ExtID', None, 'ExtID'),
     ]
     """
     DatapathData represents Datapath Binding Data
     """
+    NESTED: List[Nested] = [Nested('ExtID')]
+
     def __init__(self, data: List[Dict[str, Any]]):
         """
         DatapathData constructor
@@ -50,9 +53,7 @@ class DatapathProvider(SkyDiveDataProvider):
         super(DatapathProvider, self).__init__(ctxt=ctxt)
 
     def list(self, filter_obj: DatapathFilter) -> DatapathData:
-        gremlin_filter = filter_obj.generate_gremlin() if filter_obj else ""
-
-        query = "V().Has('Type', 'datapath_binding'){filt}".format(
-            filt=gremlin_filter)
-        data = self._run_query(query)
+        query = Query.V().has('Type', 'datapath_binding')
+        data = self._run_filtered_query(query, DatapathData.projection(),
+                                        filter_obj)
         return DatapathData(data)
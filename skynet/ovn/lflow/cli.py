@@ -28,6 +28,9 @@ def list(obj: SkyNetCtxt, filter: str = "", format: str = "table") -> None:
 
     \b
     FILTER is a Filter string formatted as "Filter1=Value1,Filter2=Value2,..."
+    Conditions can also be combined with AND, OR, NOT and parentheses and
+    compared with =, !=, <, <=, >, >= and ~ (regex). "Filter=Value1|Value2"
+    matches any of the values and "Filter=First..Last" a range of numbers.
     Supported Filters:
         Datapath    [datapath] (full or first 8bytes)
         Table       [tableNum] (table number)
@@ -48,9 +51,10 @@ def list(obj: SkyNetCtxt, filter: str = "", format: str = "table") -> None:
 
     if not flow_data.is_empty():
         if not format or format == "table":
-            print(flow_data.data().to_string(columns=colunns_to_print,
-                                             justify="left",
-                                             max_colwidth=60))
+            print(
+                flow_data.data(colunns_to_print).to_string(
+                    columns=colunns_to_print, justify="left",
+                    max_colwidth=60))
         elif format == "text":
             sp = SeriesPrinter()
             for _, series in flow_data.data().iterrows():
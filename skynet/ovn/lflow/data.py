@@ -1,27 +1,31 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveData, Field, Metadata, \
     SkyDiveDataProvider, SkyDiveFilter, SkyDiveDataFilter
 
 
 class LFlowData(SkyDiveData):
     METADATA: List[Field] = [
-        Metadata('Type'),
+        Metadata('Type', dtype='category'),
         Metadata('Name'),
         Metadata('OVN.LFActions', None, 'Actions'),
         Metadata('OVN.LFMatch', None, 'Match'),
-        Metadata('OVN.LFPriority', None, 'Priority'),
-        Metadata('OVN.Pipeline', None, 'Pipeline'),
-        Metadata('OVN.Table', None, 'Table'),
-        Metadata('OVN.ExtID.stage-name', None, 'Stage'),
-        Metadata('OVN.ExtID.source', None, 'Source'),
+        Metadata('OVN.LFPriority', None, 'Priority', 'Int32'),
+        Metadata('OVN.Pipeline', None, 'Pipeline', 'category'),
+        Metadata('OVN.Table', None, 'Table', 'Int16'),
+        Metadata('OVN.ExtID.stage-name', None, 'Stage', 'category'),
+        Metadata('OVN.ExtID.source', None, 'Source', 'category'),
         Metadata('OVN.LogicalDataPath', lambda x: x[0:8]
-                 if x and len(x) > 0 else None, 'Datapath'),
+                 if x and len(x) > 0 else None, 'Datapath', 'category'),
     ]
     """
     LFlowData represents Logical Flow Data
     """
+    SORT_BY = ['Datapath', 'Pipeline', 'Table', 'Priority']
+    SORT_ASCENDING = [True, True, True, False]
+
     def __init__(self, data: List[Dict[str, Any]]):
         """
         LFlowData constructor
@@ -29,11 +33,6 @@ class LFlowData(SkyDiveData):
         super(LFlowData, self).__init__(data=data,
                                         meta=self.METADATA,
                                         index="Name")
-        if not self.is_empty():
-            self._data.sort_values(
-                by=['Datapath', 'Pipeline', 'Table', 'Priority'],
-                ascending=[True, True, True, False],
-                inplace=True)
 
 
 class LFlowFilter(SkyDiveDataFilter):
@@ -63,8 +62,7 @@ class LFlowProvider(SkyDiveDataProvider):
         super(LFlowProvider, self).__init__(ctxt=ctxt)
 
     def list(self, filter_obj: LFlowFilter = None) -> LFlowData:
-        gremlin_filter = filter_obj.generate_gremlin() if filter_obj else ""
-        query = "V().Has('Type', 'logical_flow'){filt}".format(
-            filt=gremlin_filter)
-        data = self._run_query(query)
+        query = Query.V().has('Type', 'logical_flow')
+        data = self._run_filtered_query(query, LFlowData.projection(),
+                                        filter_obj)
         return LFlowData(data)
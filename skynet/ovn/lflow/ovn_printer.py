@@ -1,5 +1,6 @@
 import pandas
 from skynet.ovn.lflow.data import LFlowData
+from skynet.common.profile import profiled
 
 
 class OVNFLowPrinter():
@@ -49,6 +50,7 @@ class OVNFLowPrinter():
         """
         print(self.fformat(flow))
 
+    @profiled('render')
     def fprint_all(self, flows: LFlowData) -> None:
         """
         Print all the flows in OVN format
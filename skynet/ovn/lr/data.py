@@ -1,6 +1,7 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveData, Field, Metadata, \
     SkyDiveDataProvider
 
@@ -36,6 +37,6 @@ class LRProvider(SkyDiveDataProvider):
         super(LRProvider, self).__init__(ctxt=ctxt)
 
     def list(self) -> LRData:
-        query = "V().Has('Type', 'logical_router')"
-        data = self._run_query(query)
+        query = Query.V().has('Type', 'logical_router')
+        data = self._run_query(query, LRData.projection())
         return LRData(data)
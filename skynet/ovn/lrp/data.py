@@ -1,6 +1,7 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveData, Field, \
     Metadata, SkyDiveDataProvider
 
@@ -42,12 +43,12 @@ class LRPProvider(SkyDiveDataProvider):
         Args:
             switch: (optional) specify a switch
         """
-        query = "V()"
+        query = Query.V()
 
         if router:
-            query += ".Has('Type', 'logical_router').HasEither('UUID', '{router}', 'Name', '{router}').Out()".format(
-                router=router)
+            query = query.has('Type', 'logical_router').has_either(
+                'UUID', router, 'Name', router).out()
 
-        query += ".Has('Type', 'logical_router_port')"
-        data = self._run_query(query)
+        query = query.has('Type', 'logical_router_port')
+        data = self._run_query(query, LRPData.projection())
         return LRPData(data)
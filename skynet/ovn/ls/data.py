@@ -1,6 +1,7 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveData, Field, \
     Metadata, SkyDiveDataProvider
 
@@ -35,6 +36,6 @@ class LSProvider(SkyDiveDataProvider):
         super(LSProvider, self).__init__(ctxt=ctxt)
 
     def list(self) -> LSData:
-        query = "V().Has('Type', 'logical_switch')"
-        data = self._run_query(query)
+        query = Query.V().has('Type', 'logical_switch')
+        data = self._run_query(query, LSData.projection())
         return LSData(data)
@@ -1,6 +1,7 @@
 from typing import Dict, List, Any
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveDataProvider
 from skynet.ovn.lsp.model import LSPData
 from skynet.ovn.ls.data import LSData
@@ -78,28 +79,28 @@ class LSPProvider(SkyDiveDataProvider):
         Args:
             switch: (optional) specify a switch
         """
-        query = "V()"
+        query = Query.V()
 
         if switch:
-            query += ".Has('Type', 'logical_switch').HasEither('UUID', '{switch}', 'Name', '{switch}').Out()".format(
-                switch=switch)
+            query = query.has('Type', 'logical_switch').has_either(
+                'UUID', switch, 'Name', switch).out()
 
-        query += ".Has('Type', 'logical_switch_port')"
-        data = self._run_query(query)
+        query = query.has('Type', 'logical_switch_port')
+        data = self._run_query(query, LSPData.projection())
         return LSPData(data)
 
     def get(self, lsp: str) -> LogicalSwitchPort:
         """
         Get a Logical Switch Port from uuid
         """
-        query = "V().Has('Type', 'logical_switch_port', 'UUID', '{lsp}')".format(
-            lsp=lsp)
-        lsp_data = self._run_query(query)
+        query = Query.V().has('Type', 'logical_switch_port', 'UUID', lsp)
+        lsp_data, both_data = self._run_queries(
+            [query, query.both()],
+            LSPData.projection().union(LSData.projection()).union(
+                LRPData.projection()).union(PodData.projection()).union(
+                    OvSIfaceData.projection()))
 
         if len(lsp_data) == 0:
             raise Exception('Logical Switch Port not found')
 
-        query += ".Both()"
-        both_data = self._run_query(query)
-
         return LogicalSwitchPort(lsp_data, both_data)
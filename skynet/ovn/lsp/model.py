@@ -1,6 +1,6 @@
 from typing import Dict, List, Any
 
-from skynet.common.data import SkyDiveData, Metadata, Field
+from skynet.common.data import SkyDiveData, Metadata, Field, Nested
 
 
 class LSPData(SkyDiveData):
@@ -16,6 +16,12 @@ class LSPData(SkyDiveData):
     """
     LSPData represents Logical Switch Port Data
     """
+    NESTED: List[Nested] = [
+        Nested('Options'),
+        Nested('Addresses', ['Address']),
+        Nested('ExtID'),
+    ]
+
     def __init__(self, data: List[Dict[str, Any]]):
         """
         LSPData constructor
@@ -1,8 +1,9 @@
 import click
 import textwrap
+from typing import Tuple
 
 from skynet.context import SkyNetCtxt
-from skynet.ovs.bridge.data import OvSDataProvider
+from skynet.ovs.bridge.data import OvSDataProvider, OvSBridge
 
 
 @click.group(name='bridge')
@@ -36,6 +37,30 @@ def get_bridge(obj: SkyNetCtxt, bridge: str) -> None:
     """
     Get detail information from a bridge
     """
+    print_bridge(OvSDataProvider(obj).get_bridge(bridge))
+
+
+@bridgecli.command(name='dump')
+@click.option('-h',
+              '--host',
+              'hosts',
+              multiple=True,
+              help='Only dump the OvS Bridges on a host (can be repeated)'
+              '(Either name or UUID are acceptable values)')
+@click.pass_obj
+def dump(obj: SkyNetCtxt, hosts: Tuple[str, ...]) -> None:
+    """
+    Get detail information from all the bridges (of some hosts)
+    """
+    for ovsbridge in OvSDataProvider(obj).get_bridges(
+            [host for host in hosts] if hosts else None):
+        print_bridge(ovsbridge)
+
+
+def print_bridge(ovsbridge: OvSBridge) -> None:
+    """
+    Print the detail information of a bridge
+    """
     iface_info = {
         'internal': ['Type', 'Name', 'OfPort', 'IPV4'],
         'patch': ['Type', 'Name', 'OfPort', 'Peer', 'LocalPort'],
@@ -50,12 +75,11 @@ def get_bridge(obj: SkyNetCtxt, bridge: str) -> None:
     }
     indent_str = ' '
 
-    ovsbridge = OvSDataProvider(obj).get_bridge(bridge)
-    print(ovsbridge.bridge.data()[['Name', 'BridgeID']].iloc[0])
+    print(ovsbridge.bridge.data(['Name', 'BridgeID']).iloc[0])
     print("Ports:")
     for port in ovsbridge.ports:
         print(
-            textwrap.indent(port.port.data()[['Name']].iloc[0].to_string(),
+            textwrap.indent(port.port.data(['Name']).iloc[0].to_string(),
                             indent_str * 4))
         print(textwrap.indent("Interfaces:", indent_str * 4))
 
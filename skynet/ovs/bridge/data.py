@@ -1,8 +1,10 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 
 from skynet.context import SkyNetCtxt
+from skynet.common.graph import Graph
+from skynet.common.query import Predicate, Query
 from skynet.common.data import SkyDiveDataProvider, SkyDiveData, \
-    Metadata, Field
+    Metadata, Field, Nested, Projection
 
 
 class OvSBridgeData(SkyDiveData):
@@ -16,6 +18,7 @@ class OvSBridgeData(SkyDiveData):
         Metadata('ExtID.bridge-uplink', None, 'BridgeUplink'),
         Metadata('ExtID', None, 'ExtID'),
     ]
+    NESTED: List[Nested] = [Nested('ExtID')]
 
     def __init__(self, data: List[Dict[str, Any]]):
         """
@@ -57,6 +60,7 @@ class OvSPortData(SkyDiveData):
         Metadata('ExtID'),
         Metadata('ExtID.ovn-chassis-id', None, 'ChassisID'),
     ]
+    NESTED: List[Nested] = [Nested('ExtID')]
 
     def __init__(self, data: List[Dict[str, Any]]):
         """
@@ -77,7 +81,7 @@ class OvSIfaceData(SkyDiveData):
         Metadata('ExtID'),
         Metadata('MAC'),
         Metadata('Ovs'),
-        Metadata('OfPort'),
+        Metadata('OfPort', dtype='Int32'),
     ]
     PATCH_METADATA: List[Field] = [
         Metadata('Ovs.Options.peer', None, "Peer"),
@@ -122,13 +126,15 @@ class OvSIfaceData(SkyDiveData):
         Metadata('ExtID.sandbox', None, 'Sandbox'),
         Metadata('ExtID.iface-id', None, 'IfaceID')
     ]
+    NESTED: List[Nested] = [Nested('ExtID'), Nested('Options')]
 
     def __init__(self, data: List[Dict[str, Any]]):
         """
         OvSIfaceData constructor from skydive data
         """
         # Assume all interfaces are the same type
-        meta = self.COMMON_METADATA
+        # Build a new list so the class-level lists are not modified
+        meta = list(self.COMMON_METADATA)
         if len(data) > 0:
             iface_type = data[0]['Metadata']['Type']
             if iface_type == "patch":
@@ -144,16 +150,23 @@ class OvSIfaceData(SkyDiveData):
 
         super(OvSIfaceData, self).__init__(data=data, meta=meta, index="ID")
 
+    @classmethod
+    def projection(cls) -> Projection:
+        """
+        Returns the Projection of the raw data of all interface types
+        """
+        return Projection.from_fields(
+            cls.BASIC_FIELDS, cls.COMMON_METADATA + cls.PATCH_METADATA +
+            cls.GENEVE_METADATA + cls.INTERNAL_METADATA + cls.VETH_METADATA)
+
 
 def find_childs(parent: str, data: List[Dict[str, Any]],
                 edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Given a list of Nodes and Edges, find the children of a specific Node
+    To find the children of many nodes, build a Graph once instead
     """
-    out_edges = list(filter(lambda e: e['Parent'] == parent, edges))
-    return list(
-        filter(lambda d: d['ID'] in [edge['Child'] for edge in out_edges],
-               data))
+    return Graph(data, edges).children(parent)
 
 
 class OvSPort():
@@ -194,7 +207,9 @@ class OvSBridge():
         bridge: The bridge information (OvSBridgeData)
         ports: The port information (List of OvSPort)
     """
-    def __init__(self, graph: Dict[str, List[Dict[str, Any]]]):
+    def __init__(self,
+                 graph: Union[Dict[str, List[Dict[str, Any]]], Graph],
+                 bridge: Optional[str] = None):
         """
         It is expected to receive an ovs bridge and all its descendents as a subgraph
         The output of:
@@ -202,21 +217,40 @@ class OvSBridge():
         G.V('61f44ac8-c5e3-457b-64dc-c7dbf0a7c1a5').Descendants().HasEither('Type', 'ovsport','Type', 'ovsbridge').OutE().Has('RelationType', 'layer2').Subgraph()
 
         should be enough to build this.
-        """
 
-        self._bridge = OvSBridgeData([
-            next(
-                filter(lambda d: d['Metadata']['Type'] == 'ovsbridge',
-                       graph['Nodes']))
-        ])
-
-        self._ports: List[OvSPort] = []
-        for port in filter(lambda d: d['Metadata']['Type'] == 'ovsport',
-                           graph['Nodes']):
-            port_data = [port]
-            childs = find_childs(port['ID'], graph['Nodes'], graph['Edges'])
-            port_data.extend(childs)
-            self._ports.append(OvSPort(port_data))
+        Args:
+            graph: The subgraph (or its Graph index)
+            bridge: (optional) The ID of the bridge to build if the subgraph
+                contains more than one bridge
+        """
+        index = graph if isinstance(graph, Graph) else Graph.from_subgraph(graph)
+        bridges = index.nodes('ovsbridge')
+        if bridge is not None:
+            bridges = [node for node in bridges if node['ID'] == bridge]
+        if not bridges:
+            raise Exception('Bridge not found in %s' % str(graph))
+
+        self._bridge = OvSBridgeData(bridges[:1])
+
+        if len(index.nodes('ovsbridge')) == 1:
+            ports = index.nodes('ovsport')
+        else:
+            ports = [
+                node for node in index.children(bridges[0]['ID'], 'layer2')
+                if Graph.node_type(node) == 'ovsport'
+            ]
+
+        self._ports: List[OvSPort] = [
+            OvSPort([port] + index.children(port['ID'])) for port in ports
+        ]
+
+    @classmethod
+    def split(cls, graph: Dict[str, List[Dict[str, Any]]]) -> List['OvSBridge']:
+        """
+        Build an OvSBridge for each of the bridges of a subgraph
+        """
+        index = Graph.from_subgraph(graph)
+        return [cls(index, node['ID']) for node in index.nodes('ovsbridge')]
 
     @property
     def bridge(self) -> OvSBridgeData:
@@ -238,37 +272,33 @@ class OvSDataProvider(SkyDiveDataProvider):
         """
         List all the bridges by name or ID
         """
-        query = "V()"
+        query = Query.V()
 
         if bridge:
-            query += ".Has('Type', 'ovsbridge').HasEither('ID', '{bridge}', 'Name', '{bridge}').Out()".format(
-                bridge=bridge)
+            query = query.has('Type', 'ovsbridge').has_either(
+                'ID', bridge, 'Name', bridge).out()
 
-        query += ".Has('Type', 'ovsport')"
+        query = query.has('Type', 'ovsport')
 
-        data = self._run_query(query)
+        data = self._run_query(query, OvSPortData.projection())
         return OvSPortData(data)
 
     def get_port(self, port: str) -> OvSPort:
         """
         Get port from detail from ID
         """
-        query = "V('{}')".format(port)
+        query = Query.V(port).descendants()
 
-        query += ".Descendants()"
-
-        data = self._run_query(query)
+        data = self._run_query(
+            query,
+            OvSPortData.projection().union(OvSIfaceData.projection()))
         return OvSPort(data)
 
     def get_bridge(self, bridge: str) -> OvSBridge:
         """
         Get port detail from UID
         """
-        query = "V('{}')".format(bridge)
-
-        query += ".Descendants().HasEither('Type', 'ovsport','Type', 'ovsbridge').OutE().Has('RelationType', 'layer2').Subgraph()"
-
-        data = self._run_query(query)
+        data = self._run_query(self._bridge_subgraph(Query.V(bridge)))
         if len(data) == 0:
             raise Exception('Bridge not found %s' % bridge)
 
@@ -278,45 +308,149 @@ class OvSDataProvider(SkyDiveDataProvider):
         """
         List all bridges from given host
         """
-        query = "V()"
+        query = Query.V()
 
         if host:
-            query += ".Has('Type', 'host').HasEither('ID', '{host}', 'Name', '{host}').Out()".format(
-                host=host)
+            query = query.has('Type', 'host').has_either('ID', host, 'Name',
+                                                         host).out()
 
-        query += ".Has('Type', 'ovsbridge')"
+        query = query.has('Type', 'ovsbridge')
 
-        data = self._run_query(query)
+        data = self._run_query(query, OvSBridgeData.projection())
         return OvSBridgeData(data)
 
-    def get_bridges_by_host(self, host: str) -> List[OvSBridge]:
+    def get_bridges(self, hosts: Optional[List[str]] = None) -> List[OvSBridge]:
         """
-        Get Bridge detail by host
+        Get the detail of all the bridges of many hosts
+        All the bridges are fetched in a single subgraph which is then split
+        locally
+        Args:
+            hosts: (optional) The list of host names or IDs. If not specified,
+                the bridges of all the hosts are returned
         """
-        bridges = []
+        if hosts is not None and not hosts:
+            return []
+
+        data = self._run_query(self._bridge_subgraph(self._host_bridges(hosts)))
+        if len(data) == 0:
+            return []
 
-        bridge_data = self.list_bridges(host)
+        return OvSBridge.split(data[0])
 
-        if bridge_data.is_empty():
-            raise Exception("No bridges found in host: %s" % host)
+    def list_bridges_by_host(self,
+                             hosts: Optional[List[str]] = None) -> Dict[str, OvSBridgeData]:
+        """
+        List the bridges of many hosts at once
+        The bridges and the edges from their hosts are fetched in a single
+        subgraph which is then split locally
+        Args:
+            hosts: (optional) The list of host names or IDs. If not specified,
+                the bridges of all the hosts are listed
+        Returns a dictionary of host ID to its bridges (hosts without bridges
+        are not included)
+        """
+        if hosts is not None and not hosts:
+            return {}
+
+        data = self._run_query(self._host_bridges(hosts).in_e().subgraph())
+        if len(data) == 0:
+            return {}
+
+        nodes = {node['ID']: node for node in data[0]['Nodes']}
+        bridges: Dict[str, Dict[str, Any]] = {}
+        for edge in data[0]['Edges']:
+            parent = nodes.get(edge['Parent'])
+            child = nodes.get(edge['Child'])
+            if parent and child and parent['Metadata'].get('Type') == 'host' \
+                    and child['Metadata'].get('Type') == 'ovsbridge':
+                # A host and a bridge can be linked by more than one edge
+                bridges.setdefault(parent['ID'], {})[child['ID']] = child
+
+        return {
+            host: OvSBridgeData(list(children.values()))
+            for host, children in bridges.items()
+        }
+
+    @classmethod
+    def _host_bridges(cls, hosts: Optional[List[str]] = None) -> Query:
+        """
+        Returns the traversal of the bridges of some hosts (or of all of them)
+        """
+        query = Query.V()
 
-        for uuid, _ in bridge_data.data().iterrows():
-            bridges.append(self.get_bridge(uuid))
+        if hosts is not None:
+            within = Predicate.within(*hosts)
+            query = query.has('Type', 'host').has_either('ID', within, 'Name',
+                                                         within).out()
 
-        return bridges
+        return query.has('Type', 'ovsbridge')
+
+    @classmethod
+    def _bridge_subgraph(cls, bridges: Query) -> Query:
+        """
+        Returns the traversal of the subgraph made of some bridges, their
+        ports and their interfaces (see OvSBridge)
+        """
+        return bridges.descendants().has_either(
+            'Type', 'ovsport', 'Type',
+            'ovsbridge').out_e().has('RelationType', 'layer2').subgraph()
 
-    def get_num_ports(self, bridge) -> int:
+    def get_bridges_by_host(self, host: str) -> List[OvSBridge]:
         """
-        Get Nubmer of ports of a bridge
+        Get Bridge detail by host
         """
-        query = "V().Has('Type', 'ovsbridge', 'ID', '{id}')".format(id=bridge)
-        query += ".Out().Has('Type','ovsport').Count()"
-        return self._run_query(query)
+        bridges = self.get_bridges([host])
+
+        if not bridges:
+            raise Exception("No bridges found in host: %s" % host)
+
+        return bridges
 
-    def get_num_flows(self, bridge) -> int:
+    def get_bridge_counts(
+            self,
+            bridges: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
         """
-        Get Nubmer of flows of a bridge
+        Get the number of ports and flows of many bridges at once
+        Skydive's Gremlin has no group-count step, so instead of a Count()
+        query per bridge and counter, two traversals (sent concurrently)
+        fetch the edges of the bridges and their ports and flows, projected
+        to their ends and to their ID and Type, and the children are counted
+        locally by bridge
+        Args:
+            bridges: (optional) The list of bridge IDs. If not specified,
+                all the bridges are counted
+        Returns a dictionary of bridge ID to {'Ports': n, 'Flows': m}
         """
-        query = "V().Has('Type', 'ovsbridge', 'ID', '{id}')".format(id=bridge)
-        query += ".Out().Has('Type','ofrule').Count()"
-        return self._run_query(query)
+        if bridges is not None and not bridges:
+            return {}
+
+        query = Query.V().has('Type', 'ovsbridge')
+        if bridges is not None:
+            query = query.has('ID', Predicate.within(*bridges))
+
+        keys = {'ovsport': 'Ports', 'ofrule': 'Flows'}
+        edges, children = self._run_queries(
+            [query.out_e(),
+             query.out().has('Type', Predicate.within(*keys))],
+            Projection([('Parent', ), ('Child', ), ('ID', ),
+                        ('Metadata', 'Type')]))
+        child_keys = {
+            child['ID']: keys[child['Metadata']['Type']]
+            for child in children
+        }
+
+        counts: Dict[str, Dict[str, int]] = {
+            bridge: {
+                'Ports': 0,
+                'Flows': 0
+            }
+            for bridge in bridges or []
+        }
+        # Bridges and their children can be linked by more than one edge
+        # (e.g: ownership and layer2)
+        for parent, child in {(edge['Parent'], edge['Child']) for edge in edges}:
+            bridge = counts.setdefault(parent, {'Ports': 0, 'Flows': 0})
+            if child in child_keys:
+                bridge[child_keys[child]] += 1
+
+        return counts
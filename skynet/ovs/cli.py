@@ -3,7 +3,6 @@ import click
 from skynet.context import SkyNetCtxt
 from skynet.ovs.flows.data import OFFlowFilter, OFFlowProvider
 from skynet.ovs.bridge.cli import bridgecli
-import IPython
 
 
 @click.group(name='ovs')
@@ -50,25 +49,27 @@ def list(obj: SkyNetCtxt,
 
     \b
     FILTER is a Filter string formatted as "Filter1=Value1,Filter2=Value2,..."
+    Conditions can also be combined with AND, OR, NOT and parentheses and
+    compared with =, !=, <, <=, >, >= and ~ (regex). "Filter=Value1|Value2"
+    matches any of the values and "Filter=First..Last" a range of numbers.
     Supported Filters:
         Host        [Hostname]
         Cookie:     [Cookie]
         Table:      [Table Num]
         Priority    [Priority Num]
-        Match filters:
-            eth_src
-            eth_dst
-            ipv4_dst
-            ipv4_src
-            eth_type
-            tcp_dst
-            tcp_src
-            ip_proto
-            eth_type
-            in_port
+        Match filters (a list of values can be given as "Value1|Value2"):
+            eth_src     [MAC]
+            eth_dst     [MAC]
+            ipv4_dst    [IPv4 address or prefix]
+            ipv4_src    [IPv4 address or prefix]
+            eth_type    [Number or range]
+            tcp_dst     [Number or range]
+            tcp_src     [Number or range]
+            ip_proto    [Number or range]
+            in_port     [Number or range]
 
     E.g Host=mynode1.cluster,Cookie='0x12334',Table=3
-    Host=mynode,in_port=4,ipv4_addr=192.168.1.1
+    Host=mynode,in_port=4|5,ipv4_dst=192.168.1.0/24,tcp_dst=8000-8080
     """
     filter_obj = OFFlowFilter()
     filter_obj.process_string(filter)
@@ -83,6 +84,7 @@ def list(obj: SkyNetCtxt,
         print(flows.to_ovs())
 
     if interactive:
+        import IPython
         IPython.embed()
 
 
@@ -1,35 +1,44 @@
-from typing import Dict, List, Any
-from functools import partial
+from typing import Dict, List, Any, Tuple
 import pprint
 
-from skynet.common.data import SkyDiveData, Metadata, Field, \
+from pandas import Index, Series
+
+from skynet.common.data import SkyDiveData, Metadata, Field, Nested, \
     SkyDiveDataProvider, SkyDiveFilter, SkyDiveDataFilter, \
-    SkyDivePostFilter
+    SkyDiveColumnFilter
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
+from skynet.common.profile import profiled
 from skynet.ovs.flows.ovs_printer import OVSFlowPrinter
 
 
 class OFFLowData(SkyDiveData):
     METADATA: List[Field] = [
-        Metadata('Type'),
+        Metadata('Type', dtype='category'),
         Metadata('Name'),
         Metadata('Cookie'),
         Metadata('Actions'),
         Metadata('Metric'),
         Metadata('Filters'),
-        Metadata('Table'),
-        Metadata('Priority'),
+        Metadata('Table', dtype='Int16'),
+        Metadata('Priority', dtype='Int32'),
+    ]
+
+    SORT_BY = ['Table', 'Priority']
+    SORT_ASCENDING = [True, False]
+
+    NESTED: List[Nested] = [
+        Nested('Filters', ['Type', 'Value', 'Mask']),
+        Nested('Actions', ['Type', 'Arguments']),
+        Nested('Metric'),
     ]
 
     def __init__(self, data: List[Dict[str, Any]]):
         super(OFFLowData, self).__init__(data=data,
                                          meta=self.METADATA,
                                          index="ID")
-        if not self.is_empty():
-            self._data.sort_values(by=['Table', 'Priority'],
-                                   ascending=[True, False],
-                                   inplace=True)
 
+    @profiled('render')
     def to_text(self):
         """
         Pretty print each flow
@@ -38,10 +47,11 @@ class OFFLowData(SkyDiveData):
             return "No data"
 
         pp = pprint.PrettyPrinter(compact=False, width=200, sort_dicts=False)
-        for uid, flow in self._data.iterrows():
+        for uid, flow in self.data().iterrows():
             pp.pprint(flow.to_dict())
             print("-----------")
 
+    @profiled('render')
     def to_ovs(self):
         """ Experimental (not fully implemented) ovs flow format. It tires to mimic the output of
         ovs-ofproto dump-flows
@@ -50,7 +60,7 @@ class OFFLowData(SkyDiveData):
             return "No data"
 
         fp = OVSFlowPrinter()
-        for uid, flow in self._data.iterrows():
+        for uid, flow in self.data().iterrows():
             fp.fprint(flow)
 
 
@@ -66,26 +76,15 @@ class OFFlowFilter(SkyDiveDataFilter):
             SkyDiveFilter("Host", SkyDiveFilter.string)
         ]
         post_filters = [
-            SkyDivePostFilter('eth_src', partial(self.field_match, 'eth_src'),
-                              None),
-            SkyDivePostFilter('eth_dst', partial(self.field_match, 'eth_dst'),
-                              None),
-            SkyDivePostFilter('ipv4_dst', partial(self.field_match,
-                                                  'ipv4_dst'), None),
-            SkyDivePostFilter('ipv4_src', partial(self.field_match,
-                                                  'ipv4_src'), None),
-            SkyDivePostFilter('eth_type', partial(self.field_match,
-                                                  'eth_type'), None),
-            SkyDivePostFilter('tcp_dst', partial(self.field_match, 'tcp_dst'),
-                              int),
-            SkyDivePostFilter('tcp_src', partial(self.field_match, 'tcp_src'),
-                              int),
-            SkyDivePostFilter('ip_proto', partial(self.field_match,
-                                                  'ip_proto'), None),
-            SkyDivePostFilter('eth_type', partial(self.field_match,
-                                                  'eth_type'), None),
-            SkyDivePostFilter('in_port', partial(self.field_match, 'in_port'),
-                              int),
+            SkyDiveColumnFilter(name, func, trans)
+            for names, func, trans in [
+                (['eth_src', 'eth_dst'], SkyDiveColumnFilter.in_values,
+                 SkyDiveColumnFilter.values),
+                (['ipv4_src', 'ipv4_dst'], SkyDiveColumnFilter.in_networks,
+                 SkyDiveColumnFilter.networks),
+                (['eth_type', 'ip_proto', 'tcp_src', 'tcp_dst', 'in_port'],
+                 SkyDiveColumnFilter.in_ranges, SkyDiveColumnFilter.ranges),
+            ] for name in names
         ]
 
         super(OFFlowFilter, self).__init__(filters, post_filters)
@@ -94,12 +93,41 @@ class OFFlowFilter(SkyDiveDataFilter):
     def cookie(cls, cookie: str) -> int:
         return int(cookie, 16)
 
-    @classmethod
-    def field_match(cls, field_type: str, item: Dict, value: Any) -> bool:
-        return {
-            "Type": field_type,
-            "Value": value
-        } in item['Metadata']['Filters']
+    def _match_fields(self) -> List[str]:
+        return [post_filt.name for post_filt in self._post_filters]
+
+    def column_path(self, name: str) -> Tuple[str, ...]:
+        if name in self._match_fields():
+            return ('Metadata', 'Filters')
+        return super(OFFlowFilter, self).column_path(name)
+
+    def columns(self, data: List[Dict[str, Any]],
+                names: List[str]) -> Dict[str, Series]:
+        """
+        Normalize the match Filters of the flows into one column per field
+        holding all the values each flow matches on that field (indexed by
+        the position of the flow, see SkyDiveDataFilter.columns)
+        """
+        fields = self._match_fields()
+        matches: Dict[str, Tuple[List[int], List[Any]]] = {
+            name: ([], [])
+            for name in names if name in fields
+        }
+        if matches:
+            for pos, item in enumerate(data):
+                for match in item['Metadata'].get('Filters') or []:
+                    column = matches.get(match['Type'])
+                    if column is not None:
+                        column[0].append(pos)
+                        column[1].append(match['Value'])
+
+        columns = super(OFFlowFilter, self).columns(
+            data, [name for name in names if name not in matches])
+        columns.update({
+            name: Series(values, index=Index(rows, dtype='int64'), dtype=object)
+            for name, (rows, values) in matches.items()
+        })
+        return columns
 
 
 class OFFlowProvider(SkyDiveDataProvider):
@@ -119,22 +147,22 @@ class OFFlowProvider(SkyDiveDataProvider):
         """
         Get the Openflow Flows based on a filter
         """
-        query = "V()"
-        gremlin_filter = filter_obj.generate_gremlin() if filter_obj else ""
+        query = Query.V()
 
         if host:
-            query += ".Has('Type', 'host').HasEither('ID', '{host}', 'Name', '{host}').Out()".format(
-                host=host)
-
-        if bridge:
-            query += ".Has('Type', 'ovsbridge').HasEither('ID', '{bridge}', 'Name', '{bridge}').Out()".format(
-                bridge=bridge)
-        elif host:
-            query += ".Out()"
-
-        query += ".Has('Type', 'ofrule'){filt}".format(filt=gremlin_filter)
-
-        data = self._run_query(query)
-        processed_data = filter_obj.post_process(data) if filter_obj else data
-
-        return OFFLowData(processed_data)
+            query = query.has('Type', 'host').has_either('ID', host, 'Name',
+                                                         host).out()
+
+        if host or bridge:
+            # Flows are children of bridges. If only the host is given, only
+            # its bridges (rather than all its children) are traversed
+            query = query.has('Type', 'ovsbridge')
+            if bridge:
+                query = query.has_either('ID', bridge, 'Name', bridge)
+            query = query.out()
+
+        query = query.has('Type', 'ofrule')
+
+        data = self._run_filtered_query(query, OFFLowData.projection(),
+                                        filter_obj)
+        return OFFLowData(data)
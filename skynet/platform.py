@@ -3,6 +3,7 @@ import logging
 from typing import Dict, Any, List
 
 from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
 from skynet.common.data import SkyDiveDataProvider, Metadata, Field, \
     SkyDiveData
 
@@ -48,7 +49,9 @@ class PlatformProvider(SkyDiveDataProvider):
         """
         Returns tne ovn-conf object
         """
-        ovn = self._run_query("V().Has('Manager', 'k8s','Name', 'ovn-config')")
+        ovn = self._run_query(
+            Query.V().has('Manager', 'k8s', 'Name', 'ovn-config'),
+            K8sConfig.projection())
 
         return K8sConfig(ovn)
 
@@ -56,7 +59,7 @@ class PlatformProvider(SkyDiveDataProvider):
         """
         Determine the platform type
         """
-        k8s_count = self._run_query("V().Has('Manager', 'k8s').Count()")
+        k8s_count = self._run_query(Query.V().has('Manager', 'k8s').count())
 
         if k8s_count > 0:
             logging.getLogger("Platform").debug(
@@ -0,0 +1,69 @@
+import click
+
+from skynet.context import SkyNetCtxt
+from skynet.common.record import Archive, ReplayServer
+
+
+@click.group(name='record')
+@click.pass_obj
+def recordcli(obj: SkyNetCtxt) -> None:
+    """
+    Recorded Skydive archives commands. Archives are recorded by running
+    any command with the global --record option
+    """
+
+
+@recordcli.command()
+@click.argument('archive', type=click.Path(exists=True, dir_okay=False))
+@click.option('--listen',
+              '-l',
+              default='localhost:8082',
+              show_default=True,
+              help='Address to listen on: IP:PORT')
+@click.option('--delay',
+              is_flag=True,
+              help='Reproduce the recorded latency of each request')
+@click.pass_obj
+def serve(obj: SkyNetCtxt,
+          archive: str,
+          listen: str = 'localhost:8082',
+          delay: bool = False) -> None:
+    """
+    Serve a recorded archive as a Skydive API so skynet can be run against
+    it (with --api)
+    """
+    host, _, port = listen.rpartition(':')
+    if not port.isdigit():
+        raise click.BadParameter('Expected IP:PORT', param_hint='--listen')
+
+    recorded = Archive.load(archive)
+    server = ReplayServer(recorded, (host or 'localhost', int(port)), delay)
+    print("Replaying {} requests on {}".format(len(recorded), listen))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("{} requests replayed, {} not recorded".format(
+            server.hits, server.misses))
+
+
+@recordcli.command()
+@click.argument('archive', type=click.Path(exists=True, dir_okay=False))
+@click.pass_obj
+def show(obj: SkyNetCtxt, archive: str) -> None:
+    """
+    Print the requests of a recorded archive
+    """
+    recorded = Archive.load(archive)
+    total = 0.0
+    for entry in recorded:
+        total += entry.get('seconds', 0)
+        print("{method:<6} {status} {seconds:>9.4f}s {path} {data}".format(
+            method=entry['method'],
+            status=entry.get('status', 200),
+            seconds=entry.get('seconds', 0),
+            path=entry['path'],
+            data=entry.get('data') or ''))
+    print("{} requests in {:.4f}s".format(len(recorded), total))
@@ -0,0 +1,57 @@
+import click
+import signal
+import sys
+from typing import Optional
+
+from skynet.context import SkyNetCtxt, SkyNetSession
+from skynet.common.daemon import DaemonServer
+from skynet.common.mirror import GraphMirror, MirrorClient
+
+
+@click.command(name='serve')
+@click.option('--socket',
+              'path',
+              type=click.Path(dir_okay=False),
+              help='Unix socket to listen on. Default: $SKYNET_SOCKET or '
+              'skynet-<uid>.sock in $XDG_RUNTIME_DIR (or /tmp)')
+@click.option('--mirror',
+              is_flag=True,
+              help='Keep an in-memory mirror of the graph (see the global '
+              '--mirror option) and answer the queries of the current '
+              'topology from it')
+@click.pass_obj
+def serve(obj: SkyNetCtxt,
+          path: Optional[str] = None,
+          mirror: bool = False) -> None:
+    """
+    Run a skynet daemon. While it runs, skynet commands are run by the
+    daemon, which keeps the imports, the connections and the graph mirror
+    warm. Set SKYNET_DAEMON=0 to run a command locally
+    """
+    graph_mirror = None
+    session = SkyNetSession()
+    if mirror:
+        graph_mirror = GraphMirror(obj.api()).start()
+        if not graph_mirror.wait():
+            graph_mirror.stop()
+            raise click.UsageError('Cannot load the graph from {}'.format(
+                obj.api()))
+        session = SkyNetSession(obj.api(), MirrorClient(graph_mirror))
+
+    try:
+        server = DaemonServer(click.get_current_context().find_root().command,
+                              session, path)
+    except OSError as err:
+        raise click.ClickException(str(err))
+
+    # Clean up (e.g: remove the socket) when terminated too
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    print('Serving on {}'.format(server.path), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if graph_mirror is not None:
+            graph_mirror.stop()
@@ -0,0 +1,52 @@
+import click
+
+from skynet.context import SkyNetCtxt
+from skynet.common.snapshot import SnapshotError, SnapshotGraph, save
+from skynet.snapshot.data import SnapshotProvider
+
+
+@click.group(name='snapshot')
+@click.pass_obj
+def snapshotcli(obj: SkyNetCtxt) -> None:
+    """
+    Graph snapshot commands. Snapshots can be queried with the global
+    --snapshot option
+    """
+
+
+@snapshotcli.command(name='save')
+@click.argument('snapshot', type=click.Path(dir_okay=False))
+@click.pass_obj
+def save_snapshot(obj: SkyNetCtxt, snapshot: str) -> None:
+    """
+    Save the whole graph (at the time given by --at) into a snapshot file
+    """
+    nodes, edges = SnapshotProvider(obj).graph()
+    try:
+        save(snapshot, nodes, edges, {
+            'api': obj.api(),
+            'at': obj.options().get('at'),
+        })
+    except SnapshotError as err:
+        raise click.ClickException(str(err))
+    print("Saved {} nodes and {} edges into {}".format(len(nodes), len(edges),
+                                                       snapshot))
+
+
+@snapshotcli.command()
+@click.argument('snapshot', type=click.Path(exists=True, dir_okay=False))
+@click.pass_obj
+def show(obj: SkyNetCtxt, snapshot: str) -> None:
+    """
+    Print the information of a snapshot file and its number of nodes per Type
+    """
+    try:
+        graph = SnapshotGraph(snapshot)
+    except SnapshotError as err:
+        raise click.ClickException(str(err))
+    for key, value in graph.info.items():
+        print("{key:<10} {value}".format(key=key + ':', value=value))
+    for node_type, count in sorted(graph.sizes()):
+        print("  {node_type:<25} {count}".format(node_type=node_type,
+                                                 count=count))
+    graph.close()
@@ -0,0 +1,20 @@
+from typing import Any, Dict, List, Tuple
+
+from skynet.context import SkyNetCtxt
+from skynet.common.query import Query
+from skynet.common.data import SkyDiveDataProvider
+
+
+class SnapshotProvider(SkyDiveDataProvider):
+    """
+    SnapshotProvider fetches the whole graph to save it as a snapshot
+    """
+    def __init__(self, ctxt: SkyNetCtxt):
+        super(SnapshotProvider, self).__init__(ctxt=ctxt)
+
+    def graph(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Returns all the nodes and edges of the graph
+        """
+        nodes, edges = self._run_queries([Query.V(), Query.E()])
+        return nodes, edges
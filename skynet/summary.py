@@ -20,27 +20,35 @@ def summary(obj: SkyNetCtxt) -> None:
         if conf.is_empty():
             print('Unknown')
         else:
-            print(conf.data()[['MTU', 'NetCIDR',
-                               'SvcCIDR']].iloc[0].to_string())
+            print(conf.data(['MTU', 'NetCIDR', 'SvcCIDR']).iloc[0].to_string())
 
     hprov = HostDataProvider(obj)
     hosts = hprov.list()
     if hosts.is_empty():
         return
 
-    print("-----Hosts ({})-----".format(len(hosts.data().index)))
-    for uid, host in hosts.data()[[
-            'Hostname', 'PlatformFamily', 'PlatformVersion'
-    ]].iterrows():
+    print("-----Hosts ({})-----".format(len(hosts)))
+    host_data = hosts.data(['Hostname', 'PlatformFamily', 'PlatformVersion'])
+
+    # Fetch the bridges of all hosts at once and then count the ports and
+    # flows of all the bridges concurrently
+    oprov = OvSDataProvider(obj)
+    host_bridges = oprov.list_bridges_by_host()
+    counts = oprov.get_bridge_counts([
+        bridge for bridges in host_bridges.values()
+        for bridge in bridges.data(['Name']).index
+    ])
+
+    for uid, host in host_data.iterrows():
         print(textwrap.indent(host.to_string(), '  '))
 
-        oprov = OvSDataProvider(obj)
-        bridges = oprov.list_bridges(uid)
-        if bridges.is_empty():
+        bridges = host_bridges.get(uid)
+        if bridges is None or bridges.is_empty():
             print("No ovs info")
         else:
-            print("  {} OvS bridges".format(len(bridges.data().index)))
-            for buid, bridge in bridges.data().iterrows():
+            print("  {} OvS bridges".format(len(bridges)))
+            for buid, bridge in bridges.data(['Name']).iterrows():
                 print("    Bridge {}".format(bridge['Name']))
-                print("       Ports: {}".format(oprov.get_num_ports(buid)))
-                print("       Flows: {}".format(oprov.get_num_flows(buid)))
+                count = counts.get(buid, {})
+                print("       Ports: {}".format(count.get('Ports', 0)))
+                print("       Flows: {}".format(count.get('Flows', 0)))
@@ -0,0 +1,85 @@
+import io
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+import click
+
+from skynet.common import daemon
+from skynet.main import maincli
+
+
+@click.command()
+@click.argument('words', nargs=-1)
+def echo(words):
+    print(' '.join(words))
+
+
+class TestCommandLine(unittest.TestCase):
+    """
+    The command lines that have to run locally are told apart
+    """
+    def test_value_options(self):
+        # Every global option that takes a value is known
+        options = {
+            name
+            for param in maincli.params
+            if isinstance(param, click.Option) and not param.is_flag
+            and not param.count for name in param.opts
+        }
+        self.assertEqual(options, daemon.VALUE_OPTIONS)
+
+    def test_local(self):
+        for argv in [['serve'], ['-a', 'localhost:8082', 'serve', '--mirror'],
+                     ['--snapshot', 'summary', 'serve'], ['--', 'serve'],
+                     ['ovs', 'flows', 'list', '-i'],
+                     ['ovs', 'flows', 'list', '-if', 'json'],
+                     ['ovs', 'flows', 'list', '--interactive', 'in_port=1']]:
+            self.assertTrue(daemon._local(argv), argv)
+
+        for argv in [[], ['summary'], ['--api=serve', 'summary'],
+                     ['ovs', 'flows', 'list', 'Name=serve'],
+                     ['--profile', 'ovs', 'bridge', 'get', 'serve'],
+                     ['ovs', 'flows', 'list', '-f', 'json']]:
+            self.assertFalse(daemon._local(argv), argv)
+
+
+class TestDaemon(unittest.TestCase):
+    """
+    Only the user running the daemon can use it
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'skynet.sock')
+        self.server = daemon.DaemonServer(echo, None, self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join(timeout=5)
+        shutil.rmtree(self.tmpdir)
+
+    def forward(self, argv):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            code = daemon.forward(argv, self.path)
+        return code, out.getvalue(), err.getvalue()
+
+    def test_forward(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertEqual(self.forward(['hello', 'world']),
+                         (0, 'hello world\n', ''))
+        self.assertEqual(self.forward(['serve']), (None, '', ''))
+
+    def test_accessible_socket(self):
+        os.chmod(self.path, 0o666)
+        code, out, err = self.forward(['hello'])
+        self.assertIsNone(code)
+        self.assertIn('must belong to the user and have mode 0600', err)
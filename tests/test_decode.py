@@ -0,0 +1,30 @@
+import gc
+import json
+import unittest
+
+from skynet.common import codec
+from benchmarks import decode
+from benchmarks.extract import measure
+
+
+class TestDecode(unittest.TestCase):
+    """
+    The JSON backend of skynet decodes the Skydive responses as the
+    standard library does, faster (see benchmarks.decode)
+    """
+    def test_decode(self):
+        for name, body in decode.responses(1000, []):
+            with self.subTest(payload=name):
+                self.assertEqual(codec.loads(body), json.loads(body.decode()))
+                self.assertEqual(codec.loads(body.decode()),
+                                 json.loads(body.decode()))
+        # Rejected by orjson
+        self.assertEqual(json.dumps(codec.loads('[NaN]')), '[NaN]')
+        self.assertTrue(gc.isenabled())
+
+    @unittest.skipIf(codec.BACKEND == 'json', 'No faster JSON backend installed')
+    def test_speed(self):
+        for name, body in decode.responses(10000, []):
+            with self.subTest(payload=name):
+                stdlib = measure(lambda: json.loads(body.decode()), 5)
+                self.assertLess(measure(lambda: codec.loads(body), 5), stdlib)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from autobahn.asyncio.websocket import WebSocketServerFactory, \
+    WebSocketServerProtocol
+
+from skynet.common.mirror import GraphMirror, MirrorClient
+
+NODES = [
+    {'ID': 'host', 'Metadata': {'Type': 'host', 'Name': 'node0'}},
+    {'ID': 'br-int', 'Metadata': {'Type': 'ovsbridge', 'Name': 'br-int'}},
+    {'ID': 'port1', 'Metadata': {'Type': 'ovsport', 'Name': 'p1'}},
+]
+
+EDGES = [
+    {'ID': 'e1', 'Parent': 'host', 'Child': 'br-int',
+     'Metadata': {'RelationType': 'ownership'}},
+    {'ID': 'e2', 'Parent': 'br-int', 'Child': 'port1',
+     'Metadata': {'RelationType': 'ownership'}},
+]
+
+EVENTS = [
+    ('NodeAdded', {'ID': 'port2', 'Metadata': {'Type': 'ovsport', 'Name': 'p2'}}),
+    ('EdgeAdded', {'ID': 'e3', 'Parent': 'br-int', 'Child': 'port2',
+                   'Metadata': {'RelationType': 'ownership'}}),
+    ('NodeAdded', {'ID': 'port3', 'Metadata': {'Type': 'ovsport', 'Name': 'p3'}}),
+    ('EdgeAdded', {'ID': 'e4', 'Parent': 'br-int', 'Child': 'port3',
+                   'Metadata': {'RelationType': 'ownership'}}),
+    ('EdgeDeleted', {'ID': 'e2', 'Parent': 'br-int', 'Child': 'port1'}),
+    ('NodeDeleted', {'ID': 'port1'}),
+    ('NodeUpdated', {'ID': 'br-int', 'Metadata': {'Type': 'ovsbridge', 'Name': 'br-ex'}}),
+    # Deleting a node deletes its edges (e4)
+    ('NodeDeleted', {'ID': 'port3'}),
+]
+
+
+class StandInProtocol(WebSocketServerProtocol):
+    """
+    Answers the SyncRequest of the mirror with the graph and then replays
+    the events
+    """
+    def onOpen(self):
+        self.factory.connections.append(self)
+
+    def onMessage(self, payload, isBinary):
+        message = json.loads(payload.decode('utf8'))
+        if message['Type'] != 'SyncRequest':
+            return
+        self.send('SyncReply', {'Nodes': NODES, 'Edges': EDGES})
+        for msg_type, obj in EVENTS:
+            self.send(msg_type, obj)
+
+    def send(self, msg_type, obj):
+        self.sendMessage(json.dumps({
+            'Namespace': 'Graph',
+            'Type': msg_type,
+            'Obj': obj,
+        }).encode())
+
+
+class TestMirror(unittest.TestCase):
+    """
+    A GraphMirror follows the graph served by a stand-in of the analyzer's
+    websocket endpoint
+    """
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        factory = WebSocketServerFactory(loop=self.loop)
+        factory.protocol = StandInProtocol
+        factory.connections = []
+        self.factory = factory
+        self.server = self.loop.run_until_complete(
+            self.loop.create_server(factory, '127.0.0.1', 0))
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        port = self.server.sockets[0].getsockname()[1]
+        self.mirror = GraphMirror('127.0.0.1:{}'.format(port)).start()
+
+    def tearDown(self):
+        for connection in self.factory.connections:
+            self.loop.call_soon_threadsafe(connection.transport.close)
+        self.mirror.stop()
+        # The mirror thread closed its loop and exited
+        self.assertFalse(self.mirror._thread.is_alive())
+        self.assertTrue(self.mirror._loop.is_closed())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.server.close()
+        self.loop.close()
+
+    def wait_events(self, count, timeout=10.0):
+        deadline = time.time() + timeout
+        while self.mirror.events < count and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.mirror.events, count)
+
+    def test_events(self):
+        self.assertTrue(self.mirror.wait(10))
+        self.wait_events(len(EVENTS))
+        self.assertEqual(self.mirror.syncs, 1)
+
+        graph = self.mirror.graph()
+        with self.mirror.lock():
+            self.assertEqual([node['ID'] for node in graph.nodes()],
+                             ['host', 'br-int', 'port2'])
+            self.assertEqual([edge['ID'] for edge in graph.edges()], ['e1', 'e3'])
+            self.assertEqual([edge['ID'] for edge in graph.out_edges('br-int')],
+                             ['e3'])
+            self.assertEqual(graph.in_edges('port3'), [])
+            self.assertEqual(graph.lookup('Name', 'br-ex'), ['br-int'])
+
+        client = MirrorClient(self.mirror)
+        ports = client.lookup('G.V().Has("Name", "br-ex").Out("Type", "ovsport")')
+        self.assertEqual([port['ID'] for port in ports], ['port2'])
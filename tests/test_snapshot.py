@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from skynet.common import snapshot
+from skynet.common.graph import Graph
+
+NODES = [
+    {'ID': 'host', 'Host': 'node0', 'Metadata': {'Type': 'host', 'Name': 'node0'}},
+    {'ID': 'br-int', 'Host': 'node0', 'Metadata': {
+        'Type': 'ovsbridge', 'Name': 'br-int', 'Manager': 'ovn'}},
+    {'ID': 'port1', 'Host': 'node0', 'Metadata': {'Type': 'ovsport', 'Name': 'p1'}},
+    {'ID': 'port2', 'Host': 'node0', 'Metadata': {'Type': 'ovsport', 'Name': 'p2'}},
+    {'ID': 'br-ex', 'Host': 'node1', 'Metadata': {'Type': 'ovsbridge', 'Name': 'br-ex'}},
+    {'ID': 'notype', 'Host': 'node1', 'Metadata': {'Name': 42}},
+]
+
+EDGES = [
+    {'ID': 'e1', 'Parent': 'host', 'Child': 'br-int', 'Host': 'node0',
+     'Metadata': {'RelationType': 'ownership'}},
+    {'ID': 'e2', 'Parent': 'br-int', 'Child': 'port2', 'Host': 'node0',
+     'Metadata': {'RelationType': 'ownership'}},
+    {'ID': 'e3', 'Parent': 'br-int', 'Child': 'port1', 'Host': 'node0',
+     'Metadata': {'RelationType': 'ownership'}},
+    {'ID': 'e4', 'Parent': 'port1', 'Child': 'port2', 'Host': 'node0',
+     'Metadata': {'RelationType': 'layer2'}},
+    # The parent is not part of the graph
+    {'ID': 'e5', 'Parent': 'unknown', 'Child': 'br-ex', 'Host': 'node1',
+     'Metadata': {'RelationType': 'ownership'}},
+]
+
+
+@unittest.skipIf(snapshot.pyarrow is None, 'pyarrow is not installed')
+class TestSnapshot(unittest.TestCase):
+    """
+    A saved and loaded snapshot answers as the Graph it was saved from
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, 'graph.arrow')
+        snapshot.save(path, NODES, EDGES, {'api': 'localhost:8082'})
+        self.graph = Graph(NODES, EDGES)
+        self.snapshot = snapshot.SnapshotGraph(path)
+
+    def tearDown(self):
+        self.snapshot.close()
+        shutil.rmtree(self.tmpdir)
+
+    @classmethod
+    def ids(cls, elements):
+        return [element['ID'] for element in elements]
+
+    def test_info(self):
+        self.assertEqual(self.snapshot.info['api'], 'localhost:8082')
+        self.assertEqual(self.snapshot.info['nodes'], len(NODES))
+        self.assertEqual(self.snapshot.info['edges'], len(EDGES))
+
+    def test_elements(self):
+        for node in NODES:
+            self.assertEqual(self.snapshot.node(node['ID'])['Metadata'],
+                             node['Metadata'])
+        self.assertIsNone(self.snapshot.node('unknown'))
+        self.assertEqual(self.ids(self.snapshot.nodes()), self.ids(NODES))
+        self.assertEqual(self.ids(self.snapshot.edges()), self.ids(EDGES))
+        edge = self.snapshot.out_edges('port1')[0]
+        self.assertEqual((edge['Parent'], edge['Child'], edge['Metadata']),
+                         ('port1', 'port2', EDGES[3]['Metadata']))
+
+    def test_indexes(self):
+        for node_type in ['host', 'ovsbridge', 'ovsport', 'unknown']:
+            self.assertEqual(self.ids(self.snapshot.nodes(node_type)),
+                             self.ids(self.graph.nodes(node_type)))
+        for key, value in [('Type', 'ovsport'), ('Name', 'br-int'),
+                           ('ID', 'port1'), ('ID', 'unknown'),
+                           ('Name', 'unknown')]:
+            self.assertEqual(self.snapshot.lookup(key, value),
+                             self.graph.lookup(key, value))
+        self.assertEqual(self.snapshot.lookup('Host', 'node1'), ['br-ex', 'notype'])
+        self.assertEqual(self.snapshot.lookup('Manager', 'ovn'), ['br-int'])
+        self.assertIsNone(self.snapshot.lookup('Status', 'UP'))
+        self.assertEqual(dict(self.snapshot.sizes()),
+                         {'host': 1, 'ovsbridge': 2, 'ovsport': 2})
+
+    def test_adjacency(self):
+        for node in NODES + [{'ID': 'unknown'}]:
+            node_id = node['ID']
+            self.assertEqual(self.ids(self.snapshot.out_edges(node_id)),
+                             self.ids(self.graph.out_edges(node_id)))
+            self.assertEqual(self.ids(self.snapshot.in_edges(node_id)),
+                             self.ids(self.graph.in_edges(node_id)))
+            for args in [(), ('ownership', ), ('layer2', ), ('unknown', ),
+                         (None, 'ovsport'), ('ownership', 'host')]:
+                self.assertEqual(
+                    self.ids(self.snapshot.children(node_id, *args)),
+                    self.ids(self.graph.children(node_id, *args)))
+                self.assertEqual(
+                    self.ids(self.snapshot.parents(node_id, *args)),
+                    self.ids(self.graph.parents(node_id, *args)))
+
+    def test_read_only(self):
+        with self.assertRaises(snapshot.SnapshotError):
+            self.snapshot.add_node(NODES[0])
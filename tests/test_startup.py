@@ -0,0 +1,30 @@
+import os
+import unittest
+
+from benchmarks import startup
+
+BUDGET_SCALE = float(os.environ.get('SKYNET_BUDGET_SCALE', '1.0'))
+"""
+Scale of the time budgets (e.g: on slow machines)
+"""
+
+
+class TestStartup(unittest.TestCase):
+    """
+    The commands that do not query Skydive start fast (see
+    benchmarks.startup)
+    """
+    def test_budget(self):
+        for args, budget, _ in startup.CASES:
+            with self.subTest(command=' '.join(args)):
+                self.assertLessEqual(startup.startup(args, 3),
+                                     budget * BUDGET_SCALE)
+
+    def test_heavy_imports(self):
+        for args, _, forbidden in startup.CASES:
+            with self.subTest(command=' '.join(args)):
+                self.assertEqual(
+                    sorted(set(forbidden) & startup.imported(args)), [])
+
+    def test_lazy_help(self):
+        self.assertEqual(startup.lazy_help_errors(), [])